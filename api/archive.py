@@ -0,0 +1,43 @@
+"""API endpoints для архива закрытых задач"""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import User
+from dao.archive_dao import ArchiveDAO
+from schemas.task import ArchivedTaskResponse
+from api.dependencies import get_current_user, get_read_db, project_scope
+from utils.cache import response_cache
+
+router = APIRouter(prefix="/api/archive", tags=["archive"], dependencies=[Depends(project_scope)])
+
+
+@router.get("/tasks", response_model=List[ArchivedTaskResponse])
+async def get_archived_tasks(
+    skip: int = 0,
+    limit: int = 100,
+    workgroup_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Архивные задачи (недавно закрытые первыми)"""
+    async def build():
+        rows = await ArchiveDAO.get_all(db, skip=skip, limit=limit, workgroup_id=workgroup_id)
+        return [ArchiveDAO.to_response(row) for row in rows]
+
+    # Архив пополняется вместе с удалением из tasks — тот же тег
+    return await response_cache.respond(
+        "archive.list", "all", (skip, limit, workgroup_id), ("tasks",), build
+    )
+
+
+@router.get("/tasks/{task_id}", response_model=ArchivedTaskResponse)
+async def get_archived_task(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Архивная задача с историей статусов и опросов"""
+    row = await ArchiveDAO.get_by_id(db, task_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Задача в архиве не найдена")
+    return ArchiveDAO.to_response(row)
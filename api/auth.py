@@ -1,7 +1,7 @@
 """API endpoints для аутентификации"""
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from api.dependencies import get_db
+from api.dependencies import get_read_db
 from dao.user_dao import UserDAO
 from schemas.user import LoginRequest, TokenResponse, UserResponse
 from utils.auth import verify_password, create_access_token
@@ -13,7 +13,7 @@ router = APIRouter(prefix="/api/auth", tags=["auth"])
 @router.post("/login", response_model=TokenResponse)
 async def login(
     login_data: LoginRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Вход в систему"""
     user = await UserDAO.get_by_login(db, login_data.login)
@@ -1,12 +1,15 @@
 """Зависимости для API"""
 import logging
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 logger = logging.getLogger(__name__)
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.database import AsyncSessionLocal
+from config import PROJECT_SCOPE_REQUIRED
+from database.database import AsyncSessionLocal, ReadSessionLocal
+from database.project_scope import project_scope as _project_scope
+from dao.project_dao import ProjectDAO
 from dao.user_dao import UserDAO
 from database.models import User, UserRoleEnum
 from utils.auth import decode_access_token
@@ -14,8 +17,14 @@ from utils.auth import decode_access_token
 security = HTTPBearer(auto_error=False)
 
 
-async def get_db() -> AsyncSession:
-    """Получить сессию БД"""
+async def get_read_db() -> AsyncSession:
+    """Сессия только для чтения (GET-эндпоинты): без commit, с реплики или через PRAGMA query_only"""
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+async def get_write_db() -> AsyncSession:
+    """Сессия на запись: commit после успешного обработчика, rollback при ошибке"""
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -27,7 +36,7 @@ async def get_db() -> AsyncSession:
 
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ) -> User:
     """Получить текущего пользователя из JWT токена"""
     if not credentials:
@@ -73,6 +82,29 @@ async def get_current_user(
     return user
 
 
+# Проекты удаляются редко: существующие ID запоминаются, чтобы не ходить в БД на каждый запрос
+_known_projects: set[int] = set()
+
+
+async def project_scope(
+    x_project_id: Optional[int] = Header(None, description="Проект (мероприятие): видны только его задачи и группы"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Область проекта на время запроса (см. database/project_scope.py).
+    Подключается к роутерам с задачами и группами."""
+    if x_project_id is None:
+        if PROJECT_SCOPE_REQUIRED:
+            raise HTTPException(status_code=400, detail="Укажите проект в заголовке X-Project-Id")
+        yield None
+        return
+    if x_project_id not in _known_projects:
+        if await ProjectDAO.get_by_id(db, x_project_id) is None:
+            raise HTTPException(status_code=404, detail="Проект не найден")
+        _known_projects.add(x_project_id)
+    with _project_scope(x_project_id):
+        yield x_project_id
+
+
 def require_role(*allowed_roles: UserRoleEnum):
     """Декоратор для проверки роли"""
     async def role_checker(current_user: User = Depends(get_current_user)) -> User:
@@ -0,0 +1,47 @@
+"""API endpoints выгрузки задач в таблицы"""
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from database.models import User
+from api.dependencies import get_current_user, project_scope
+from services.export import csv_stream, xlsx_stream
+
+router = APIRouter(prefix="/api/export", tags=["export"], dependencies=[Depends(project_scope)])
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _filters(
+    workgroup_id: Optional[int] = None,
+    skip: int = 0,
+    limit: Optional[int] = Query(None, description="Без limit — все задачи"),
+    include_archived: bool = False,
+) -> dict:
+    """Те же фильтры, что у GET /api/tasks/"""
+    return {"workgroup_id": workgroup_id, "skip": skip, "limit": limit, "include_archived": include_archived}
+
+
+def _attachment(extension: str) -> dict:
+    filename = f"tasks-{datetime.utcnow():%Y%m%d-%H%M}.{extension}"
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+@router.get("/tasks.csv")
+async def export_tasks_csv(
+    filters: dict = Depends(_filters),
+    current_user: User = Depends(get_current_user),
+):
+    """Задачи с исполнителями, историей статусов и ответами на опросы в CSV (потоком)"""
+    return StreamingResponse(
+        csv_stream(**filters), media_type="text/csv; charset=utf-8", headers=_attachment("csv")
+    )
+
+
+@router.get("/tasks.xlsx")
+async def export_tasks_xlsx(
+    filters: dict = Depends(_filters),
+    current_user: User = Depends(get_current_user),
+):
+    """То же в XLSX (потоком)"""
+    return StreamingResponse(xlsx_stream(**filters), media_type=XLSX_MEDIA_TYPE, headers=_attachment("xlsx"))
@@ -0,0 +1,31 @@
+"""Проверки для оркестратора: liveness и readiness (Docker healthcheck, k8s probes)"""
+import asyncio
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import text
+from database.database import ReadSessionLocal
+from utils.startup import startup_profile
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+# Дольше этого БД не ждём: зависшая проверка хуже честного 503
+DB_CHECK_TIMEOUT_SECONDS = 2.0
+
+
+@router.get("/live")
+async def liveness():
+    """Процесс жив и event loop отвечает. БД не проверяется: её недоступность —
+    не повод перезапускать процесс"""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness():
+    """Готов принимать трафик: startup завершён (схема БД актуальна) и БД отвечает"""
+    if not startup_profile.ready:
+        raise HTTPException(status_code=503, detail="Приложение ещё запускается")
+    try:
+        async with ReadSessionLocal() as db:
+            await asyncio.wait_for(db.execute(text("SELECT 1")), DB_CHECK_TIMEOUT_SECONDS)
+    except Exception:
+        raise HTTPException(status_code=503, detail="База данных недоступна")
+    return {"status": "ready", **startup_profile.report()}
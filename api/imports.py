@@ -0,0 +1,42 @@
+"""API endpoints массового импорта из CSV"""
+from fastapi import APIRouter, Depends, File, Query, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import User, UserRoleEnum
+from schemas.imports import ImportReport
+from api.dependencies import get_write_db, require_role, project_scope
+from services.importer import import_users, import_tasks
+from services.notification_outbox import wake_notifier
+
+router = APIRouter(prefix="/api/import", tags=["import"], dependencies=[Depends(project_scope)])
+
+_importers = require_role(UserRoleEnum.PROJECT_MANAGER, UserRoleEnum.MAIN_ORGANIZER, UserRoleEnum.RESPONSIBLE)
+
+
+@router.post("/users", response_model=ImportReport)
+async def import_users_csv(
+    file: UploadFile = File(..., description="CSV: full_name, role, login, password, telegram_id, ..."),
+    dry_run: bool = Query(False, description="Только проверить файл и вернуть отчёт"),
+    current_user: User = Depends(_importers),
+    db: AsyncSession = Depends(get_write_db)
+):
+    """Импорт пользователей из CSV. При любой ошибке в файле ничего не создаётся."""
+    report = await import_users(db, file.file, current_user, dry_run=dry_run)
+    if report.created:
+        await db.commit()
+        wake_notifier()
+    return report
+
+
+@router.post("/tasks", response_model=ImportReport)
+async def import_tasks_csv(
+    file: UploadFile = File(..., description="CSV: title, description, status, workgroup, assignees, ..."),
+    dry_run: bool = Query(False, description="Только проверить файл и вернуть отчёт"),
+    current_user: User = Depends(_importers),
+    db: AsyncSession = Depends(get_write_db)
+):
+    """Импорт задач из CSV (автор — текущий пользователь). При любой ошибке ничего не создаётся."""
+    report = await import_tasks(db, file.file, current_user, dry_run=dry_run)
+    if report.created:
+        await db.commit()
+        wake_notifier()
+    return report
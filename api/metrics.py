@@ -0,0 +1,22 @@
+"""Метрики в формате Prometheus"""
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from config import METRICS_TOKEN
+from utils.metrics import registry
+
+router = APIRouter(tags=["system"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(authorization: str = Header(default="")):
+    """Метрики процесса: HTTP, БД, планировщик, бот, event loop.
+    Если задан METRICS_TOKEN, нужен заголовок Authorization: Bearer <token>."""
+    if METRICS_TOKEN and not secrets.compare_digest(authorization, f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверный токен метрик",
+        )
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
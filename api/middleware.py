@@ -0,0 +1,134 @@
+"""ASGI middleware приложения"""
+import asyncio
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import N_PLUS_ONE_THRESHOLD, PROFILE_SLOW_REQUESTS_MS, PROFILE_SAMPLE_INTERVAL_MS, PROFILE_DIR
+from database.query_stats import track_queries
+from utils.metrics import HTTP_REQUEST_DURATION
+from utils.profiling import SamplingProfiler, write_folded
+from utils.startup import startup_profile
+
+logger = logging.getLogger("api.requests")
+
+
+class QueryStatsMiddleware:
+    """Считает SQL-запросы и время в БД на каждый HTTP-запрос.
+    Отдаёт их в заголовке Server-Timing, пишет строку лога и предупреждает о вероятных N+1."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        with track_queries() as stats:
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    total_ms = (time.perf_counter() - started) * 1000
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}',
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                total_ms = (time.perf_counter() - started) * 1000
+                logger.info(
+                    "method=%s path=%s status=%s queries=%d db_ms=%.1f total_ms=%.1f",
+                    scope["method"], scope["path"], status_code, stats.count, stats.duration * 1000, total_ms,
+                )
+                for sql, n in [] if stats.batched else stats.repeated(N_PLUS_ONE_THRESHOLD):
+                    logger.warning(
+                        "Вероятный N+1: %s %s выполнил %d× одинаковый запрос: %s",
+                        scope["method"], scope["path"], n, " ".join(sql.split())[:300],
+                    )
+
+
+class MetricsMiddleware:
+    """Пишет длительность каждого HTTP-запроса в гистограмму http_request_duration_seconds.
+    В метку route идёт шаблон пути (/api/tasks/{task_id}), а не сам путь — иначе число рядов неограничено.
+    Заодно отмечает в профиле старта первый обслуженный запрос."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            startup_profile.mark("first_request")
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code,
+            )
+
+
+class SlowRequestProfilerMiddleware:
+    """Сэмплирует стек потока event loop, пока обрабатываются запросы, и для запросов дольше
+    PROFILE_SLOW_REQUESTS_MS пишет свёрнутые стеки в PROFILE_DIR (flamegraph.pl, speedscope).
+    Loop один на все запросы, поэтому в профиль попадает и работа параллельных запросов."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.threshold = PROFILE_SLOW_REQUESTS_MS / 1000
+        self._profiler = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self._profiler is None:
+            self._profiler = SamplingProfiler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL_MS / 1000)
+
+        started = time.monotonic()
+        self._profiler.acquire()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._profiler.release()
+            duration = time.monotonic() - started
+            if duration >= self.threshold:
+                stacks = self._profiler.folded(started)
+                if stacks:
+                    route = getattr(scope.get("route"), "path", scope["path"])
+                    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", route).strip("_") or "root"
+                    path = PROFILE_DIR / (
+                        f"{datetime.now():%Y%m%d-%H%M%S}-{scope['method']}-{name}-{duration * 1000:.0f}ms.folded"
+                    )
+                    await asyncio.to_thread(write_folded, path, stacks)
+                    logger.warning(
+                        "Медленный запрос %s %s: %.0f мс, профиль: %s",
+                        scope["method"], scope["path"], duration * 1000, path,
+                    )
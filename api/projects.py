@@ -0,0 +1,72 @@
+"""API endpoints для проектов (мероприятий) и их прогресса"""
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import Project, TaskStatusEnum, User, UserRoleEnum
+from dao.project_dao import ProjectDAO
+from schemas.project import ProjectCreate, ProjectProgress, ProjectWithProgress
+from api.dependencies import get_current_user, get_read_db, get_write_db, require_role
+
+# Без project_scope: список проектов — то, из чего клиент выбирает X-Project-Id
+router = APIRouter(prefix="/api/projects", tags=["projects"])
+
+
+def _progress(counts: dict) -> ProjectProgress:
+    """Итоги и процент выполнения из счётчиков ProjectDAO.get_progress"""
+    by_status = counts["by_status"]
+    total = sum(by_status.values())
+    countable = total - by_status[TaskStatusEnum.CANCELLED]
+    done = by_status[TaskStatusEnum.DONE]
+    return ProjectProgress(
+        total=total,
+        by_status=by_status,
+        overdue=counts["overdue"],
+        completion_percent=round(done * 100 / countable, 1) if countable else 0.0,
+    )
+
+
+async def _with_progress(db: AsyncSession, projects: List[Project]) -> List[ProjectWithProgress]:
+    progress = await ProjectDAO.get_progress(db, [p.id for p in projects])
+    return [
+        ProjectWithProgress.model_validate(p).model_copy(update={"progress": _progress(progress[p.id])})
+        for p in projects
+    ]
+
+
+@router.get("/", response_model=List[ProjectWithProgress])
+async def get_projects(
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Список проектов с прогрессом по задачам"""
+    projects = await ProjectDAO.get_all(db, skip=skip, limit=limit)
+    return await _with_progress(db, projects)
+
+
+@router.get("/{project_id}", response_model=ProjectWithProgress)
+async def get_project(
+    project_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Проект с прогрессом: задачи по статусам, просроченные, процент выполнения"""
+    project = await ProjectDAO.get_by_id(db, project_id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Проект не найден"
+        )
+    return (await _with_progress(db, [project]))[0]
+
+
+@router.post("/", response_model=ProjectWithProgress)
+async def create_project(
+    project_data: ProjectCreate,
+    current_user: User = Depends(require_role(UserRoleEnum.PROJECT_MANAGER)),
+    db: AsyncSession = Depends(get_write_db)
+):
+    """Создать проект (только проектник)"""
+    project = await ProjectDAO.create(db, Project(name=project_data.name))
+    return (await _with_progress(db, [project]))[0]
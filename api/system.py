@@ -0,0 +1,24 @@
+"""Служебные endpoints: состояние кэша и т.п."""
+from fastapi import APIRouter, Depends
+from database.models import User, UserRoleEnum
+from api.dependencies import require_role
+from utils.cache import response_cache
+from utils.startup import startup_profile
+
+router = APIRouter(prefix="/api/system", tags=["system"])
+
+
+@router.get("/cache")
+async def get_cache_stats(
+    current_user: User = Depends(require_role(UserRoleEnum.PROJECT_MANAGER))
+):
+    """Статистика кэша ответов: попадания/промахи по эндпоинтам, инвалидации по тегам"""
+    return response_cache.stats()
+
+
+@router.get("/startup")
+async def get_startup_profile(
+    current_user: User = Depends(require_role(UserRoleEnum.PROJECT_MANAGER))
+):
+    """Профиль холодного старта процесса: секунды от запуска до каждого этапа"""
+    return startup_profile.report()
@@ -1,20 +1,25 @@
 """API endpoints для задач"""
+from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import select
 from pydantic import BaseModel
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
-from sqlalchemy import insert, delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import User, UserRoleEnum, TaskStatusEnum, TaskPollResponse, task_assignees
+from database.models import User, UserRoleEnum, TaskStatusEnum
 from dao.task_dao import TaskDAO
 from dao.workgroup_dao import WorkGroupDAO
 from dao.user_dao import UserDAO
-from schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskWithRelations
+from dao.outbox_dao import OutboxDAO
+from dao.archive_dao import ArchiveDAO
+from schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskWithRelations, TaskInboxPage
 from schemas.user import UserResponse
-from api.dependencies import get_current_user, get_db
-from services.telegram_notify import notify_task_assigned, notify_task_poll
+from api.dependencies import get_current_user, get_read_db, get_write_db, project_scope
+from database.project_scope import current_project
+from services import notification_aggregator
+from services.notification_outbox import wake_notifier
+from services.poll_outbox import wake_sender
+from utils.cache import response_cache
 
-router = APIRouter(prefix="/api/tasks", tags=["tasks"])
+router = APIRouter(prefix="/api/tasks", tags=["tasks"], dependencies=[Depends(project_scope)])
 
 
 def _validate_poll_time(poll_time: Optional[str]) -> None:
@@ -25,28 +30,54 @@ def _validate_poll_time(poll_time: Optional[str]) -> None:
         raise HTTPException(status_code=400, detail="poll_time должен быть в формате HH:MM (например 09:00)")
 
 
+def _check_project(project_id: Optional[int], workgroup=None) -> Optional[int]:
+    """Проект задачи: указанный, иначе проект группы, иначе текущий (X-Project-Id).
+    В области проекта задачу нельзя положить в другой проект; группа и задача — в одном проекте."""
+    scope = current_project.get()
+    project_id = project_id or (workgroup.project_id if workgroup else None) or scope
+    if scope is not None and project_id != scope:
+        raise HTTPException(status_code=400, detail="Задача должна относиться к текущему проекту (X-Project-Id)")
+    if workgroup is not None and workgroup.project_id is not None and project_id != workgroup.project_id:
+        raise HTTPException(status_code=400, detail="Рабочая группа относится к другому проекту")
+    return project_id
+
+
 @router.get("/", response_model=List[TaskResponse])
 async def get_tasks(
     skip: int = 0,
     limit: int = 100,
     workgroup_id: int = None,
+    include_archived: bool = Query(False, description="Добавить в конец задачи из архива (с теми же skip/limit)"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить список задач"""
-    if workgroup_id:
-        tasks = await TaskDAO.get_by_workgroup(db, workgroup_id)
-    else:
-        tasks = await TaskDAO.get_all(db, skip=skip, limit=limit)
-    
-    return [TaskResponse.model_validate(t) for t in tasks]
+    async def build():
+        if workgroup_id:
+            tasks = await TaskDAO.get_by_workgroup(db, workgroup_id)
+        else:
+            tasks = await TaskDAO.get_all(db, skip=skip, limit=limit)
+        if not include_archived:
+            return tasks
+        archived = await ArchiveDAO.get_all(
+            db, skip=0 if workgroup_id else skip, limit=limit, workgroup_id=workgroup_id
+        )
+        return [TaskResponse.model_validate(t) for t in tasks] + [
+            TaskResponse.model_validate(ArchiveDAO.to_response(row)) for row in archived
+        ]
+
+    # Список задач одинаков для всех ролей — общая область видимости
+    return await response_cache.respond(
+        "tasks.list", "all", (skip, limit, workgroup_id, include_archived), ("tasks",), build,
+        schema=None if include_archived else TaskResponse,
+    )
 
 
 @router.get("/assignable-users", response_model=List[UserResponse])
 async def get_task_assignable_users(
     workgroup_id: Optional[int] = Query(None, description="ID рабочей группы — вернёт участников группы"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Пользователи, которых можно назначить исполнителями задачи.
     Если указан workgroup_id — возвращаются участники этой группы.
@@ -72,18 +103,51 @@ async def get_task_assignable_users(
 @router.get("/my", response_model=List[TaskResponse])
 async def get_my_tasks(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить задачи, назначенные текущему пользователю"""
-    tasks = await TaskDAO.get_by_assigned_to(db, current_user.id)
-    return [TaskResponse.model_validate(t) for t in tasks]
+    async def build():
+        return await TaskDAO.get_by_assigned_to(db, current_user.id)
+
+    return await response_cache.respond(
+        "tasks.my", f"user{current_user.id}", (), ("tasks",), build, schema=TaskResponse
+    )
+
+
+@router.get("/inbox", response_model=TaskInboxPage)
+async def get_my_inbox(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Открытые задачи текущего пользователя, отсортированные по сроку (keyset-пагинация)"""
+    after = None
+    if cursor:
+        try:
+            due_raw, id_raw = cursor.rsplit("_", 1)
+            after = (datetime.fromisoformat(due_raw) if due_raw else None, int(id_raw))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некорректный cursor")
+
+    async def build():
+        tasks = await TaskDAO.get_inbox(db, current_user.id, limit=limit, after=after)
+        next_cursor = None
+        if len(tasks) == limit:
+            last = tasks[-1]
+            next_cursor = f"{last.due_date.isoformat() if last.due_date else ''}_{last.id}"
+        return TaskInboxPage(items=[TaskResponse.model_validate(t) for t in tasks], next_cursor=next_cursor)
+
+    return await response_cache.respond(
+        "tasks.inbox", f"user{current_user.id}", (limit, cursor), ("tasks",), build
+    )
 
 
 @router.get("/{task_id}", response_model=TaskWithRelations)
 async def get_task(
     task_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить задачу по ID"""
     task = await TaskDAO.get_by_id(db, task_id)
@@ -97,25 +161,18 @@ async def get_task(
     return TaskWithRelations.model_validate(task)
 
 
-async def _send_task_assigned_notifications(
-    assignee_telegram_ids: List[int], title: str, description: str = ""
-):
-    """Отправить уведомления в Telegram назначенным исполнителям (вызывается в фоне)"""
-    for tid in assignee_telegram_ids:
-        await notify_task_assigned(tid, title, description or "")
-
-
 @router.post("/", response_model=TaskResponse)
 async def create_task(
     task_data: TaskCreate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Создать задачу"""
     from database.models import Task
     
     # Проверка рабочей группы, если указана
+    workgroup = None
     if task_data.workgroup_id:
         workgroup = await WorkGroupDAO.get_by_id(db, task_data.workgroup_id)
         if not workgroup:
@@ -123,6 +180,7 @@ async def create_task(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Рабочая группа не найдена"
             )
+    project_id = _check_project(task_data.project_id, workgroup)
     
     assignee_ids = list(task_data.assignee_ids) if task_data.assignee_ids else []
     if task_data.assigned_to_id and task_data.assigned_to_id not in assignee_ids:
@@ -133,7 +191,7 @@ async def create_task(
         title=task_data.title,
         description=task_data.description,
         status=task_data.status,
-        project_id=task_data.project_id,
+        project_id=project_id,
         workgroup_id=task_data.workgroup_id,
         created_by_id=current_user.id,
         assigned_to_id=assignee_ids[0] if assignee_ids else None,
@@ -143,22 +201,15 @@ async def create_task(
     )
     
     created_task = await TaskDAO.create(db, task)
-    for uid in assignee_ids:
-        await db.execute(insert(task_assignees).values(task_id=created_task.id, user_id=uid))
+    await TaskDAO.set_assignees(db, created_task, assignee_ids)
     await db.flush()
     await db.refresh(created_task)
 
-    # Собрать telegram_id назначенных для уведомлений (до закрытия сессии)
-    notify_ids = []
-    for uid in assignee_ids:
-        user = await UserDAO.get_by_id(db, uid)
-        if user and user.telegram_id:
-            notify_ids.append(user.telegram_id)
-    if notify_ids:
-        background_tasks.add_task(
-            _send_task_assigned_notifications,
-            notify_ids, task_data.title, task_data.description
-        )
+    # Уведомления назначенным — в очередь вместе с задачей (отправитель будится после коммита)
+    if await notification_aggregator.task_assigned(
+        db, created_task.id, task_data.title, task_data.description, await UserDAO.get_by_ids(db, assignee_ids)
+    ):
+        background_tasks.add_task(wake_notifier)
     # Перезагружаем задачу со всеми связями (assignees, poll_responses), чтобы избежать MissingGreenlet при сериализации
     task_for_response = await TaskDAO.get_by_id(db, created_task.id)
     return TaskResponse.model_validate(task_for_response)
@@ -170,7 +221,7 @@ async def update_task(
     task_data: TaskUpdate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Обновить задачу"""
     task = await TaskDAO.get_by_id(db, task_id)
@@ -182,6 +233,27 @@ async def update_task(
         )
     
     old_assignee_ids = set(task.assignee_ids) if task.assignees else set()
+    old_status = task.status
+
+    # Проект и группа проверяются вместе и до любых изменений — как при создании задачи
+    project_id = task.project_id
+    workgroup_id = task.workgroup_id
+    if task_data.project_id is not None or task_data.workgroup_id is not None:
+        workgroup = None
+        if task_data.workgroup_id is not None:
+            workgroup_id = task_data.workgroup_id
+            workgroup = await WorkGroupDAO.get_by_id(db, workgroup_id)
+            if not workgroup:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Рабочая группа не найдена"
+                )
+        elif workgroup_id is not None:
+            # Группа уже задана, меняется проект: группа из другого проекта в области не видна
+            workgroup = await WorkGroupDAO.get_by_id(db, workgroup_id)
+            if not workgroup:
+                raise HTTPException(status_code=400, detail="Рабочая группа относится к другому проекту")
+        project_id = _check_project(task_data.project_id or task.project_id, workgroup)
     
     # Обновление полей
     if task_data.title is not None:
@@ -191,36 +263,31 @@ async def update_task(
     if task_data.status is not None:
         task.status = task_data.status
         if task_data.status == TaskStatusEnum.DONE:
-            from datetime import datetime
             task.completed_at = datetime.utcnow()
-    if task_data.project_id is not None:
-        task.project_id = task_data.project_id
-    if task_data.workgroup_id is not None:
-        task.workgroup_id = task_data.workgroup_id
-    if task_data.assigned_to_id is not None:
-        task.assigned_to_id = task_data.assigned_to_id
-    if task_data.assignee_ids is not None:
-        await db.execute(delete(task_assignees).where(task_assignees.c.task_id == task_id))
-        for uid in task_data.assignee_ids:
-            await db.execute(insert(task_assignees).values(task_id=task_id, user_id=uid))
-        task.assigned_to_id = task_data.assignee_ids[0] if task_data.assignee_ids else None
+    task.project_id = project_id
+    task.workgroup_id = workgroup_id
+    new_assignee_list = task_data.assignee_ids
+    if new_assignee_list is None and task_data.assigned_to_id is not None:
+        # deprecated assigned_to_id: делаем его первым исполнителем, остальные сохраняются
+        new_assignee_list = [task_data.assigned_to_id] + [
+            uid for uid in task.assignee_ids if uid != task_data.assigned_to_id
+        ]
+    if new_assignee_list is not None:
+        await TaskDAO.set_assignees(db, task, new_assignee_list)
         await db.flush()
 
-        # Уведомить только вновь добавленных исполнителей
-        new_assignee_ids = set(task_data.assignee_ids)
+        # Уведомить только вновь добавленных исполнителей; снятым — отменить неотправленное назначение
+        new_assignee_ids = set(new_assignee_list)
         newly_added = new_assignee_ids - old_assignee_ids
-        notify_ids = []
-        for uid in newly_added:
-            user = await UserDAO.get_by_id(db, uid)
-            if user and user.telegram_id:
-                notify_ids.append(user.telegram_id)
-        if notify_ids:
-            title = task_data.title or task.title
-            desc = task_data.description if task_data.description is not None else task.description
-            background_tasks.add_task(
-                _send_task_assigned_notifications,
-                notify_ids, title, desc or ""
-            )
+        await notification_aggregator.task_unassigned(db, task_id, old_assignee_ids - new_assignee_ids)
+        if await notification_aggregator.task_assigned(
+            db, task_id, task.title, task.description, await UserDAO.get_by_ids(db, newly_added)
+        ):
+            background_tasks.add_task(wake_notifier)
+    if task_data.title is not None or task_data.description is not None:
+        # Ещё не отправленные назначения уйдут с новым названием и описанием
+        assignee_ids = set(new_assignee_list) if new_assignee_list is not None else old_assignee_ids
+        await notification_aggregator.task_changed(db, task_id, assignee_ids, task.title, task.description)
 
     if task_data.due_date is not None:
         task.due_date = task_data.due_date
@@ -231,7 +298,9 @@ async def update_task(
         task.poll_time = task_data.poll_time
 
     updated_task = await TaskDAO.update(db, task)
-    if task_data.assignee_ids is not None:
+    if updated_task.status != old_status:
+        await TaskDAO.record_status(db, task_id, updated_task.status, current_user.id)
+    if new_assignee_list is not None:
         await db.refresh(updated_task)
     return TaskResponse.model_validate(updated_task)
 
@@ -240,7 +309,7 @@ async def update_task(
 async def delete_task(
     task_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Удалить задачу"""
     task = await TaskDAO.get_by_id(db, task_id)
@@ -258,6 +327,7 @@ async def delete_task(
             detail="Недостаточно прав для удаления задачи"
         )
     
+    await notification_aggregator.task_unassigned(db, task_id, task.assignee_ids)
     await TaskDAO.delete(db, task_id)
     return {"message": "Задача удалена"}
 
@@ -273,31 +343,10 @@ async def submit_poll_response(
     task_id: int,
     body: PollResponseSubmit,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Сохранить ответ пользователя на опрос о задаче (вызывается ботом или при обновлении статуса)"""
-    result = await db.execute(
-        select(TaskPollResponse)
-        .where(
-            TaskPollResponse.task_id == task_id,
-            TaskPollResponse.user_id == body.user_id,
-            TaskPollResponse.response_text.is_(None),
-        )
-        .order_by(TaskPollResponse.polled_at.desc())
-        .limit(1)
-    )
-    poll_rec = result.scalar_one_or_none()
-    if poll_rec:
-        poll_rec.response_text = (body.response_text or "").strip() or None
-        task = await TaskDAO.get_by_id(db, task_id)
-        if task and task.status not in (TaskStatusEnum.DONE, TaskStatusEnum.CANCELLED):
-            next_status = {
-                TaskStatusEnum.NEW: TaskStatusEnum.IN_PROGRESS,
-                TaskStatusEnum.IN_PROGRESS: TaskStatusEnum.REVIEW,
-                TaskStatusEnum.REVIEW: TaskStatusEnum.DONE,
-            }.get(task.status)
-            if next_status:
-                task.status = next_status
+    if await TaskDAO.save_poll_answer(db, task_id, body.user_id, body.response_text):
         await db.commit()
         return {"ok": True}
     return {"ok": False, "message": "Нет ожидающего ответа опроса"}
@@ -307,31 +356,34 @@ async def submit_poll_response(
 async def nudge_task(
     task_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
-    """Принудительно отправить напоминание-опрос исполнителям задачи в Telegram (тык)"""
-    from datetime import datetime
+    """Принудительно отправить напоминание-опрос исполнителям задачи в Telegram (тык).
+    Опросы ставятся в очередь отправки; повторный тык в ту же минуту не дублирует сообщения."""
     task = await TaskDAO.get_by_id(db, task_id)
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Задача не найдена")
     if not task.assignees:
         return {"ok": False, "message": "Нет исполнителей у задачи"}
     now = datetime.utcnow()
-    sent = 0
-    for user in task.assignees:
-        if user.telegram_id:
-            try:
-                await notify_task_poll(user.telegram_id, task.title, task.id)
-                db.add(TaskPollResponse(
-                    task_id=task.id,
-                    user_id=user.id,
-                    polled_at=now,
-                    response_text=None,
-                    status_at_poll=task.status.value if task.status else None,
-                ))
-                sent += 1
-            except Exception:
-                pass
+    intents = [
+        {
+            "idempotency_key": OutboxDAO.poll_key("nudge", task.id, user.id, now),
+            "task_id": task.id,
+            "user_id": user.id,
+            "telegram_id": user.telegram_id,
+            "polled_at": now,
+            "status_at_poll": task.status.value if task.status else None,
+        }
+        for user in task.assignees
+        if user.telegram_id
+    ]
+    queued = await OutboxDAO.enqueue_polls(db, intents)
     task.last_polled_at = now
     await db.commit()
-    return {"ok": True, "sent": sent, "message": f"Напоминание отправлено {sent} чел." if sent else "Нет исполнителей с Telegram"}
+    wake_sender()
+    if not intents:
+        return {"ok": True, "sent": 0, "message": "Нет исполнителей с Telegram"}
+    if not queued:
+        return {"ok": True, "sent": 0, "message": "Напоминание уже отправлено в эту минуту"}
+    return {"ok": True, "sent": queued, "message": f"Напоминание поставлено в очередь: {queued} чел."}
@@ -0,0 +1,50 @@
+"""API endpoint таймлайна задач"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import User
+from schemas.timeline import TimelineResponse
+from api.dependencies import get_current_user, get_read_db, project_scope
+from services.timeline import TIMELINE_DEFAULT_DAYS, get_timeline
+from utils.cache import response_cache
+
+router = APIRouter(prefix="/api/timeline", tags=["timeline"], dependencies=[Depends(project_scope)])
+
+# Окно длиннее года на одной странице не читается, а выборка растёт линейно
+MAX_WINDOW_DAYS = 366
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """Время из запроса -> наивное UTC, как в БД (время без пояса считается UTC)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@router.get("", response_model=TimelineResponse)
+async def get_task_timeline(
+    date_from: Optional[datetime] = Query(None, alias="from", description=f"Начало окна (по умолчанию to − {TIMELINE_DEFAULT_DAYS} дн.)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Конец окна (по умолчанию сейчас)"),
+    workgroup_id: Optional[int] = None,
+    limit: int = Query(200, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Отрезки статусов и отметки опросов задач, пересекающих окно [from, to]"""
+    # «Сейчас» с точностью до минуты: открытые полосы тянутся до него, а ключ кэша живёт минуту
+    now = datetime.utcnow().replace(second=0, microsecond=0) + timedelta(minutes=1)
+    end = _utc_naive(date_to) if date_to else now
+    start = _utc_naive(date_from) if date_from else end - timedelta(days=TIMELINE_DEFAULT_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="Начало окна (from) должно быть раньше конца (to)")
+    if end - start > timedelta(days=MAX_WINDOW_DAYS):
+        raise HTTPException(status_code=400, detail=f"Окно таймлайна — не больше {MAX_WINDOW_DAYS} дней")
+
+    async def build():
+        return await get_timeline(db, start, end, now, workgroup_id=workgroup_id, limit=limit)
+
+    return await response_cache.respond(
+        "timeline", "all", (start.isoformat(), end.isoformat(), now.isoformat(), workgroup_id, limit),
+        ("tasks",), build,
+    )
@@ -5,9 +5,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database.models import User, UserRoleEnum
 from dao.user_dao import UserDAO
 from schemas.user import UserCreate, UserUpdate, UserResponse, UserWithHierarchy
-from api.dependencies import get_current_user, require_role, get_db
+from api.dependencies import get_current_user, require_role, get_read_db, get_write_db
 from utils.auth import get_password_hash
-from services.telegram_notify import notify_role_assigned, ROLE_NAMES
+from services import notification_aggregator
+from services.notification_outbox import wake_notifier
+from utils.cache import response_cache
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -41,45 +43,57 @@ async def get_users(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить список пользователей"""
-    # Проектник и главные организаторы видят всех
-    if current_user.role in [UserRoleEnum.PROJECT_MANAGER, UserRoleEnum.MAIN_ORGANIZER]:
-        users = await UserDAO.get_all(db, skip=skip, limit=limit)
-    # Ответственные видят только своих подчиненных
-    elif current_user.role == UserRoleEnum.RESPONSIBLE:
-        users = await UserDAO.get_created_by(db, current_user.id)
-    else:
+    if current_user.role not in [UserRoleEnum.PROJECT_MANAGER, UserRoleEnum.MAIN_ORGANIZER, UserRoleEnum.RESPONSIBLE]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Недостаточно прав"
         )
     
-    return [UserResponse.model_validate(u) for u in users]
+    async def build():
+        # Проектник и главные организаторы видят всех
+        if current_user.role in [UserRoleEnum.PROJECT_MANAGER, UserRoleEnum.MAIN_ORGANIZER]:
+            users = await UserDAO.get_all(db, skip=skip, limit=limit)
+        # Ответственные видят только своих подчиненных
+        else:
+            users = await UserDAO.get_created_by(db, current_user.id)
+        return users
+
+    scope = f"user{current_user.id}" if current_user.role == UserRoleEnum.RESPONSIBLE else "all"
+    return await response_cache.respond(
+        "users.list", scope, (skip, limit), ("users",), build, schema=UserResponse
+    )
 
 
 @router.get("/assignable", response_model=List[UserResponse])
 async def get_assignable_users(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Пользователи, которых можно назначить в рабочую группу (с учётом иерархии: ГО не может добавить проектника)"""
-    if current_user.role == UserRoleEnum.PROJECT_MANAGER:
-        users = await UserDAO.get_all(db, skip=0, limit=500)
-    elif current_user.role == UserRoleEnum.MAIN_ORGANIZER:
-        all_users = await UserDAO.get_all(db, skip=0, limit=500)
-        users = [u for u in all_users if u.role != UserRoleEnum.PROJECT_MANAGER]
-    else:
-        users = []
-    return [UserResponse.model_validate(u) for u in users]
+    async def build():
+        if current_user.role == UserRoleEnum.PROJECT_MANAGER:
+            users = await UserDAO.get_all(db, skip=0, limit=500)
+        elif current_user.role == UserRoleEnum.MAIN_ORGANIZER:
+            all_users = await UserDAO.get_all(db, skip=0, limit=500)
+            users = [u for u in all_users if u.role != UserRoleEnum.PROJECT_MANAGER]
+        else:
+            users = []
+        return users
+
+    # Видимость зависит только от роли
+    return await response_cache.respond(
+        "users.assignable", current_user.role.value, (), ("users",), build, schema=UserResponse
+    )
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить пользователя по ID"""
     user = await UserDAO.get_by_id(db, user_id)
@@ -107,7 +121,7 @@ async def create_user(
     user_data: UserCreate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Создать пользователя"""
     # Проверка прав на создание
@@ -142,16 +156,15 @@ async def create_user(
         full_name=user_data.full_name,
         role=user_data.role,
         telegram_id=user_data.telegram_id,
+        timezone=user_data.timezone,
         login=login_val,
         password_hash=get_password_hash(user_data.password.strip()) if (user_data.password and user_data.password.strip()) else None,
         created_by_id=current_user.id
     )
     
     created_user = await UserDAO.create(db, user)
-    if created_user.telegram_id:
-        role_name = ROLE_NAMES.get(created_user.role, str(created_user.role))
-        has_web = created_user.role in (UserRoleEnum.PROJECT_MANAGER, UserRoleEnum.MAIN_ORGANIZER, UserRoleEnum.RESPONSIBLE)
-        background_tasks.add_task(notify_role_assigned, created_user.telegram_id, role_name, True, has_web)
+    if await notification_aggregator.role_assigned(db, created_user, is_new=True):
+        background_tasks.add_task(wake_notifier)
     return UserResponse.model_validate(created_user)
 
 
@@ -161,7 +174,7 @@ async def update_user(
     user_data: UserUpdate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Обновить пользователя"""
     user = await UserDAO.get_by_id(db, user_id)
@@ -199,13 +212,13 @@ async def update_user(
         user.password_hash = get_password_hash(user_data.password.strip())
     if user_data.telegram_id is not None:
         user.telegram_id = user_data.telegram_id if user_data.telegram_id else None
+    if user_data.timezone is not None:
+        user.timezone = user_data.timezone or None
     
-    # Уведомление при смене роли (если есть telegram_id)
+    # Уведомление при смене роли (если есть telegram_id); смены подряд сливаются в одно
     role_changed = user_data.role is not None and user_data.role != old_role
-    if role_changed and user.telegram_id:
-        role_name = ROLE_NAMES.get(user.role, str(user.role))
-        has_web = user.role in (UserRoleEnum.PROJECT_MANAGER, UserRoleEnum.MAIN_ORGANIZER, UserRoleEnum.RESPONSIBLE)
-        background_tasks.add_task(notify_role_assigned, user.telegram_id, role_name, False, has_web)
+    if role_changed and await notification_aggregator.role_assigned(db, user):
+        background_tasks.add_task(wake_notifier)
     
     updated_user = await UserDAO.update(db, user)
     return UserResponse.model_validate(updated_user)
@@ -215,7 +228,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Удалить пользователя"""
     user = await UserDAO.get_by_id(db, user_id)
@@ -1,13 +1,17 @@
 """API endpoints для рабочих групп"""
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import insert, delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import User, UserRoleEnum, workgroup_users
+from database.models import User, UserRoleEnum, WorkGroup
 from dao.workgroup_dao import WorkGroupDAO
 from dao.user_dao import UserDAO
-from schemas.workgroup import WorkGroupCreate, WorkGroupUpdate, WorkGroupResponse, WorkGroupWithRelations
-from api.dependencies import get_current_user, get_db
+from schemas.workgroup import (
+    WorkGroupCreate, WorkGroupUpdate, WorkGroupMembersAdd,
+    WorkGroupResponse, WorkGroupSummary, WorkGroupWithRelations
+)
+from api.dependencies import get_current_user, get_read_db, get_write_db, project_scope
+from database.project_scope import current_project
+from utils.cache import response_cache
 
 
 def _can_assign_user(creator: User, target: User) -> bool:
@@ -18,56 +22,105 @@ def _can_assign_user(creator: User, target: User) -> bool:
         return target.role != UserRoleEnum.PROJECT_MANAGER
     return False
 
-router = APIRouter(prefix="/api/workgroups", tags=["workgroups"])
 
+async def _resolve_members(db: AsyncSession, current_user: User, member_ids: List[int]) -> set[int]:
+    """Загрузить участников одним IN-запросом и проверить права на всех сразу.
+    Несуществующие ID пропускаются, запрещённые — 403 до каких-либо изменений."""
+    members = await UserDAO.get_by_ids(db, member_ids)
+    forbidden = [m for m in members if not _can_assign_user(current_user, m)]
+    if forbidden:
+        names = ", ".join(m.full_name or m.login or f"ID {m.id}" for m in forbidden)
+        raise HTTPException(
+            status_code=403,
+            detail=f"Недостаточно прав: нельзя добавить пользователя {names}"
+        )
+    return {m.id for m in members}
+
+
+async def _get_editable_workgroup(db: AsyncSession, workgroup_id: int, current_user: User) -> WorkGroup:
+    """Группа без связей + проверка, что пользователь может её менять (создатель или проектник)"""
+    workgroup = await WorkGroupDAO.get_by_id_light(db, workgroup_id)
+    if not workgroup:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Рабочая группа не найдена"
+        )
+    if workgroup.created_by_id != current_user.id and current_user.role != UserRoleEnum.PROJECT_MANAGER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав для обновления группы"
+        )
+    return workgroup
+
+router = APIRouter(prefix="/api/workgroups", tags=["workgroups"], dependencies=[Depends(project_scope)])
 
-@router.get("/", response_model=List[WorkGroupWithRelations])
+
+@router.get("/", response_model=List[WorkGroupSummary])
 async def get_workgroups(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Получить список рабочих групп"""
-    if current_user.role == UserRoleEnum.PROJECT_MANAGER:
-        workgroups = await WorkGroupDAO.get_all(db, skip=skip, limit=limit)
-    elif current_user.role == UserRoleEnum.MAIN_ORGANIZER:
-        workgroups = await WorkGroupDAO.get_by_creator(db, current_user.id)
-    elif current_user.role == UserRoleEnum.RESPONSIBLE:
-        workgroups = await WorkGroupDAO.get_by_responsible(db, current_user.id)
-    else:
-        workgroups = []
-    
-    return [WorkGroupWithRelations.model_validate(wg) for wg in workgroups]
+    """Получить список рабочих групп (облегчённый: счётчики вместо участников и задач).
+    Полный граф группы — через GET /api/workgroups/{id}."""
+    async def build():
+        if current_user.role == UserRoleEnum.PROJECT_MANAGER:
+            workgroups = await WorkGroupDAO.get_all(db, skip=skip, limit=limit)
+        elif current_user.role == UserRoleEnum.MAIN_ORGANIZER:
+            workgroups = await WorkGroupDAO.get_by_creator(db, current_user.id)
+        elif current_user.role == UserRoleEnum.RESPONSIBLE:
+            workgroups = await WorkGroupDAO.get_by_responsible(db, current_user.id)
+        else:
+            workgroups = []
+
+        stats = await WorkGroupDAO.get_stats(db, [wg.id for wg in workgroups])
+        result = []
+        for wg in workgroups:
+            summary = WorkGroupSummary.model_validate(wg)
+            summary.member_count = stats[wg.id]["member_count"]
+            summary.task_counts = stats[wg.id]["task_counts"]
+            result.append(summary)
+        return result
+
+    # Проектник видит все группы; остальные — только свои
+    scope = "all" if current_user.role == UserRoleEnum.PROJECT_MANAGER else f"user{current_user.id}"
+    return await response_cache.respond(
+        "workgroups.list", scope, (skip, limit), ("workgroups",), build
+    )
 
 
 @router.get("/{workgroup_id}", response_model=WorkGroupWithRelations)
 async def get_workgroup(
     workgroup_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить рабочую группу по ID"""
-    workgroup = await WorkGroupDAO.get_by_id(db, workgroup_id)
-    
-    if not workgroup:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Рабочая группа не найдена"
-        )
-    
-    return WorkGroupWithRelations.model_validate(workgroup)
+    async def build():
+        workgroup = await WorkGroupDAO.get_by_id(db, workgroup_id)
+        
+        if not workgroup:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Рабочая группа не найдена"
+            )
+        
+        return workgroup
+
+    return await response_cache.respond(
+        "workgroups.detail", "all", (workgroup_id,), ("workgroups", "tasks"), build,
+        schema=WorkGroupWithRelations,
+    )
 
 
 @router.post("/", response_model=WorkGroupResponse)
 async def create_workgroup(
     workgroup_data: WorkGroupCreate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Создать рабочую группу"""
-    from database.models import WorkGroup
-    
     # Только главные организаторы и проектник могут создавать группы
     if current_user.role not in [UserRoleEnum.MAIN_ORGANIZER, UserRoleEnum.PROJECT_MANAGER]:
         raise HTTPException(
@@ -86,9 +139,17 @@ async def create_workgroup(
                 detail="Недостаточно прав: нельзя назначить пользователя с этой ролью"
             )
 
+    scope = current_project.get()
+    if scope is not None and workgroup_data.project_id not in (None, scope):
+        raise HTTPException(status_code=400, detail="Группа должна относиться к текущему проекту (X-Project-Id)")
+
+    member_ids = await _resolve_members(db, current_user, workgroup_data.member_ids or [])
+
     workgroup = WorkGroup(
         name=workgroup_data.name,
         description=workgroup_data.description,
+        timezone=workgroup_data.timezone,
+        project_id=workgroup_data.project_id,  # None — текущий проект (см. database/project_scope.py)
         created_by_id=current_user.id,
         responsible_id=workgroup_data.responsible_id
     )
@@ -96,18 +157,8 @@ async def create_workgroup(
     created_workgroup = await WorkGroupDAO.create(db, workgroup)
     
     # Добавляем участников через таблицу ассоциации (избегаем lazy load в async)
-    if workgroup_data.member_ids:
-        for member_id in workgroup_data.member_ids:
-            member = await UserDAO.get_by_id(db, member_id)
-            if member and _can_assign_user(current_user, member):
-                await db.execute(
-                    insert(workgroup_users).values(workgroup_id=created_workgroup.id, user_id=member_id)
-                )
-            elif member and not _can_assign_user(current_user, member):
-                raise HTTPException(
-                    status_code=403,
-                    detail=f"Недостаточно прав: нельзя добавить пользователя {member.full_name or member.login}"
-                )
+    if member_ids:
+        await WorkGroupDAO.add_members(db, created_workgroup.id, member_ids)
         await db.flush()
     
     return WorkGroupResponse.model_validate(created_workgroup)
@@ -118,29 +169,18 @@ async def update_workgroup(
     workgroup_id: int,
     workgroup_data: WorkGroupUpdate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Обновить рабочую группу"""
-    workgroup = await WorkGroupDAO.get_by_id(db, workgroup_id)
-    
-    if not workgroup:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Рабочая группа не найдена"
-        )
-    
-    # Проверка прав
-    if workgroup.created_by_id != current_user.id and current_user.role != UserRoleEnum.PROJECT_MANAGER:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Недостаточно прав для обновления группы"
-        )
+    workgroup = await _get_editable_workgroup(db, workgroup_id, current_user)
     
     # Обновление полей
     if workgroup_data.name is not None:
         workgroup.name = workgroup_data.name
     if workgroup_data.description is not None:
         workgroup.description = workgroup_data.description
+    if workgroup_data.timezone is not None:
+        workgroup.timezone = workgroup_data.timezone or None
     if workgroup_data.responsible_id is not None:
         if workgroup_data.responsible_id == 0:
             workgroup.responsible_id = None
@@ -152,28 +192,51 @@ async def update_workgroup(
                 raise HTTPException(status_code=403, detail="Недостаточно прав для назначения этого пользователя")
             workgroup.responsible_id = workgroup_data.responsible_id
     
-    # Обновление участников через таблицу ассоциации
+    # Обновление участников: применяем только разницу с текущим составом
     if workgroup_data.member_ids is not None:
-        await db.execute(delete(workgroup_users).where(workgroup_users.c.workgroup_id == workgroup_id))
-        for member_id in workgroup_data.member_ids:
-            member = await UserDAO.get_by_id(db, member_id)
-            if member and _can_assign_user(current_user, member):
-                await db.execute(
-                    insert(workgroup_users).values(workgroup_id=workgroup_id, user_id=member_id)
-                )
-            elif member and not _can_assign_user(current_user, member):
-                raise HTTPException(status_code=403, detail="Недостаточно прав для добавления этого пользователя")
+        member_ids = await _resolve_members(db, current_user, workgroup_data.member_ids)
+        await WorkGroupDAO.set_members(db, workgroup_id, member_ids)
         await db.flush()
     
     updated_workgroup = await WorkGroupDAO.update(db, workgroup)
     return WorkGroupResponse.model_validate(updated_workgroup)
 
 
+@router.post("/{workgroup_id}/members")
+async def add_workgroup_members(
+    workgroup_id: int,
+    body: WorkGroupMembersAdd,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_write_db)
+):
+    """Добавить участников в группу, не пересылая весь состав"""
+    await _get_editable_workgroup(db, workgroup_id, current_user)
+    member_ids = await _resolve_members(db, current_user, body.member_ids)
+    new_ids = member_ids - await WorkGroupDAO.get_member_ids(db, workgroup_id)
+    await WorkGroupDAO.add_members(db, workgroup_id, new_ids)
+    await db.flush()
+    return {"ok": True, "added": len(new_ids)}
+
+
+@router.delete("/{workgroup_id}/members/{user_id}")
+async def remove_workgroup_member(
+    workgroup_id: int,
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_write_db)
+):
+    """Удалить одного участника из группы"""
+    await _get_editable_workgroup(db, workgroup_id, current_user)
+    await WorkGroupDAO.remove_members(db, workgroup_id, {user_id})
+    await db.flush()
+    return {"ok": True}
+
+
 @router.delete("/{workgroup_id}")
 async def delete_workgroup(
     workgroup_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Удалить рабочую группу"""
     workgroup = await WorkGroupDAO.get_by_id(db, workgroup_id)
@@ -0,0 +1 @@
+"""Бенчмарки производительности (запускаются вручную: python -m benchmarks.<имя>)"""
@@ -0,0 +1,106 @@
+"""Бенчмарк потоковой выгрузки задач (GET /api/export/tasks.csv|.xlsx) на больших объёмах.
+
+Заполняет временную БД синтетической организацией (как load_test), затем гоняет выгрузку
+через приложение напрямую по ASGI: тело ответа не накапливается, считаются только байты.
+По каждому размеру — время до первого байта, полное время, строк в секунду и прирост
+RSS процесса за время выгрузки. При потоковой выгрузке прирост памяти не должен зависеть
+от числа задач.
+
+Запуск:
+    python -m benchmarks.bench_export --tasks 100000
+    python -m benchmarks.bench_export --tasks 10000 100000 --format xlsx
+"""
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _rss_mb() -> float:
+    """Текущий RSS процесса (Linux, /proc/self/statm — в страницах)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+
+
+async def _run_export(app, path: str, token: str) -> dict:
+    """Один запрос по ASGI без буферизации тела"""
+    received = {"bytes": 0, "chunks": 0, "status": None, "first_byte": None, "peak_rss": _rss_mb()}
+    started = time.perf_counter()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # клиент не отключается
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            received["status"] = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if received["first_byte"] is None:
+                received["first_byte"] = time.perf_counter() - started
+            received["bytes"] += len(message["body"])
+            received["chunks"] += 1
+            if received["chunks"] % 20 == 0:
+                received["peak_rss"] = max(received["peak_rss"], _rss_mb())
+
+    path_only, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path_only, "raw_path": path_only.encode(), "root_path": "",
+        "query_string": query.encode(), "server": ("bench", 80), "client": ("127.0.0.1", 0),
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+    }
+    await app(scope, receive, send)
+    received["total"] = time.perf_counter() - started
+    return received
+
+
+async def main(args) -> None:
+    db_file = Path(tempfile.mkdtemp(prefix="tasktracker-export-")) / "bench.db"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_file}"
+    os.environ["CACHE_BACKEND"] = "none"
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    logging.getLogger("api.requests").setLevel(logging.WARNING)
+
+    from sqlalchemy import delete
+    from database import init_db
+    from database.database import AsyncSessionLocal
+    from database.models import Task, TaskPollResponse, User, WorkGroup, task_assignees, workgroup_users
+    from utils.auth import create_access_token
+    from benchmarks.load_test import _seed
+    import main as app_module
+
+    await init_db()
+    token = create_access_token({"sub": "1"})
+    print(f"{'задач':>8} {'формат':>6} {'МБ':>8} {'TTFB, мс':>9} {'всего, с':>9} {'строк/с':>9} {'+RSS, МБ':>9}")
+    for n_tasks in args.tasks:
+        async with AsyncSessionLocal() as session:
+            for table in (TaskPollResponse, task_assignees, Task, workgroup_users, WorkGroup, User):
+                await session.execute(delete(table))
+            await session.commit()
+        await _seed(argparse.Namespace(users=args.users, tasks=n_tasks, polls_per_task=args.polls_per_task, seed=42))
+        rss_before = _rss_mb()
+        result = await _run_export(app_module.app, f"/api/export/tasks.{args.format}", token)
+        if result["status"] != 200:
+            raise SystemExit(f"Выгрузка вернула {result['status']}")
+        print(
+            f"{n_tasks:>8} {args.format:>6} {result['bytes'] / 1e6:>8.1f} {result['first_byte'] * 1000:>9.1f} "
+            f"{result['total']:>9.2f} {n_tasks / result['total']:>9.0f} {result['peak_rss'] - rss_before:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк потоковой выгрузки задач")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[100_000], help="размеры выгрузки (по очереди)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--polls-per-task", type=int, default=3)
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,96 @@
+"""Бенчмарк сериализации списка задач: pydantic (как в API) против быстрого пути orjson.
+
+Запуск: python -m benchmarks.bench_serialization [--sizes 1000 10000] [--repeat 5]
+БД не нужна — задачи собираются как ORM-объекты в памяти.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from database.models import Task, TaskPollResponse, TaskStatusEnum, User, UserRoleEnum
+from schemas.task import TaskResponse
+from utils import serialization
+
+
+def _make_tasks(n: int, assignees_per_task: int = 3, polls_per_task: int = 5) -> list[Task]:
+    now = datetime(2026, 1, 1, 9, 0, 0)
+    users = [
+        User(id=i, full_name=f"Волонтёр {i}", username=f"user{i}", role=UserRoleEnum.WORKER,
+             telegram_id=100000 + i, created_at=now, updated_at=now)
+        for i in range(1, 201)
+    ]
+    statuses = list(TaskStatusEnum)
+    tasks = []
+    for i in range(1, n + 1):
+        assignees = [users[(i + k) % len(users)] for k in range(assignees_per_task)]
+        task = Task(
+            id=i, title=f"Задача {i}", description="Описание задачи " * 5,
+            status=statuses[i % len(statuses)], created_by_id=1, assigned_to_id=assignees[0].id,
+            created_at=now, updated_at=now, due_date=now + timedelta(days=i % 30),
+            poll_interval_days=1, poll_time="09:00", last_polled_at=now,
+        )
+        task.assignees = assignees
+        task.poll_responses = [
+            TaskPollResponse(
+                id=i * 100 + k, task_id=i, user_id=assignees[k % assignees_per_task].id,
+                polled_at=now + timedelta(days=k), response_text="В работе" if k % 2 else None,
+                status_at_poll="in_progress", user=assignees[k % assignees_per_task],
+            )
+            for k in range(polls_per_task)
+        ]
+        tasks.append(task)
+    return tasks
+
+
+def _pydantic_path(tasks: list[Task]) -> bytes:
+    """Как было в API: model_validate -> повторная валидация response_model -> jsonable_encoder -> json"""
+    models = [TaskResponse.model_validate(t) for t in tasks]
+    revalidated = [TaskResponse.model_validate(m.model_dump()) for m in models]
+    return json.dumps(jsonable_encoder(revalidated)).encode()
+
+
+def _schema_path(tasks: list[Task]) -> bytes:
+    """Одна валидация pydantic + model_dump_json (путь по умолчанию в кэше ответов)"""
+    serialization.FAST_JSON = False
+    return serialization.dump_json(tasks, TaskResponse)
+
+
+def _fast_path(tasks: list[Task]) -> bytes:
+    """FAST_JSON=1: ORM -> dict по полям схемы -> orjson"""
+    serialization.FAST_JSON = True
+    return serialization.dump_json(tasks, TaskResponse)
+
+
+def _measure(fn, tasks, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(tasks)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if serialization.orjson is None:
+        print("orjson не установлен — быстрый путь недоступен (pip install orjson)")
+        return
+
+    paths = [("pydantic x2 + json", _pydantic_path), ("pydantic x1", _schema_path), ("orjson fast", _fast_path)]
+    print(f"{'задач':>8} " + " ".join(f"{name:>20}" for name, _ in paths) + "   (мс, лучший из %d)" % args.repeat)
+    for n in args.sizes:
+        tasks = _make_tasks(n)
+        assert json.loads(_schema_path(tasks)) == json.loads(_fast_path(tasks)), "быстрый путь расходится со схемой"
+        timings = [_measure(fn, tasks, args.repeat) for _, fn in paths]
+        print(f"{n:>8} " + " ".join(f"{t:>20.1f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Холодный старт веб-процесса: профиль импорта и время до первого ответа, с проверкой бюджета.
+
+Импорт: `python -X importtime -c "import main"` в отдельном процессе — суммарное время и самые
+дорогие модули (свои и сторонние). Старт: uvicorn на свободном порту и временной БД (или копии
+--db), опрос /health/live и /health/ready, этапы из ответа ready (utils/startup.py).
+Каждый прогон — новый процесс; в отчёте медиана. Если медиана времени до готовности больше
+--budget-ms (или импорта больше --import-budget-ms), скрипт завершается с кодом 1 —
+так его можно ставить в CI как регрессионный тест.
+
+Запуск:
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --runs 5 --budget-ms 2500 --db database/tasks.db --output cold_start.json
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+
+def _env(db_path: Path) -> dict:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    env["WEB_RUN_WORKERS"] = "0"  # фоновые циклы в веб-процессе не нужны для замера
+    return env
+
+
+def _local_modules() -> set:
+    return {path.stem if path.suffix == ".py" else path.name for path in ROOT.iterdir()
+            if (path.suffix == ".py" or (path / "__init__.py").exists())}
+
+
+def profile_imports(env: dict, top: int) -> dict:
+    """Время импорта main по модулям (микросекунды из -X importtime -> миллисекунды)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            modules.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+    total = next((cumulative for name, _, cumulative in reversed(modules) if name == "main"), 0.0)
+    local = _local_modules()
+    # Собственное время модулей по пакетам верхнего уровня: кумулятивное время приписало бы
+    # sqlalchemy тому модулю проекта, который импортировал её первым
+    packages: dict[str, float] = {}
+    for name, self_ms, _ in modules:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0.0) + self_ms
+    return {
+        "total_ms": round(total, 1),
+        "top_packages": [
+            {"package": name, "ms": round(ms, 1), "local": name in local}
+            for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        ],
+        "top_self": [
+            {"module": name, "self_ms": round(self_ms, 1)}
+            for name, self_ms, _ in sorted(modules, key=lambda item: -item[1])[:top]
+        ],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, json.loads(response.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None, None
+
+
+def measure_start(env: dict, timeout: float) -> dict:
+    """Один холодный старт uvicorn: секунды до /health/live и /health/ready"""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    result = {}
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn завершился с кодом {process.returncode}:\n"
+                                   f"{process.stderr.read().decode(errors='replace')}")
+            if "live_s" not in result:
+                status, _ = _get(f"{base}/health/live")
+                if status == 200:
+                    result["live_s"] = round(time.perf_counter() - started, 3)
+            if "live_s" in result:
+                status, body = _get(f"{base}/health/ready")
+                if status == 200:
+                    result["ready_s"] = round(time.perf_counter() - started, 3)
+                    result["phases"] = body.get("phases", {})
+                    return result
+            time.sleep(0.01)
+        raise RuntimeError(f"сервер не стал готов за {timeout} с")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _median(runs: list[dict], key: str) -> float:
+    return round(statistics.median(run[key] for run in runs), 3)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Профиль холодного старта и проверка бюджета")
+    parser.add_argument("--runs", type=int, default=3, help="холодных стартов (в отчёте медиана)")
+    parser.add_argument("--db", help="копия этой БД вместо пустой (старт на реальном объёме)")
+    parser.add_argument("--budget-ms", type=float, default=3000, help="бюджет до /health/ready, мс")
+    parser.add_argument("--import-budget-ms", type=float, default=0, help="бюджет импорта main, мс (0 — нет)")
+    parser.add_argument("--top", type=int, default=10, help="сколько модулей показать")
+    parser.add_argument("--timeout", type=float, default=60, help="сколько ждать готовности, с")
+    parser.add_argument("--output", help="куда записать JSON с результатами")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "cold_start.db"
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+        env = _env(db_path)
+        imports = profile_imports(env, args.top)
+        runs = [measure_start(env, args.timeout) for _ in range(args.runs)]
+
+    phases = list(runs[0]["phases"])  # в порядке этапов (utils/startup.PHASES)
+    report = {
+        "imports": imports,
+        "runs": runs,
+        "median": {
+            "live_s": _median(runs, "live_s"),
+            "ready_s": _median(runs, "ready_s"),
+            **{phase: round(statistics.median(run["phases"][phase] for run in runs if phase in run["phases"]), 3)
+               for phase in phases},
+        },
+        "budget_ms": args.budget_ms,
+    }
+
+    print(f"Импорт main: {imports['total_ms']:.0f} мс")
+    for item in imports["top_packages"]:
+        print(f"  {item['package']:<28} {item['ms']:>8.1f} мс{'  (проект)' if item['local'] else ''}")
+    print("Дольше всего сами по себе:")
+    for item in imports["top_self"]:
+        print(f"  {item['module']:<40} {item['self_ms']:>8.1f} мс")
+    print(f"Старт (медиана из {args.runs}), секунды от запуска процесса:")
+    for key, value in report["median"].items():
+        print(f"  {key:<16} {value:.3f}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    failed = False
+    if report["median"]["ready_s"] * 1000 > args.budget_ms:
+        print(f"ПРЕВЫШЕН бюджет: готовность через {report['median']['ready_s'] * 1000:.0f} мс > {args.budget_ms:.0f} мс")
+        failed = True
+    if args.import_budget_ms and imports["total_ms"] > args.import_budget_ms:
+        print(f"ПРЕВЫШЕН бюджет импорта: {imports['total_ms']:.0f} мс > {args.import_budget_ms:.0f} мс")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
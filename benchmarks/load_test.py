@@ -0,0 +1,290 @@
+"""Нагрузочный бенчмарк HTTP API на синтетической организации.
+
+Создаёт временную БД, заполняет её иерархией пользователей, рабочими группами и задачами
+с историей опросов, затем конкурентно гоняет реальные endpoints через in-process ASGI-клиент
+(Telegram API заглушен). Результат — p50/p95/p99, пропускная способность и число SQL-запросов
+на запрос по каждому endpoint, в JSON для сравнения между прогонами.
+
+Запуск:
+    python -m benchmarks.load_test --users 1000 --tasks 10000 --output load_results.json
+    python -m benchmarks.load_test --compare load_results_old.json --output load_results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# БД и кэш настраиваются через окружение до импорта приложения
+_parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк HTTP API")
+_parser.add_argument("--users", type=int, default=1000, help="число пользователей")
+_parser.add_argument("--tasks", type=int, default=10000, help="число задач")
+_parser.add_argument("--polls-per-task", type=int, default=3, help="опросов в истории каждой задачи")
+_parser.add_argument("--requests", type=int, default=200, help="запросов на endpoint")
+_parser.add_argument("--concurrency", type=int, default=20, help="одновременных запросов")
+_parser.add_argument("--telegram-latency-ms", type=float, default=50.0, help="задержка заглушки Telegram")
+_parser.add_argument("--no-cache", action="store_true", help="отключить кэш ответов")
+_parser.add_argument("--seed", type=int, default=42)
+_parser.add_argument("--output", default="load_results.json", help="куда записать JSON с результатами")
+_parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+
+
+def _configure_env(args) -> Path:
+    db_file = Path(tempfile.mkdtemp(prefix="tasktracker-bench-")) / "bench.db"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_file}"
+    if args.no_cache:
+        os.environ["CACHE_BACKEND"] = "none"
+    else:
+        # Приложение и все записи — в этом процессе (ASGITransport, без воркеров): кэш в памяти корректен
+        os.environ.setdefault("WEB_RUN_WORKERS", "1")
+    return db_file
+
+
+async def _seed(args) -> dict:
+    """Синтетическая организация: ПМ, 2 ГО, ответственные, работники, группы, задачи, опросы"""
+    from sqlalchemy import insert
+    from database.database import AsyncSessionLocal
+    from database.models import (
+        User, WorkGroup, Task, TaskPollResponse, UserRoleEnum, TaskStatusEnum,
+        workgroup_users, task_assignees,
+    )
+    from utils.auth import get_password_hash
+
+    rnd = random.Random(args.seed)
+    now = datetime.utcnow()
+    password_hash = get_password_hash("bench")
+    n_responsible = max(1, args.users // 20)
+
+    users = [dict(id=1, login="pm", password_hash=password_hash, role=UserRoleEnum.PROJECT_MANAGER,
+                  full_name="Проектник")]
+    for i in (2, 3):
+        users.append(dict(id=i, login=f"mo{i}", password_hash=password_hash, role=UserRoleEnum.MAIN_ORGANIZER,
+                          full_name=f"ГО {i}", created_by_id=1))
+    responsible_ids = list(range(4, 4 + n_responsible))
+    for uid in responsible_ids:
+        users.append(dict(id=uid, login=f"resp{uid}", password_hash=password_hash, role=UserRoleEnum.RESPONSIBLE,
+                          full_name=f"Ответственный {uid}", telegram_id=10_000_000 + uid,
+                          created_by_id=rnd.choice((2, 3))))
+    worker_ids = list(range(4 + n_responsible, max(args.users, 5 + n_responsible) + 1))
+    team = {rid: [] for rid in responsible_ids}
+    for uid in worker_ids:
+        rid = rnd.choice(responsible_ids)
+        team[rid].append(uid)
+        users.append(dict(id=uid, role=UserRoleEnum.WORKER, full_name=f"Волонтёр {uid}",
+                          telegram_id=10_000_000 + uid, created_by_id=rid))
+
+    workgroups = [dict(id=i, name=f"Группа {i}", created_by_id=2 + i % 2, responsible_id=rid)
+                  for i, rid in enumerate(responsible_ids, start=1)]
+    members = [dict(workgroup_id=i, user_id=uid)
+               for i, rid in enumerate(responsible_ids, start=1) for uid in [rid] + team[rid]]
+
+    statuses = list(TaskStatusEnum)
+    tasks, assignees, polls = [], [], []
+    for tid in range(1, args.tasks + 1):
+        wg_id = rnd.randint(1, len(workgroups))
+        rid = responsible_ids[wg_id - 1]
+        pool = team[rid] or [rid]
+        chosen = rnd.sample(pool, k=min(len(pool), rnd.randint(1, 3)))
+        status = rnd.choice(statuses)
+        due = now + timedelta(days=rnd.randint(-10, 60))
+        created = now - timedelta(days=rnd.randint(1, 90))
+        tasks.append(dict(id=tid, title=f"Задача {tid}", description="Синтетическая задача",
+                          status=status, workgroup_id=wg_id, created_by_id=rid, assigned_to_id=chosen[0],
+                          created_at=created, updated_at=created, due_date=due,
+                          poll_interval_days=1, poll_time=f"{rnd.randint(8, 20):02d}:00"))
+        for uid in chosen:
+            assignees.append(dict(task_id=tid, user_id=uid, status=status, due_date=due))
+        for k in range(args.polls_per_task):
+            polls.append(dict(task_id=tid, user_id=chosen[k % len(chosen)],
+                              polled_at=created + timedelta(days=k + 1),
+                              response_text="В работе" if k % 2 else None, status_at_poll=status.value))
+
+    async with AsyncSessionLocal() as session:
+        for model, rows in ((User, users), (WorkGroup, workgroups), (workgroup_users, members),
+                            (Task, tasks), (task_assignees, assignees), (TaskPollResponse, polls)):
+            for start in range(0, len(rows), 5000):
+                await session.execute(insert(model), rows[start:start + 5000])
+        await session.commit()
+
+    return {
+        "responsible_ids": responsible_ids,
+        "task_ids": list(range(1, args.tasks + 1)),
+        "counts": {"users": len(users), "workgroups": len(workgroups), "tasks": len(tasks),
+                   "task_assignees": len(assignees), "poll_responses": len(polls)},
+    }
+
+
+def _stub_telegram(latency_ms: float) -> None:
+    """Заглушка Telegram API: успешная отправка с фиксированной задержкой"""
+    import services.telegram_notify as telegram_notify
+
+    async def fake_send(telegram_id, text, reply_markup=None):
+        await asyncio.sleep(latency_ms / 1000)
+        return True
+
+    telegram_notify.send_telegram_message = fake_send
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+async def _run_endpoint(client, name, make_request, total: int, concurrency: int) -> dict:
+    from database.query_stats import track_queries
+    latencies, queries, errors = [], [], 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with sem:
+            with track_queries() as stats:
+                start = time.perf_counter()
+                try:
+                    response = await make_request(client, i)
+                    if response.status_code >= 400:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                finally:
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    queries.append(stats.count)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "throughput_rps": round(total / elapsed, 1),
+        "queries_per_request": round(statistics.fmean(queries), 1),
+        "max_queries": max(queries),
+    }
+
+
+def _scenarios(seed_info: dict, rnd: random.Random) -> dict:
+    task_ids = seed_info["task_ids"]
+
+    async def login(client, i):
+        return await client.post("/api/auth/login", json={"login": "pm", "password": "bench"})
+
+    async def task_list(client, i):
+        return await client.get("/api/tasks/")
+
+    async def my_tasks(client, i):
+        return await client.get("/api/tasks/my")
+
+    async def inbox(client, i):
+        return await client.get("/api/tasks/inbox")
+
+    async def workgroup_list(client, i):
+        return await client.get("/api/workgroups/")
+
+    async def create_task(client, i):
+        return await client.post("/api/tasks/", json={
+            "title": f"Нагрузочная задача {i}", "workgroup_id": 1,
+            "assignee_ids": rnd.sample(seed_info["responsible_ids"], k=min(3, len(seed_info["responsible_ids"]))),
+        })
+
+    async def update_task(client, i):
+        return await client.put(f"/api/tasks/{rnd.choice(task_ids)}", json={"description": f"обновлено {i}"})
+
+    async def nudge(client, i):
+        return await client.post(f"/api/tasks/{rnd.choice(task_ids)}/nudge")
+
+    return {
+        "POST /api/auth/login": login,
+        "GET /api/tasks/": task_list,
+        "GET /api/tasks/my": my_tasks,
+        "GET /api/tasks/inbox": inbox,
+        "GET /api/workgroups/": workgroup_list,
+        "POST /api/tasks/": create_task,
+        "PUT /api/tasks/{id}": update_task,
+        "POST /api/tasks/{id}/nudge": nudge,
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def _print_report(results: dict, previous: dict | None) -> None:
+    print(f"{'endpoint':<28}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'queries':>9}{'errors':>8}")
+    for name, r in results["endpoints"].items():
+        line = (f"{name:<28}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+                f"{r['throughput_rps']:>9.1f}{r['queries_per_request']:>9.1f}{r['errors']:>8}")
+        old = (previous or {}).get("endpoints", {}).get(name)
+        if old and old.get("p95_ms"):
+            delta = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            line += f"   p95 {delta:+.0f}%, запросов {r['queries_per_request'] - old['queries_per_request']:+.1f}"
+        print(line)
+
+
+async def main(args) -> None:
+    db_file = _configure_env(args)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+    import httpx
+    from database import init_db
+    from utils.auth import create_access_token
+    import main as app_module
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("api.requests").setLevel(logging.WARNING)
+
+    await init_db()
+    started = time.perf_counter()
+    seed_info = await _seed(args)
+    seed_seconds = time.perf_counter() - started
+    print(f"БД: {db_file}; заполнено за {seed_seconds:.1f} с: {seed_info['counts']}")
+
+    _stub_telegram(args.telegram_latency_ms)
+
+    rnd = random.Random(args.seed)
+    token = create_access_token({"sub": "1"})
+    transport = httpx.ASGITransport(app=app_module.app)
+    results = {"endpoints": {}}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 headers={"Authorization": f"Bearer {token}"}, timeout=120) as client:
+        for name, make_request in _scenarios(seed_info, rnd).items():
+            results["endpoints"][name] = await _run_endpoint(
+                client, name, make_request, args.requests, args.concurrency
+            )
+
+    results["meta"] = {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "dataset": seed_info["counts"],
+        "seed_seconds": round(seed_seconds, 2),
+    }
+    previous = None
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+    _print_report(results, previous)
+    Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Результаты: {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(_parser.parse_args()))
@@ -0,0 +1,78 @@
+"""Сборка статики: имена с хэшем содержимого + заранее сжатые .gz/.br копии.
+
+Результат — static/dist/: app.<hash>.js, styles.<hash>.css, hsm_logo.<hash>.svg, их .gz (и .br,
+если установлен пакет brotli), index.html со ссылками на хэшированные имена и manifest.json.
+Хэшированные файлы отдаются с Cache-Control: immutable (см. utils/static_files.py).
+"""
+import gzip
+import hashlib
+import json
+import shutil
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # опционально: без него собираются только .gz
+    brotli = None
+
+STATIC_DIR = Path(__file__).parent / "static"
+DIST_DIR = STATIC_DIR / "dist"
+ASSETS = ["app.js", "styles.css", "hsm_logo.svg"]
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def up_to_date() -> bool:
+    """dist/ собран из текущих исходников — пересборка (и brotli quality 11) не нужна.
+    Контейнер вызывает сборку при каждом старте, поэтому проверка должна быть дешёвой."""
+    manifest_file = DIST_DIR / "manifest.json"
+    index_file = DIST_DIR / "index.html"
+    if not manifest_file.exists() or not index_file.exists():
+        return False
+    if index_file.stat().st_mtime < (STATIC_DIR / "index.html").stat().st_mtime:
+        return False
+    manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    for name in ASSETS:
+        src = STATIC_DIR / name
+        hashed = f"{src.stem}.{_digest(src.read_bytes())}{src.suffix}"
+        if manifest.get(name) != hashed or not (DIST_DIR / hashed).exists():
+            return False
+    return True
+
+
+def build() -> dict:
+    if DIST_DIR.exists():
+        shutil.rmtree(DIST_DIR)
+    DIST_DIR.mkdir(parents=True)
+
+    manifest = {}
+    for name in ASSETS:
+        src = STATIC_DIR / name
+        data = src.read_bytes()
+        hashed = f"{src.stem}.{_digest(data)}{src.suffix}"
+        (DIST_DIR / hashed).write_bytes(data)
+        (DIST_DIR / f"{hashed}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            (DIST_DIR / f"{hashed}.br").write_bytes(brotli.compress(data, quality=11))
+        manifest[name] = hashed
+
+    index = (STATIC_DIR / "index.html").read_text(encoding="utf-8")
+    for name, hashed in manifest.items():
+        index = index.replace(f"/static/{name}", f"/static/dist/{hashed}")
+    (DIST_DIR / "index.html").write_text(index, encoding="utf-8")
+    (DIST_DIR / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+if __name__ == "__main__":
+    if "--force" not in sys.argv and up_to_date():
+        print("static/dist актуален — сборка не нужна (--force — собрать заново)")
+        sys.exit(0)
+    manifest = build()
+    for name, hashed in manifest.items():
+        print(f"{name} -> dist/{hashed}")
+    if brotli is None:
+        print("brotli не установлен — собраны только .gz (pip install brotli)")
@@ -8,7 +8,9 @@ load_dotenv()
 
 # База данных
 DB_PATH = Path(__file__).parent / "database" / "tasks.db"
-DB_URL = f"sqlite+aiosqlite:///{DB_PATH}"
+DB_URL = os.getenv("DATABASE_URL", f"sqlite+aiosqlite:///{DB_PATH}")
+# Реплика для GET-запросов; пусто — та же БД, соединения только на чтение (PRAGMA query_only)
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "")
 
 # Telegram Bot
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
@@ -18,5 +20,92 @@ JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-producti
 JWT_ALGORITHM = "HS256"
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 часа
 
-# Создаем директорию для БД если её нет
-DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+# Кэш ответов read-эндпоинтов: memory (LRU+TTL в процессе), redis или none.
+# memory допустим только когда все записи идут в одном процессе: WEB_RUN_WORKERS=1 и один
+# веб-воркер (WEB_CONCURRENCY, его же читает uvicorn как --workers); иначе кэш выключается
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+
+# Быстрая сериализация списков (ORM -> orjson без повторной валидации pydantic)
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+
+# Сжатие ответов: не сжимать ответы меньше этого размера (байт)
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1000"))
+
+# Предупреждать о вероятном N+1, если один и тот же SQL выполнен за запрос столько раз
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+# Если задан — /metrics требует заголовок Authorization: Bearer <METRICS_TOKEN>
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Порт, на котором фоновый воркер (python -m services.worker) отдаёт свои /metrics (0 — не отдавать)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+# Сторож event loop: при опоздании больше порога пишет в лог стек блокирующего кода (0 — выключен)
+LOOP_LAG_THRESHOLD_MS = int(os.getenv("LOOP_LAG_THRESHOLD_MS", "250"))
+
+# Профилирование медленных запросов (0 — выключено): сэмплы стека раз в PROFILE_SAMPLE_INTERVAL_MS,
+# для запросов дольше PROFILE_SLOW_REQUESTS_MS в PROFILE_DIR пишется файл для флеймграфа
+PROFILE_SLOW_REQUESTS_MS = int(os.getenv("PROFILE_SLOW_REQUESTS_MS", "0"))
+PROFILE_SAMPLE_INTERVAL_MS = int(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(Path(__file__).parent / "profiles")))
+
+# Фоновые циклы (планировщик опросов, бот) работают в отдельных процессах: python -m services.worker
+# scheduler|bot. WEB_RUN_WORKERS=1 — запускать их и в веб-процессе (локальная разработка одним процессом).
+WEB_RUN_WORKERS = os.getenv("WEB_RUN_WORKERS", "0") == "1"
+# Число процессов uvicorn (переменная, которую uvicorn берёт по умолчанию для --workers)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Аренда роли воркера в БД: лидер продлевает её каждые TTL/3, резерв подхватывает после истечения
+WORKER_LEASE_TTL_SECONDS = int(os.getenv("WORKER_LEASE_TTL_SECONDS", "30"))
+
+# Очередь исходящих опросов: размер пачки, число попыток, когда считать зависшую отправку
+# брошенной, как часто проверять очередь (отправитель также будится сразу после планировщика)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_CLAIM_TIMEOUT_SECONDS = int(os.getenv("OUTBOX_CLAIM_TIMEOUT_SECONDS", "120"))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "2"))
+# Несколько опросов одному человеку в пачке — одно сообщение-сводка с кнопкой на задачу.
+# POLL_DIGEST=0 — по сообщению на задачу, как раньше
+POLL_DIGEST = os.getenv("POLL_DIGEST", "1") == "1"
+POLL_DIGEST_MAX_TASKS = int(os.getenv("POLL_DIGEST_MAX_TASKS", "20"))
+
+# Часовой пояс по умолчанию для времени опросов (если не задан у рабочей группы и у автора задачи)
+DEFAULT_TIMEZONE = os.getenv("DEFAULT_TIMEZONE", "UTC")
+# Пропущенный слот опроса (воркер лежал, loop был занят) досылается, если опоздали не больше окна
+POLL_CATCHUP_WINDOW_MINUTES = int(os.getenv("POLL_CATCHUP_WINDOW_MINUTES", "180"))
+# Как часто планировщик подтягивает изменённые задачи из БД (между этим он спит до ближайшего опроса)
+POLL_RESYNC_SECONDS = int(os.getenv("POLL_RESYNC_SECONDS", "30"))
+
+# Бот кэширует telegram_id -> user_id на это время (секунды; 0 — без кэша). Бот — отдельный процесс,
+# и правку пользователя в вебе он увидит только по истечении записи, поэтому срок короткий
+BOT_USER_CACHE_TTL_SECONDS = int(os.getenv("BOT_USER_CACHE_TTL_SECONDS", "10"))
+
+# Очередь уведомлений (назначения, роли): не больше стольких сообщений в секунду (лимит Telegram ~30)
+NOTIFY_RATE_PER_SECOND = float(os.getenv("NOTIFY_RATE_PER_SECOND", "20"))
+# Уведомления о назначениях и ролях ждут в очереди NOTIFY_DEBOUNCE_SECONDS: события по той же паре
+# (пользователь, задача) за это время сливаются в одно сообщение, снятие с задачи отменяет назначение.
+# Каждое событие откладывает отправку, но не дальше NOTIFY_DEBOUNCE_MAX_SECONDS от первого (0 — сразу)
+NOTIFY_DEBOUNCE_SECONDS = float(os.getenv("NOTIFY_DEBOUNCE_SECONDS", "60"))
+NOTIFY_DEBOUNCE_MAX_SECONDS = float(os.getenv("NOTIFY_DEBOUNCE_MAX_SECONDS", "300"))
+# Импорт из CSV: строк в одном INSERT и процессов для хэширования паролей (0 — по числу ядер)
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", "0"))
+
+# Напоминания о сроках: «скоро срок» за DUE_SOON_HOURS, «просрочена» с эскалацией ответственному группы
+DUE_SOON_HOURS = int(os.getenv("DUE_SOON_HOURS", "24"))
+DEADLINE_CHECK_INTERVAL_SECONDS = int(os.getenv("DEADLINE_CHECK_INTERVAL_SECONDS", "60"))  # 0 — выключено
+# При старте воркера — сколько часов назад смотреть на пропущенные пересечения сроков
+DEADLINE_LOOKBACK_HOURS = int(os.getenv("DEADLINE_LOOKBACK_HOURS", "72"))
+DEADLINE_BATCH_SIZE = int(os.getenv("DEADLINE_BATCH_SIZE", "500"))
+
+# Несколько проектов (мероприятий) в одной БД: 1 — запросы к задачам и группам без заголовка
+# X-Project-Id отклоняются (по умолчанию без заголовка видны все проекты)
+PROJECT_SCOPE_REQUIRED = os.getenv("PROJECT_SCOPE_REQUIRED", "0") == "1"
+
+# Архив: задачи DONE/CANCELLED, не менявшиеся ARCHIVE_AFTER_DAYS дней, переносятся в archived_tasks
+# (0 — не архивировать). Пачками по ARCHIVE_BATCH_SIZE с паузой, чтобы не держать запись в БД долго
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "200"))
+ARCHIVE_BATCH_PAUSE_SECONDS = float(os.getenv("ARCHIVE_BATCH_PAUSE_SECONDS", "0.5"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
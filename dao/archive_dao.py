@@ -0,0 +1,122 @@
+"""DAO для архива закрытых задач"""
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import select, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from database.models import (
+    ArchivedTask, NotificationOutbox, PollOutbox, Task, TaskPollResponse, TaskStatus, TaskStatusEnum,
+    task_assignees,
+)
+from schemas.task import ArchivedTaskResponse
+from utils.cache import invalidate
+
+CLOSED_STATUSES = (TaskStatusEnum.DONE, TaskStatusEnum.CANCELLED)
+
+
+class ArchiveDAO:
+    """Data Access Object для archived_tasks"""
+
+    @staticmethod
+    async def archive_batch(session: AsyncSession, closed_before: datetime, limit: int) -> int:
+        """Перенести в архив до limit задач, закрытых (DONE/CANCELLED) и не менявшихся
+        с closed_before, вместе с историей статусов и опросами. Коммит — за вызывающим.
+        Возвращает число перенесённых задач."""
+        task_ids = list((await session.execute(
+            select(Task.id)
+            .where(
+                Task.status.in_(CLOSED_STATUSES),
+                Task.updated_at < closed_before,
+            )
+            .order_by(Task.updated_at)
+            .limit(limit)
+        )).scalars().all())
+        if not task_ids:
+            return 0
+
+        tasks = (await session.execute(
+            select(Task)
+            .options(
+                selectinload(Task.assignees),
+                selectinload(Task.poll_responses).selectinload(TaskPollResponse.user),
+                selectinload(Task.status_history),
+                selectinload(Task.creator),
+                selectinload(Task.assignee),
+            )
+            .where(Task.id.in_(task_ids))
+        )).scalars().all()
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": task.id,
+                "title": task.title,
+                "status": task.status,
+                "project_id": task.project_id,
+                "workgroup_id": task.workgroup_id,
+                "created_by_id": task.created_by_id,
+                "created_at": task.created_at,
+                "closed_at": task.completed_at or task.updated_at,
+                "archived_at": now,
+                "payload": ArchivedTaskResponse.model_validate(task).model_dump_json(),
+            }
+            for task in tasks
+        ]
+        session.expunge_all()  # дальше только Core-удаления, загруженные объекты не нужны
+        await session.execute(insert(ArchivedTask.__table__), rows)
+        # ondelete="CASCADE" в SQLite без PRAGMA foreign_keys не срабатывает — зависимые строки удаляем сами
+        for table, column in (
+            (TaskPollResponse.__table__, TaskPollResponse.task_id),
+            (TaskStatus.__table__, TaskStatus.task_id),
+            (PollOutbox.__table__, PollOutbox.task_id),
+            (NotificationOutbox.__table__, NotificationOutbox.task_id),
+            (task_assignees, task_assignees.c.task_id),
+            (Task.__table__, Task.id),
+        ):
+            await session.execute(delete(table).where(column.in_(task_ids)))
+        invalidate(session, "tasks", "workgroups")
+        return len(rows)
+
+    @staticmethod
+    async def get_all(
+        session: AsyncSession, skip: int = 0, limit: int = 100, workgroup_id: Optional[int] = None
+    ) -> List[ArchivedTask]:
+        """Архивные задачи, недавно закрытые первыми"""
+        query = select(ArchivedTask)
+        if workgroup_id:
+            query = query.where(ArchivedTask.workgroup_id == workgroup_id)
+        result = await session.execute(
+            query.order_by(ArchivedTask.closed_at.desc(), ArchivedTask.id.desc()).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def iter_batches(
+        session: AsyncSession, workgroup_id: Optional[int] = None, batch_size: int = 500
+    ) -> AsyncIterator[List[ArchivedTask]]:
+        """Весь архив пачками по id (для выгрузки), каждая пачка — короткий запрос"""
+        last_id = 0
+        while True:
+            q = select(ArchivedTask).where(ArchivedTask.id > last_id)
+            if workgroup_id:
+                q = q.where(ArchivedTask.workgroup_id == workgroup_id)
+            rows = list((await session.execute(q.order_by(ArchivedTask.id).limit(batch_size))).scalars().all())
+            session.expunge_all()
+            await session.commit()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1].id
+
+    @staticmethod
+    async def get_by_id(session: AsyncSession, task_id: int) -> Optional[ArchivedTask]:
+        """Архивная задача по id исходной задачи"""
+        return await session.get(ArchivedTask, task_id)
+
+    @staticmethod
+    def to_response(row: ArchivedTask) -> ArchivedTaskResponse:
+        """Развернуть снимок из payload"""
+        return ArchivedTaskResponse.model_validate_json(row.payload).model_copy(
+            update={"archived_at": row.archived_at}
+        )
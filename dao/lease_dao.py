@@ -0,0 +1,48 @@
+"""DAO для аренды ролей фоновых воркеров"""
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import WorkerLease
+
+
+class LeaseDAO:
+    """Data Access Object для аренды ролей (leader election через БД)"""
+
+    @staticmethod
+    async def try_acquire(session: AsyncSession, name: str, holder: str, ttl_seconds: float) -> bool:
+        """Захватить или продлить аренду. True — роль у holder до now + ttl_seconds.
+        Коммитит сам: аренда должна быть видна другим процессам сразу."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        result = await session.execute(
+            update(WorkerLease)
+            .where(
+                WorkerLease.name == name,
+                or_(WorkerLease.holder == holder, WorkerLease.expires_at < now),
+            )
+            .values(holder=holder, expires_at=expires_at)
+        )
+        if result.rowcount:
+            await session.commit()
+            return True
+        existing = await session.scalar(select(WorkerLease.name).where(WorkerLease.name == name))
+        if existing is not None:
+            await session.rollback()
+            return False
+        session.add(WorkerLease(name=name, holder=holder, expires_at=expires_at))
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Другой процесс вставил аренду одновременно с нами
+            await session.rollback()
+            return False
+        return True
+
+    @staticmethod
+    async def release(session: AsyncSession, name: str, holder: str) -> None:
+        """Отпустить аренду, если она наша (при штатной остановке воркера)"""
+        await session.execute(
+            delete(WorkerLease).where(WorkerLease.name == name, WorkerLease.holder == holder)
+        )
+        await session.commit()
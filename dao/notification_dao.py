@@ -0,0 +1,125 @@
+"""DAO для очереди исходящих уведомлений"""
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+from sqlalchemy import select, update, delete, or_, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import NotificationOutbox
+
+
+class NotificationDAO:
+    """Data Access Object для notification_outbox"""
+
+    @staticmethod
+    async def enqueue(session: AsyncSession, messages: List[dict], delay_seconds: float = 0) -> int:
+        """Поставить уведомления в очередь одним INSERT.
+        messages: словари с kind, telegram_id, text и необязательными user_id, task_id.
+        delay_seconds — не отправлять раньше (окно слияния событий)."""
+        if not messages:
+            return 0
+        now = datetime.utcnow()
+        send_at = now + timedelta(seconds=delay_seconds)
+        await session.execute(
+            insert(NotificationOutbox.__table__),
+            [
+                {"user_id": None, "task_id": None, **message,
+                 "state": "pending", "attempts": 0, "next_attempt_at": send_at, "created_at": now}
+                for message in messages
+            ],
+        )
+        return len(messages)
+
+    @staticmethod
+    def _pending(user_ids: Iterable[int], task_id: Optional[int], kinds: Iterable[str]):
+        return (
+            NotificationOutbox.state == "pending",
+            NotificationOutbox.user_id.in_(list(user_ids)),
+            NotificationOutbox.task_id == task_id if task_id is not None else NotificationOutbox.task_id.is_(None),
+            NotificationOutbox.kind.in_(list(kinds)),
+        )
+
+    @staticmethod
+    async def get_pending(
+        session: AsyncSession, user_ids: Iterable[int], task_id: Optional[int], kinds: Iterable[str]
+    ) -> dict[int, NotificationOutbox]:
+        """Ждущие отправки уведомления пользователей по задаче (task_id=None — не о задаче):
+        {user_id: сообщение}. Ждущих немного (окно слияния), их читает индекс (state, next_attempt_at)."""
+        result = await session.execute(
+            select(NotificationOutbox)
+            .where(*NotificationDAO._pending(user_ids, task_id, kinds))
+            .order_by(NotificationOutbox.id)
+        )
+        return {item.user_id: item for item in result.scalars().all()}
+
+    @staticmethod
+    async def replace_pending(session: AsyncSession, item_id: int, values: dict) -> bool:
+        """Переписать сообщение, если отправитель его ещё не забрал. False — уже отправляется."""
+        result = await session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id == item_id, NotificationOutbox.state == "pending")
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return bool(result.rowcount)
+
+    @staticmethod
+    async def cancel_pending(
+        session: AsyncSession, user_ids: Iterable[int], task_id: Optional[int], kinds: Iterable[str]
+    ) -> int:
+        """Удалить ещё не отправленные уведомления. Возвращает число удалённых."""
+        result = await session.execute(
+            delete(NotificationOutbox)
+            .where(*NotificationDAO._pending(user_ids, task_id, kinds))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount or 0
+
+    @staticmethod
+    async def claim_batch(
+        session: AsyncSession, now: datetime, limit: int, claim_timeout_seconds: float
+    ) -> List[NotificationOutbox]:
+        """Забрать пачку уведомлений к отправке (как OutboxDAO.claim_batch для опросов)"""
+        stale = now - timedelta(seconds=claim_timeout_seconds)
+        result = await session.execute(
+            select(NotificationOutbox)
+            .where(
+                or_(
+                    (NotificationOutbox.state == "pending") & (NotificationOutbox.next_attempt_at <= now),
+                    (NotificationOutbox.state == "sending") & (NotificationOutbox.claimed_at < stale),
+                )
+            )
+            .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+            .limit(limit)
+        )
+        items = list(result.scalars().all())
+        if items:
+            await session.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_([item.id for item in items]))
+                .values(state="sending", claimed_at=now, attempts=NotificationOutbox.attempts + 1)
+            )  # synchronize_session обновит и загруженные объекты
+        return items
+
+    @staticmethod
+    async def mark_sent(session: AsyncSession, item: NotificationOutbox, sent_at: datetime) -> None:
+        await session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id == item.id)
+            .values(state="sent", sent_at=sent_at, last_error=None)
+        )
+
+    @staticmethod
+    async def mark_failed(
+        session: AsyncSession, item: NotificationOutbox, error: str, now: datetime, max_attempts: int
+    ) -> bool:
+        """Неудачная попытка: повтор с экспоненциальной задержкой или failed. True — будет повтор."""
+        retry = item.attempts < max_attempts
+        await session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id == item.id)
+            .values(
+                state="pending" if retry else "failed",
+                next_attempt_at=now + timedelta(seconds=min(30 * 2 ** (item.attempts - 1), 3600)),
+                last_error=error[:500],
+            )
+        )
+        return retry
@@ -0,0 +1,100 @@
+"""DAO для очереди исходящих опросов"""
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import select, update, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from database.models import PollOutbox, TaskPollResponse
+from utils.cache import invalidate
+
+
+class OutboxDAO:
+    """Data Access Object для poll_outbox"""
+
+    @staticmethod
+    def poll_key(kind: str, task_id: int, user_id: int, slot: datetime) -> str:
+        """Ключ идемпотентности: один опрос на задачу, исполнителя и минуту слота"""
+        return f"{kind}:{task_id}:{user_id}:{slot:%Y%m%dT%H%M}"
+
+    @staticmethod
+    async def enqueue_polls(session: AsyncSession, intents: List[dict]) -> int:
+        """Поставить опросы в очередь одним INSERT; уже поставленные (тот же ключ) пропускаются.
+        intents: словари с idempotency_key, task_id, user_id, telegram_id, polled_at, status_at_poll.
+        Возвращает число новых записей."""
+        if not intents:
+            return 0
+        rows = [
+            {**intent, "state": "pending", "attempts": 0, "next_attempt_at": intent["polled_at"]}
+            for intent in intents
+        ]
+        result = await session.execute(
+            sqlite_insert(PollOutbox.__table__).on_conflict_do_nothing(index_elements=["idempotency_key"]),
+            rows,
+        )
+        invalidate(session, "tasks", "workgroups")  # last_polled_at задач меняется вместе с очередью
+        return result.rowcount
+
+    @staticmethod
+    async def claim_batch(
+        session: AsyncSession, now: datetime, limit: int, claim_timeout_seconds: float
+    ) -> List[PollOutbox]:
+        """Забрать пачку опросов к отправке (pending, чей срок наступил, и зависшие в sending
+        дольше claim_timeout — процесс отправителя упал посреди отправки)"""
+        stale = now - timedelta(seconds=claim_timeout_seconds)
+        result = await session.execute(
+            select(PollOutbox)
+            .options(selectinload(PollOutbox.task))
+            .where(
+                or_(
+                    (PollOutbox.state == "pending") & (PollOutbox.next_attempt_at <= now),
+                    (PollOutbox.state == "sending") & (PollOutbox.claimed_at < stale),
+                )
+            )
+            # Опросы одной волны идут подряд по получателю — так они попадают в одну сводку
+            .order_by(PollOutbox.next_attempt_at, PollOutbox.telegram_id, PollOutbox.id)
+            .limit(limit)
+        )
+        items = list(result.scalars().all())
+        if items:
+            await session.execute(
+                update(PollOutbox)
+                .where(PollOutbox.id.in_([item.id for item in items]))
+                .values(state="sending", claimed_at=now, attempts=PollOutbox.attempts + 1)
+            )  # synchronize_session обновит и загруженные объекты
+        return items
+
+    @staticmethod
+    async def mark_sent(session: AsyncSession, item: PollOutbox, sent_at: datetime) -> None:
+        """Опрос доставлен: закрыть запись очереди и записать ожидающий ответа опрос"""
+        await session.execute(
+            update(PollOutbox)
+            .where(PollOutbox.id == item.id)
+            .values(state="sent", sent_at=sent_at, last_error=None)
+        )
+        session.add(TaskPollResponse(
+            task_id=item.task_id,
+            user_id=item.user_id,
+            polled_at=item.polled_at,
+            response_text=None,
+            status_at_poll=item.status_at_poll,
+        ))
+        invalidate(session, "tasks", "workgroups")
+
+    @staticmethod
+    async def mark_failed(
+        session: AsyncSession, item: PollOutbox, error: str, now: datetime, max_attempts: int
+    ) -> bool:
+        """Неудачная попытка: повтор с экспоненциальной задержкой или failed после max_attempts.
+        True — будет повтор."""
+        retry = item.attempts < max_attempts
+        await session.execute(
+            update(PollOutbox)
+            .where(PollOutbox.id == item.id)
+            .values(
+                state="pending" if retry else "failed",
+                next_attempt_at=now + timedelta(seconds=min(30 * 2 ** (item.attempts - 1), 3600)),
+                last_error=error[:500],
+            )
+        )
+        return retry
@@ -1,8 +1,11 @@
 """DAO для работы с проектами"""
+from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import select
+from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import Project
+from database.models import Project, ProjectTaskCounter, Task, TaskStatusEnum
+from dao.task_dao import OPEN_STATUSES
+from utils.cache import invalidate
 
 
 class ProjectDAO:
@@ -17,8 +20,39 @@ class ProjectDAO:
     @staticmethod
     async def get_all(session: AsyncSession, skip: int = 0, limit: int = 100) -> List[Project]:
         """Получить все проекты"""
-        result = await session.execute(select(Project).offset(skip).limit(limit))
+        result = await session.execute(select(Project).order_by(Project.id).offset(skip).limit(limit))
         return list(result.scalars().all())
+
+    @staticmethod
+    async def get_progress(session: AsyncSession, project_ids: List[int]) -> dict[int, dict]:
+        """Прогресс проектов: {project_id: {"by_status": {статус: число}, "overdue": число}}.
+        Число задач по статусам — готовые счётчики project_task_counters, без прохода по задачам.
+        Просрочка зависит от текущего времени, а не от записи, поэтому считается запросом по
+        открытым задачам проекта со сроком в прошлом (индекс project_id, status)."""
+        progress = {
+            project_id: {"by_status": {s: 0 for s in TaskStatusEnum}, "overdue": 0}
+            for project_id in project_ids
+        }
+        if not project_ids:
+            return progress
+        counters = await session.execute(
+            select(ProjectTaskCounter.project_id, ProjectTaskCounter.status, ProjectTaskCounter.count)
+            .where(ProjectTaskCounter.project_id.in_(project_ids))
+        )
+        for project_id, task_status, count in counters:
+            progress[project_id]["by_status"][task_status] = count
+        overdue = await session.execute(
+            select(Task.project_id, func.count())
+            .where(
+                Task.project_id.in_(project_ids),
+                Task.status.in_(OPEN_STATUSES),
+                Task.due_date < datetime.utcnow(),
+            )
+            .group_by(Task.project_id)
+        )
+        for project_id, count in overdue:
+            progress[project_id]["overdue"] = count
+        return progress
     
     @staticmethod
     async def create(session: AsyncSession, project: Project) -> Project:
@@ -40,7 +74,10 @@ class ProjectDAO:
         """Удалить проект"""
         project = await ProjectDAO.get_by_id(session, project_id)
         if project:
+            invalidate(session, "tasks", "workgroups")
             await session.delete(project)
             await session.flush()
+            # После flush: удаление задач проекта каскадом уже прошло через счётчики
+            await session.execute(delete(ProjectTaskCounter).where(ProjectTaskCounter.project_id == project_id))
             return True
         return False
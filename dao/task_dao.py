@@ -1,9 +1,23 @@
 """DAO для работы с задачами"""
-from typing import Optional, List
-from sqlalchemy import select, or_
-from sqlalchemy.orm import selectinload
+from datetime import datetime
+from typing import AsyncIterator, Optional, List
+from sqlalchemy import select, insert, update, delete, or_, and_, func, union
+from sqlalchemy.orm import aliased, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import Task, TaskStatusEnum, TaskPollResponse, task_assignees
+from database.models import Task, TaskStatus, TaskStatusEnum, TaskPollResponse, User, WorkGroup, task_assignees
+from database.project_scope import current_project
+from database import project_counters
+from utils.cache import invalidate
+
+# Незавершённые статусы (входящие задачи исполнителя)
+OPEN_STATUSES = (TaskStatusEnum.NEW, TaskStatusEnum.IN_PROGRESS, TaskStatusEnum.REVIEW)
+
+# Следующий этап при ответе на опрос
+NEXT_STATUS = {
+    TaskStatusEnum.NEW: TaskStatusEnum.IN_PROGRESS,
+    TaskStatusEnum.IN_PROGRESS: TaskStatusEnum.REVIEW,
+    TaskStatusEnum.REVIEW: TaskStatusEnum.DONE,
+}
 
 
 def _task_options(q):
@@ -24,6 +38,59 @@ class TaskDAO:
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_by_ids_for_poll(session: AsyncSession, task_ids: List[int]) -> List[Task]:
+        """Задачи по ID с исполнителями (без истории опросов) — для рассылки опросов"""
+        if not task_ids:
+            return []
+        result = await session.execute(
+            select(Task).options(selectinload(Task.assignees)).where(Task.id.in_(set(task_ids)))
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_poll_schedule(
+        session: AsyncSession,
+        changed_since: Optional[datetime] = None,
+        task_ids: Optional[List[int]] = None,
+    ) -> list:
+        """Строки для расписания опросов: id, status, poll_time, poll_interval_days, last_polled_at,
+        created_at, timezone (пояс группы, иначе автора).
+        По умолчанию — все задачи с включённым опросом; с changed_since — задачи, у которых с тех пор
+        изменились они сами, их группа или автор (в т.ч. закрытые — чтобы убрать их из расписания);
+        с task_ids — указанные задачи."""
+        q = (
+            select(
+                Task.id, Task.status, Task.poll_time, Task.poll_interval_days,
+                Task.last_polled_at, Task.created_at,
+                func.coalesce(WorkGroup.timezone, User.timezone).label("timezone"),
+            )
+            .join(User, User.id == Task.created_by_id)
+            .outerjoin(WorkGroup, WorkGroup.id == Task.workgroup_id)
+        )
+        if task_ids is not None:
+            q = q.where(Task.id.in_(set(task_ids)))
+        elif changed_since is None:
+            q = q.where(
+                Task.poll_interval_days > 0,
+                Task.poll_time.is_not(None),
+                Task.status.in_(OPEN_STATUSES),
+            )
+        else:
+            # Отдельные подзапросы, чтобы каждый шёл по своему индексу (updated_at, workgroup_id, created_by_id)
+            changed_ids = union(
+                select(Task.id).where(Task.updated_at > changed_since),
+                select(Task.id).where(Task.workgroup_id.in_(
+                    select(WorkGroup.id).where(WorkGroup.updated_at > changed_since)
+                )),
+                select(Task.id).where(Task.created_by_id.in_(
+                    select(User.id).where(User.updated_at > changed_since)
+                )),
+            )
+            q = q.where(Task.id.in_(changed_ids))
+        result = await session.execute(q)
+        return list(result.all())
+
     @staticmethod
     async def get_all(session: AsyncSession, skip: int = 0, limit: int = 100) -> List[Task]:
         """Получить все задачи"""
@@ -40,19 +107,263 @@ class TaskDAO:
         )
         return list(result.scalars().all())
     
+    @staticmethod
+    async def iter_for_export(
+        session: AsyncSession,
+        workgroup_id: Optional[int] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[List[dict]]:
+        """Задачи для выгрузки пачками по id: словари с полями задачи, именем автора (creator),
+        именами исполнителей (assignees), историей статусов (history: [(status, created_at)])
+        и опросами (polls: [(polled_at, имя, ответ)]).
+        Только колонки, без ORM-объектов; каждая пачка — короткие запросы (keyset по id) в своей
+        транзакции чтения: память не растёт, а медленный клиент выгрузки не держит блокировку SQLite."""
+        creator = aliased(User)
+        last_id = 0
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            q = (
+                select(
+                    Task.id, Task.title, Task.status, Task.workgroup_id, Task.project_id, Task.created_by_id,
+                    Task.created_at, Task.due_date, Task.completed_at, creator.full_name.label("creator"),
+                )
+                .outerjoin(creator, creator.id == Task.created_by_id)
+                .where(Task.id > last_id)
+            )
+            if workgroup_id:
+                q = q.where(Task.workgroup_id == workgroup_id)
+            q = q.order_by(Task.id).limit(size)
+            if skip:
+                q, skip = q.offset(skip), 0
+            rows = {row.id: {**row._mapping, "assignees": [], "history": [], "polls": []}
+                    for row in (await session.execute(q)).all()}
+            if not rows:
+                await session.commit()
+                return
+            ids = list(rows)
+            for task_id, name in await session.execute(
+                select(task_assignees.c.task_id, User.full_name)
+                .join(User, User.id == task_assignees.c.user_id)
+                .where(task_assignees.c.task_id.in_(ids))
+                .order_by(task_assignees.c.task_id, User.full_name)
+            ):
+                rows[task_id]["assignees"].append(name)
+            for task_id, status, created_at in await session.execute(
+                select(TaskStatus.task_id, TaskStatus.status, TaskStatus.created_at)
+                .where(TaskStatus.task_id.in_(ids))
+                .order_by(TaskStatus.task_id, TaskStatus.created_at)
+            ):
+                rows[task_id]["history"].append((status, created_at))
+            for task_id, polled_at, name, text in await session.execute(
+                select(TaskPollResponse.task_id, TaskPollResponse.polled_at, User.full_name, TaskPollResponse.response_text)
+                .outerjoin(User, User.id == TaskPollResponse.user_id)
+                .where(TaskPollResponse.task_id.in_(ids))
+                .order_by(TaskPollResponse.task_id, TaskPollResponse.polled_at)
+            ):
+                rows[task_id]["polls"].append((polled_at, name, text))
+            await session.commit()
+            yield list(rows.values())
+            if len(rows) < size:
+                return
+            last_id = ids[-1]
+            if remaining is not None:
+                remaining -= len(rows)
+
+    @staticmethod
+    async def get_timeline(
+        session: AsyncSession,
+        start: datetime,
+        end: datetime,
+        workgroup_id: Optional[int] = None,
+        limit: int = 200,
+    ) -> List[dict]:
+        """Задачи, чья полоса на таймлайне пересекает окно [start, end], по дате создания.
+        Полоса — от created_at до завершения (открытые — до сейчас) или до срока, если он позже.
+        Выборка — объединение диапазонных запросов, каждый по своему индексу; история статусов
+        и опросы (до end) — по одному запросу на окно. Словари как у iter_for_export, плюс
+        updated_at и статус задачи в опросах: polls: [(polled_at, имя, ответ, status_at_poll)]."""
+        def overlapping(*conditions):
+            q = select(Task.id).where(Task.created_at <= end, *conditions)
+            return q.where(Task.workgroup_id == workgroup_id) if workgroup_id else q
+
+        task_ids = union(
+            overlapping(Task.status.in_(OPEN_STATUSES)),  # ix_tasks_status_created
+            overlapping(Task.completed_at >= start),  # ix_tasks_completed_at
+            overlapping(Task.due_date >= start),  # ix_tasks_due_date
+            # отменённые без completed_at заканчиваются последним изменением
+            overlapping(Task.status == TaskStatusEnum.CANCELLED, Task.updated_at >= start),
+        ).subquery()
+        q = (
+            select(
+                Task.id, Task.title, Task.status, Task.workgroup_id, Task.created_at,
+                Task.updated_at, Task.due_date, Task.completed_at,
+            )
+            .where(Task.id.in_(select(task_ids.c.id)))
+            .order_by(Task.created_at, Task.id)
+            .limit(limit)
+        )
+        rows = {row.id: {**row._mapping, "assignees": [], "history": [], "polls": []}
+                for row in (await session.execute(q)).all()}
+        if not rows:
+            return []
+        ids = list(rows)
+        for task_id, name in await session.execute(
+            select(task_assignees.c.task_id, User.full_name)
+            .join(User, User.id == task_assignees.c.user_id)
+            .where(task_assignees.c.task_id.in_(ids))
+            .order_by(task_assignees.c.task_id, User.full_name)
+        ):
+            rows[task_id]["assignees"].append(name)
+        for task_id, status, created_at in await session.execute(
+            select(TaskStatus.task_id, TaskStatus.status, TaskStatus.created_at)
+            .where(TaskStatus.task_id.in_(ids), TaskStatus.created_at <= end)
+            .order_by(TaskStatus.task_id, TaskStatus.created_at, TaskStatus.id)
+        ):
+            rows[task_id]["history"].append((status, created_at))
+        for task_id, polled_at, name, text, status_at_poll in await session.execute(
+            select(
+                TaskPollResponse.task_id, TaskPollResponse.polled_at, User.full_name,
+                TaskPollResponse.response_text, TaskPollResponse.status_at_poll,
+            )
+            .outerjoin(User, User.id == TaskPollResponse.user_id)
+            .where(TaskPollResponse.task_id.in_(ids), TaskPollResponse.polled_at <= end)  # ix_task_poll_responses_task_polled
+            .order_by(TaskPollResponse.task_id, TaskPollResponse.polled_at)
+        ):
+            rows[task_id]["polls"].append((polled_at, name, text, status_at_poll))
+        return list(rows.values())
+
+    @staticmethod
+    async def get_deadline_candidates(
+        session: AsyncSession,
+        since: datetime,
+        now: datetime,
+        soon_until: datetime,
+        limit: int = 500,
+    ) -> List[dict]:
+        """Открытые задачи, которым пора отправить напоминание о сроке: срок пересёк now
+        («просрочена») или soon_until («скоро срок») после since, либо задача изменилась после
+        since (новый срок, новая задача). Каждый проход читает только эти срезы — по индексам
+        ix_tasks_status_due и ix_tasks_updated_at, — а не все открытые задачи. Уже отправленные
+        напоминания (маркер равен due_date) отсеиваются.
+        Словари: id, title, due_date, overdue, assignees и responsible — (user_id, telegram_id,
+        timezone, full_name); responsible — ответственный рабочей группы или None."""
+        soon_window = soon_until - now
+        open_tasks = select(Task.id, Task.status).where(Task.status.in_(OPEN_STATUSES))
+        crossed = union(
+            open_tasks.where(Task.due_date > since, Task.due_date <= now),
+            open_tasks.where(Task.due_date > since + soon_window, Task.due_date <= soon_until),
+            # только по времени изменения: с условием на статус SQLite выберет индекс по статусу
+            # и пройдёт все открытые задачи, поэтому статус проверяется поверх объединения
+            select(Task.id, Task.status).where(Task.updated_at >= since),
+        ).subquery()
+        q = (
+            select(Task.id, Task.title, Task.due_date, WorkGroup.responsible_id)
+            .outerjoin(WorkGroup, WorkGroup.id == Task.workgroup_id)
+            .where(
+                Task.id.in_(select(crossed.c.id).where(crossed.c.status.in_(OPEN_STATUSES))),
+                or_(
+                    and_(Task.due_date <= now, or_(
+                        Task.overdue_notified_for.is_(None), Task.overdue_notified_for != Task.due_date,
+                    )),
+                    and_(Task.due_date > now, Task.due_date <= soon_until, or_(
+                        Task.due_soon_notified_for.is_(None), Task.due_soon_notified_for != Task.due_date,
+                    )),
+                ),
+            )
+            .order_by(Task.due_date, Task.id)
+            .limit(limit)
+        )
+        rows = {
+            row.id: {
+                "id": row.id, "title": row.title, "due_date": row.due_date, "overdue": row.due_date <= now,
+                "assignees": [], "responsible": row.responsible_id,
+            }
+            for row in (await session.execute(q)).all()
+        }
+        if not rows:
+            return []
+        for task_id, *user in await session.execute(
+            select(task_assignees.c.task_id, User.id, User.telegram_id, User.timezone, User.full_name)
+            .join(User, User.id == task_assignees.c.user_id)
+            .where(task_assignees.c.task_id.in_(list(rows)))
+        ):
+            rows[task_id]["assignees"].append(tuple(user))
+        responsible_ids = {row["responsible"] for row in rows.values() if row["responsible"]}
+        responsibles = {}
+        if responsible_ids:
+            responsibles = {
+                user[0]: tuple(user)
+                for user in await session.execute(
+                    select(User.id, User.telegram_id, User.timezone, User.full_name)
+                    .where(User.id.in_(responsible_ids))
+                )
+            }
+        for row in rows.values():
+            row["responsible"] = responsibles.get(row["responsible"])
+        return list(rows.values())
+
+    @staticmethod
+    async def mark_deadline_notified(session: AsyncSession, task_ids: List[int], overdue: bool) -> None:
+        """Запомнить, для какого срока отправлено напоминание (updated_at не трогаем —
+        служебная отметка не должна будить планировщик опросов и сбрасывать кэш)"""
+        if not task_ids:
+            return
+        column = Task.overdue_notified_for if overdue else Task.due_soon_notified_for
+        await session.execute(
+            update(Task)
+            .where(Task.id.in_(task_ids))
+            .values({column: Task.due_date, Task.updated_at: Task.updated_at})
+            .execution_options(synchronize_session=False)
+        )
+
     @staticmethod
     async def get_by_assigned_to(session: AsyncSession, user_id: int) -> List[Task]:
-        """Получить задачи, назначенные пользователю (assigned_to или в assignees)"""
-        subq = select(task_assignees.c.task_id).where(task_assignees.c.user_id == user_id)
+        """Получить задачи, назначенные пользователю (по task_assignees)"""
         result = await session.execute(
             _task_options(
-                select(Task).where(
-                    or_(Task.assigned_to_id == user_id, Task.id.in_(subq))
-                )
+                select(Task)
+                .join(task_assignees, task_assignees.c.task_id == Task.id)
+                .where(task_assignees.c.user_id == user_id)
             )
         )
         return list(result.scalars().all())
     
+    @staticmethod
+    async def get_inbox(
+        session: AsyncSession,
+        user_id: int,
+        limit: int = 50,
+        after: Optional[tuple[Optional[datetime], int]] = None,
+    ) -> List[Task]:
+        """Открытые задачи пользователя по срочности (due_date, без срока — в конце).
+        Keyset-пагинация: after = (due_date, task_id) последней задачи предыдущей страницы.
+        Идёт по индексу ix_task_assignees_inbox (user_id, status, due_date)."""
+        ta = task_assignees.c
+        q = select(ta.task_id).where(ta.user_id == user_id, ta.status.in_(OPEN_STATUSES))
+        if after is not None:
+            after_due, after_id = after
+            if after_due is None:
+                q = q.where(ta.due_date.is_(None), ta.task_id > after_id)
+            else:
+                q = q.where(or_(
+                    ta.due_date > after_due,
+                    and_(ta.due_date == after_due, ta.task_id > after_id),
+                    ta.due_date.is_(None),
+                ))
+        if current_project.get() is not None:
+            # task_assignees — Core-таблица, условие проекта на неё не действует: ограничиваем через tasks
+            q = q.where(ta.task_id.in_(select(Task.id)))
+        q = q.order_by(ta.due_date.is_(None), ta.due_date, ta.task_id).limit(limit)
+        task_ids = list((await session.execute(q)).scalars().all())
+        if not task_ids:
+            return []
+        result = await session.execute(_task_options(select(Task).where(Task.id.in_(task_ids))))
+        by_id = {t.id: t for t in result.scalars().all()}
+        return [by_id[tid] for tid in task_ids if tid in by_id]
+    
     @staticmethod
     async def get_by_status(session: AsyncSession, status: TaskStatusEnum) -> List[Task]:
         """Получить задачи по статусу"""
@@ -63,23 +374,168 @@ class TaskDAO:
     async def create(session: AsyncSession, task: Task) -> Task:
         """Создать задачу"""
         session.add(task)
+        invalidate(session, "tasks", "workgroups")
         await session.flush()
+        await TaskDAO.record_status(session, task.id, task.status, task.created_by_id)
         await session.refresh(task)
         return task
+
+    @staticmethod
+    async def record_status(
+        session: AsyncSession,
+        task_id: int,
+        status: TaskStatusEnum,
+        changed_by_id: Optional[int] = None,
+        comment: Optional[str] = None,
+    ) -> None:
+        """Записать статус в историю (task_statuses); из неё строятся отрезки таймлайна"""
+        await session.execute(
+            insert(TaskStatus.__table__).values(
+                task_id=task_id, status=status, changed_by_id=changed_by_id,
+                comment=comment, created_at=datetime.utcnow(),
+            )
+        )
     
+    @staticmethod
+    async def bulk_create(session: AsyncSession, rows: List[dict], assignees: List[List[int]]) -> List[int]:
+        """Вставить задачи одним INSERT и их исполнителей одним INSERT в task_assignees.
+        rows — словари с колонками tasks, assignees[i] — исполнители rows[i] (первый станет assigned_to_id).
+        Возвращает ID задач в порядке rows."""
+        if not rows:
+            return []
+        invalidate(session, "tasks", "workgroups")
+        # Core INSERT минует before_insert: проект по умолчанию — текущий
+        scope = current_project.get()
+        rows = [
+            {**row, "project_id": row.get("project_id") or scope, "assigned_to_id": user_ids[0] if user_ids else None}
+            for row, user_ids in zip(rows, assignees)
+        ]
+        result = await session.execute(
+            insert(Task.__table__).returning(Task.__table__.c.id, sort_by_parameter_order=True), rows
+        )
+        task_ids = list(result.scalars().all())
+        # Core INSERT минует события маппера — счётчики проектов обновляем сами
+        counters = project_counters.delta_rows((row["project_id"], row["status"], 1) for row in rows)
+        if counters:
+            await session.execute(project_counters.upsert_statement(), counters)
+        links = [
+            {"task_id": task_id, "user_id": uid, "status": row["status"], "due_date": row.get("due_date")}
+            for task_id, row, user_ids in zip(task_ids, rows, assignees)
+            for uid in dict.fromkeys(user_ids)
+        ]
+        if links:
+            await session.execute(insert(task_assignees), links)
+        now = datetime.utcnow()
+        await session.execute(
+            insert(TaskStatus.__table__),
+            [
+                {"task_id": task_id, "status": row["status"], "changed_by_id": row["created_by_id"],
+                 "comment": None, "created_at": row.get("created_at") or now}
+                for task_id, row in zip(task_ids, rows)
+            ],
+        )
+        return task_ids
+
     @staticmethod
     async def update(session: AsyncSession, task: Task) -> Task:
         """Обновить задачу"""
+        invalidate(session, "tasks", "workgroups")
         await session.flush()
+        await TaskDAO._sync_assignee_index(session, task)
         await session.refresh(task)
         return task
     
+    @staticmethod
+    async def set_assignees(session: AsyncSession, task: Task, user_ids: List[int]) -> None:
+        """Записать исполнителей задачи. task_assignees — единственный источник правды,
+        assigned_to_id выставляется как первый исполнитель (обратная совместимость)."""
+        user_ids = list(dict.fromkeys(user_ids))
+        invalidate(session, "tasks", "workgroups")
+        await session.execute(delete(task_assignees).where(task_assignees.c.task_id == task.id))
+        if user_ids:
+            await session.execute(
+                insert(task_assignees),
+                [
+                    {"task_id": task.id, "user_id": uid, "status": task.status, "due_date": task.due_date}
+                    for uid in user_ids
+                ],
+            )
+        task.assigned_to_id = user_ids[0] if user_ids else None
+    
+    @staticmethod
+    async def _sync_assignee_index(session: AsyncSession, task: Task) -> None:
+        """Скопировать status/due_date задачи в строки task_assignees"""
+        await session.execute(
+            update(task_assignees)
+            .where(task_assignees.c.task_id == task.id)
+            .values(status=task.status, due_date=task.due_date)
+        )
+    
+    @staticmethod
+    async def advance_status(
+        session: AsyncSession, task_id: int, changed_by_id: Optional[int] = None
+    ) -> Optional[TaskStatusEnum]:
+        """Продвинуть статус задачи на следующий этап (ответ на опрос). Возвращает новый статус.
+        Узкие UPDATE без загрузки задачи, исполнителей и истории опросов; WHERE по текущему статусу —
+        чтобы параллельный ответ не перескочил этап."""
+        row = (await session.execute(select(Task.status, Task.project_id).where(Task.id == task_id))).first()
+        if row is None:
+            return None
+        current, project_id = row
+        next_status = NEXT_STATUS.get(current)
+        if not next_status:
+            return None
+        values = {"status": next_status}
+        if next_status == TaskStatusEnum.DONE:
+            values["completed_at"] = datetime.utcnow()
+        result = await session.execute(
+            update(Task).where(Task.id == task_id, Task.status == current).values(**values)
+        )
+        if not result.rowcount:
+            return None
+        await session.execute(
+            update(task_assignees).where(task_assignees.c.task_id == task_id).values(status=next_status)
+        )
+        counters = project_counters.delta_rows([(project_id, current, -1), (project_id, next_status, 1)])
+        if counters:
+            await session.execute(project_counters.upsert_statement(), counters)
+        await TaskDAO.record_status(session, task_id, next_status, changed_by_id, "Ответ на опрос")
+        invalidate(session, "tasks", "workgroups")
+        return next_status
+    
     @staticmethod
     async def delete(session: AsyncSession, task_id: int) -> bool:
         """Удалить задачу"""
         task = await TaskDAO.get_by_id(session, task_id)
         if task:
+            invalidate(session, "tasks", "workgroups")
             await session.delete(task)
             await session.flush()
             return True
         return False
+    
+    @staticmethod
+    async def save_poll_answer(session: AsyncSession, task_id: int, user_id: int, response_text: str) -> bool:
+        """Сохранить ответ в последний неотвеченный опрос и продвинуть статус задачи.
+        False — если ожидающего опроса нет."""
+        # Поиск идёт по частичному индексу ix_task_poll_responses_pending
+        rec_id = await session.scalar(
+            select(TaskPollResponse.id)
+            .where(
+                TaskPollResponse.task_id == task_id,
+                TaskPollResponse.user_id == user_id,
+                TaskPollResponse.response_text.is_(None),
+            )
+            .order_by(TaskPollResponse.polled_at.desc())
+            .limit(1)
+        )
+        if rec_id is None:
+            return False
+        await session.execute(
+            update(TaskPollResponse)
+            .where(TaskPollResponse.id == rec_id)
+            .values(response_text=(response_text or "").strip() or None)
+        )
+        invalidate(session, "tasks", "workgroups")
+        await TaskDAO.advance_status(session, task_id, user_id)
+        return True
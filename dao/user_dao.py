@@ -1,9 +1,23 @@
 """DAO для работы с пользователями"""
+import time
 from typing import Optional, List
-from sqlalchemy import select
+from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.models import User, UserRoleEnum
 from database import get_session
+from utils.cache import invalidate
+from config import BOT_USER_CACHE_TTL_SECONDS
+
+# Кэш бота telegram_id -> (user_id, истекает в time.monotonic()). Только найденные пользователи:
+# только что привязанный telegram_id должен работать сразу. update/delete вычищают записи
+# пользователя в своём процессе; из другого процесса (веб при отдельном боте) правка видна
+# не позже чем через BOT_USER_CACHE_TTL_SECONDS
+_telegram_cache: dict[int, tuple[int, float]] = {}
+
+
+def _forget_user(user_id: int) -> None:
+    for telegram_id in [tid for tid, (uid, _) in _telegram_cache.items() if uid == user_id]:
+        _telegram_cache.pop(telegram_id, None)
 
 
 class UserDAO:
@@ -15,6 +29,14 @@ class UserDAO:
         result = await session.execute(select(User).where(User.id == user_id))
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_by_ids(session: AsyncSession, user_ids: List[int]) -> List[User]:
+        """Получить пользователей по списку ID одним запросом"""
+        if not user_ids:
+            return []
+        result = await session.execute(select(User).where(User.id.in_(set(user_ids))))
+        return list(result.scalars().all())
+    
     @staticmethod
     async def get_by_login(session: AsyncSession, login: str) -> Optional[User]:
         """Получить пользователя по логину"""
@@ -27,6 +49,22 @@ class UserDAO:
         result = await session.execute(select(User).where(User.telegram_id == telegram_id))
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_id_by_telegram_id(session: AsyncSession, telegram_id: int) -> Optional[int]:
+        """ID пользователя по Telegram ID (без загрузки строки целиком)"""
+        return await session.scalar(select(User.id).where(User.telegram_id == telegram_id))
+
+    @staticmethod
+    async def get_id_by_telegram_id_cached(session: AsyncSession, telegram_id: int) -> Optional[int]:
+        """То же с кэшем на BOT_USER_CACHE_TTL_SECONDS (бот: каждое нажатие кнопки)"""
+        cached = _telegram_cache.get(telegram_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        user_id = await UserDAO.get_id_by_telegram_id(session, telegram_id)
+        if user_id is not None and BOT_USER_CACHE_TTL_SECONDS > 0:
+            _telegram_cache[telegram_id] = (user_id, time.monotonic() + BOT_USER_CACHE_TTL_SECONDS)
+        return user_id
+
     @staticmethod
     async def get_all(session: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
         """Получить всех пользователей"""
@@ -45,10 +83,38 @@ class UserDAO:
         result = await session.execute(select(User).where(User.created_by_id == creator_id))
         return list(result.scalars().all())
     
+    @staticmethod
+    async def get_by_logins(session: AsyncSession, logins: List[str]) -> List[User]:
+        """Пользователи по списку логинов одним запросом"""
+        if not logins:
+            return []
+        result = await session.execute(select(User).where(User.login.in_(set(logins))))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_by_telegram_ids(session: AsyncSession, telegram_ids: List[int]) -> List[User]:
+        """Пользователи по списку Telegram ID одним запросом"""
+        if not telegram_ids:
+            return []
+        result = await session.execute(select(User).where(User.telegram_id.in_(set(telegram_ids))))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def bulk_create(session: AsyncSession, rows: List[dict]) -> List[int]:
+        """Вставить пользователей одним INSERT (словари с колонками users); ID в порядке rows"""
+        if not rows:
+            return []
+        invalidate(session, "users")
+        result = await session.execute(
+            insert(User.__table__).returning(User.__table__.c.id, sort_by_parameter_order=True), rows
+        )
+        return list(result.scalars().all())
+
     @staticmethod
     async def create(session: AsyncSession, user: User) -> User:
         """Создать пользователя"""
         session.add(user)
+        invalidate(session, "users")
         await session.flush()
         await session.refresh(user)
         return user
@@ -56,6 +122,8 @@ class UserDAO:
     @staticmethod
     async def update(session: AsyncSession, user: User) -> User:
         """Обновить пользователя"""
+        invalidate(session, "users", "tasks", "workgroups")
+        _forget_user(user.id)
         await session.flush()
         await session.refresh(user)
         return user
@@ -65,6 +133,8 @@ class UserDAO:
         """Удалить пользователя"""
         user = await UserDAO.get_by_id(session, user_id)
         if user:
+            invalidate(session, "users", "tasks", "workgroups")
+            _forget_user(user_id)
             await session.delete(user)
             await session.flush()
             return True
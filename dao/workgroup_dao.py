@@ -1,9 +1,10 @@
 """DAO для работы с рабочими группами"""
 from typing import Optional, List
-from sqlalchemy import select
+from sqlalchemy import select, func, insert, delete
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import WorkGroup, Task, TaskPollResponse
+from database.models import WorkGroup, Task, TaskPollResponse, workgroup_users
+from utils.cache import invalidate
 
 
 def _workgroup_options(q):
@@ -17,6 +18,11 @@ def _workgroup_options(q):
     )
 
 
+def _workgroup_list_options(q):
+    """Для списков: только ответственный, без участников и истории задач"""
+    return q.options(selectinload(WorkGroup.responsible))
+
+
 class WorkGroupDAO:
     """Data Access Object для рабочих групп"""
     
@@ -27,31 +33,125 @@ class WorkGroupDAO:
         result = await session.execute(_workgroup_options(q))
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_by_id_light(session: AsyncSession, workgroup_id: int) -> Optional[WorkGroup]:
+        """Получить рабочую группу по ID без загрузки связей (для проверок прав и правки полей)"""
+        result = await session.execute(select(WorkGroup).where(WorkGroup.id == workgroup_id))
+        return result.scalar_one_or_none()
+    
     @staticmethod
     async def get_all(session: AsyncSession, skip: int = 0, limit: int = 100) -> List[WorkGroup]:
         """Получить все рабочие группы"""
         q = select(WorkGroup).offset(skip).limit(limit)
-        result = await session.execute(_workgroup_options(q))
+        result = await session.execute(_workgroup_list_options(q))
         return list(result.scalars().all())
     
     @staticmethod
     async def get_by_creator(session: AsyncSession, creator_id: int) -> List[WorkGroup]:
         """Получить рабочие группы, созданные пользователем"""
         q = select(WorkGroup).where(WorkGroup.created_by_id == creator_id)
-        result = await session.execute(_workgroup_options(q))
+        result = await session.execute(_workgroup_list_options(q))
         return list(result.scalars().all())
     
     @staticmethod
     async def get_by_responsible(session: AsyncSession, responsible_id: int) -> List[WorkGroup]:
         """Получить рабочие группы, где пользователь ответственный"""
         q = select(WorkGroup).where(WorkGroup.responsible_id == responsible_id)
-        result = await session.execute(_workgroup_options(q))
+        result = await session.execute(_workgroup_list_options(q))
         return list(result.scalars().all())
     
+    @staticmethod
+    async def get_stats(session: AsyncSession, workgroup_ids: List[int]) -> dict[int, dict]:
+        """Число участников и задач по статусам для групп (агрегаты в SQL)"""
+        stats = {wg_id: {"member_count": 0, "task_counts": {}} for wg_id in workgroup_ids}
+        if not workgroup_ids:
+            return stats
+        members = await session.execute(
+            select(workgroup_users.c.workgroup_id, func.count())
+            .where(workgroup_users.c.workgroup_id.in_(workgroup_ids))
+            .group_by(workgroup_users.c.workgroup_id)
+        )
+        for wg_id, count in members.all():
+            stats[wg_id]["member_count"] = count
+        tasks = await session.execute(
+            select(Task.workgroup_id, Task.status, func.count())
+            .where(Task.workgroup_id.in_(workgroup_ids))
+            .group_by(Task.workgroup_id, Task.status)
+        )
+        for wg_id, task_status, count in tasks.all():
+            stats[wg_id]["task_counts"][task_status.value] = count
+        return stats
+    
+    @staticmethod
+    async def get_member_ids(session: AsyncSession, workgroup_id: int) -> set[int]:
+        """ID участников группы"""
+        result = await session.execute(
+            select(workgroup_users.c.user_id).where(workgroup_users.c.workgroup_id == workgroup_id)
+        )
+        return set(result.scalars().all())
+    
+    @staticmethod
+    async def get_ids_by_names(
+        session: AsyncSession, names: List[str]
+    ) -> dict[str, List[tuple[int, Optional[int]]]]:
+        """(ID, project_id) групп по названиям одним запросом (названия не уникальны — список на имя)"""
+        if not names:
+            return {}
+        result = await session.execute(
+            select(WorkGroup.name, WorkGroup.id, WorkGroup.project_id).where(WorkGroup.name.in_(set(names)))
+        )
+        by_name: dict[str, List[tuple[int, Optional[int]]]] = {}
+        for name, workgroup_id, project_id in result.all():
+            by_name.setdefault(name, []).append((workgroup_id, project_id))
+        return by_name
+
+    @staticmethod
+    async def add_memberships(session: AsyncSession, pairs: List[tuple[int, int]]) -> None:
+        """Добавить участников в несколько групп одним INSERT; pairs — (workgroup_id, user_id)"""
+        if not pairs:
+            return
+        invalidate(session, "workgroups")
+        await session.execute(
+            insert(workgroup_users),
+            [{"workgroup_id": wg_id, "user_id": uid} for wg_id, uid in dict.fromkeys(pairs)],
+        )
+
+    @staticmethod
+    async def add_members(session: AsyncSession, workgroup_id: int, user_ids: set[int]) -> None:
+        """Добавить участников одним пакетным INSERT"""
+        if not user_ids:
+            return
+        invalidate(session, "workgroups")
+        await session.execute(
+            insert(workgroup_users),
+            [{"workgroup_id": workgroup_id, "user_id": uid} for uid in user_ids],
+        )
+    
+    @staticmethod
+    async def remove_members(session: AsyncSession, workgroup_id: int, user_ids: set[int]) -> None:
+        """Удалить участников одним DELETE ... IN"""
+        if not user_ids:
+            return
+        invalidate(session, "workgroups")
+        await session.execute(
+            delete(workgroup_users).where(
+                workgroup_users.c.workgroup_id == workgroup_id,
+                workgroup_users.c.user_id.in_(user_ids),
+            )
+        )
+    
+    @staticmethod
+    async def set_members(session: AsyncSession, workgroup_id: int, user_ids: set[int]) -> None:
+        """Привести состав группы к user_ids: вставить недостающих, удалить лишних"""
+        current = await WorkGroupDAO.get_member_ids(session, workgroup_id)
+        await WorkGroupDAO.remove_members(session, workgroup_id, current - user_ids)
+        await WorkGroupDAO.add_members(session, workgroup_id, user_ids - current)
+    
     @staticmethod
     async def create(session: AsyncSession, workgroup: WorkGroup) -> WorkGroup:
         """Создать рабочую группу"""
         session.add(workgroup)
+        invalidate(session, "workgroups")
         await session.flush()
         await session.refresh(workgroup)
         return workgroup
@@ -59,6 +159,7 @@ class WorkGroupDAO:
     @staticmethod
     async def update(session: AsyncSession, workgroup: WorkGroup) -> WorkGroup:
         """Обновить рабочую группу"""
+        invalidate(session, "workgroups")
         await session.flush()
         await session.refresh(workgroup)
         return workgroup
@@ -68,6 +169,7 @@ class WorkGroupDAO:
         """Удалить рабочую группу"""
         workgroup = await WorkGroupDAO.get_by_id(session, workgroup_id)
         if workgroup:
+            invalidate(session, "workgroups", "tasks")
             await session.delete(workgroup)
             await session.flush()
             return True
@@ -1,17 +1,30 @@
 """Настройка базы данных и сессий"""
+import logging
 from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
-from database.models import Base
-from config import DB_URL
+from database.models import Base, SchemaMigration
+from database import query_stats
+from database import project_scope  # noqa: F401 — фильтр по текущему проекту для всех сессий
+from database import project_counters  # счётчики задач проектов обновляются вместе с задачами
+from config import DB_URL, READ_DATABASE_URL
+from utils.metrics import register_db_pool
 
+logger = logging.getLogger(__name__)
 
 engine = create_async_engine(
     DB_URL,
     echo=False, # TODO: Убрать нахуй в проде  
     future=True,
 )
+query_stats.install(engine)
+register_db_pool(engine.pool, "write")
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -21,6 +34,31 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Движок для чтения (GET-запросы): реплика или та же БД. Отдельный пул, чтобы чтения
+# не занимали соединения писателя.
+read_engine = create_async_engine(
+    READ_DATABASE_URL or DB_URL,
+    echo=False,
+    future=True,
+)
+query_stats.install(read_engine)
+register_db_pool(read_engine.pool, "read")
+
+if read_engine.dialect.name == "sqlite":
+    @event.listens_for(read_engine.sync_engine, "connect")
+    def _set_query_only(dbapi_connection, connection_record):
+        """Соединения читателя не могут писать: случайная запись упадёт, а не захватит блокировку"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
 
 @asynccontextmanager
 async def get_session():
@@ -35,27 +73,187 @@ async def get_session():
             await session.close()
 
 
+# Миграции старых БД (SQLite): функции от синхронного соединения, по порядку.
+# Каждая применяется один раз и записывается в schema_migrations; новая БД получает
+# схему целиком из create_all, и её миграции только отмечаются.
+def _add_poll_columns(sync_conn):
+    """Колонки опроса задач"""
+    for col, defn in [
+        ("poll_interval_days", "INTEGER"),
+        ("poll_time", "VARCHAR(5)"),
+        ("last_polled_at", "DATETIME"),
+    ]:
+        try:
+            sync_conn.execute(text(f"ALTER TABLE tasks ADD COLUMN {col} {defn}"))
+        except Exception:
+            pass  # колонка уже есть
+    try:
+        sync_conn.execute(text("ALTER TABLE task_poll_responses ADD COLUMN status_at_poll VARCHAR(20)"))
+    except Exception:
+        pass
+
+
+def _unify_task_assignees(sync_conn):
+    """task_assignees — единственный источник назначений + индекс «мои задачи»"""
+    for col, defn in [("status", "VARCHAR(11)"), ("due_date", "DATETIME")]:
+        try:
+            sync_conn.execute(text(f"ALTER TABLE task_assignees ADD COLUMN {col} {defn}"))
+        except Exception:
+            pass
+    sync_conn.execute(text(
+        "INSERT OR IGNORE INTO task_assignees (task_id, user_id) "
+        "SELECT id, assigned_to_id FROM tasks WHERE assigned_to_id IS NOT NULL"
+    ))
+    sync_conn.execute(text(
+        "UPDATE task_assignees SET "
+        "status = (SELECT status FROM tasks WHERE tasks.id = task_assignees.task_id), "
+        "due_date = (SELECT due_date FROM tasks WHERE tasks.id = task_assignees.task_id) "
+        "WHERE status IS NULL"
+    ))
+    sync_conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_task_assignees_inbox "
+        "ON task_assignees (user_id, status, due_date)"
+    ))
+
+
+def _add_timezones(sync_conn):
+    """Часовые пояса для опросов + индекс изменённых задач для планировщика"""
+    for table in ("users", "workgroups"):
+        try:
+            sync_conn.execute(text(f"ALTER TABLE {table} ADD COLUMN timezone VARCHAR(64)"))
+        except Exception:
+            pass
+    sync_conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_updated_at ON tasks (updated_at)"))
+
+
+def _add_pending_poll_index(sync_conn):
+    """Частичный индекс ожидающих ответа опросов (кнопки бота)"""
+    sync_conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_task_poll_responses_pending "
+        "ON task_poll_responses (task_id, user_id, polled_at) WHERE response_text IS NULL"
+    ))
+
+
+def _add_timeline_indexes(sync_conn):
+    """Индексы диапазонных запросов таймлайна"""
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS ix_tasks_status_created ON tasks (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_due_date ON tasks (due_date)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_completed_at ON tasks (completed_at)",
+        "CREATE INDEX IF NOT EXISTS ix_task_poll_responses_task_polled "
+        "ON task_poll_responses (task_id, polled_at)",
+    ):
+        sync_conn.execute(text(ddl))
+
+
+def _add_deadline_markers(sync_conn):
+    """Отметки отправленных напоминаний о сроках + индекс (status, due_date)"""
+    for col in ("due_soon_notified_for", "overdue_notified_for"):
+        try:
+            sync_conn.execute(text(f"ALTER TABLE tasks ADD COLUMN {col} DATETIME"))
+        except Exception:
+            pass
+    sync_conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_status_due ON tasks (status, due_date)"))
+
+
+def _add_project_partitioning(sync_conn):
+    """Группы привязываются к проекту; индекс задач с project_id впереди вместо одиночного"""
+    try:
+        sync_conn.execute(text("ALTER TABLE workgroups ADD COLUMN project_id INTEGER REFERENCES projects(id)"))
+    except Exception:
+        pass
+    # Группа получает проект своих задач, если он у них один
+    sync_conn.execute(text(
+        "UPDATE workgroups SET project_id = ("
+        "SELECT CASE WHEN COUNT(DISTINCT project_id) = 1 THEN MIN(project_id) END "
+        "FROM tasks WHERE tasks.workgroup_id = workgroups.id) "
+        "WHERE project_id IS NULL"
+    ))
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS ix_workgroups_project_id ON workgroups (project_id)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_project_status_created ON tasks (project_id, status, created_at)",
+        "DROP INDEX IF EXISTS ix_tasks_project_id",
+    ):
+        sync_conn.execute(text(ddl))
+
+
+def _tasks_autoincrement(sync_conn):
+    """Пересоздать tasks с AUTOINCREMENT (в SQLite его не добавить через ALTER) и продолжить
+    нумерацию после максимального id среди задач и архива"""
+    if sync_conn.dialect.name != "sqlite":
+        return  # последовательности других СУБД id и так не переиспользуют
+    from database.models import Task
+    table_sql = sync_conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tasks'"
+    )).scalar()
+    if "AUTOINCREMENT" not in table_sql.upper():
+        index_sql = sync_conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tasks' AND sql IS NOT NULL"
+        )).scalars().all()
+        old_columns = {row[1] for row in sync_conn.execute(text("PRAGMA table_info(tasks)"))}
+        columns = ", ".join(c.name for c in Task.__table__.columns if c.name in old_columns)
+        create = str(CreateTable(Task.__table__).compile(dialect=sync_conn.dialect))
+        sync_conn.execute(text(create.replace("CREATE TABLE tasks ", "CREATE TABLE tasks_autoinc ", 1)))
+        sync_conn.execute(text(f"INSERT INTO tasks_autoinc ({columns}) SELECT {columns} FROM tasks"))
+        sync_conn.execute(text("DROP TABLE tasks"))
+        sync_conn.execute(text("ALTER TABLE tasks_autoinc RENAME TO tasks"))
+        for ddl in index_sql:
+            sync_conn.execute(text(ddl))
+    sync_conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'tasks'"))
+    sync_conn.execute(text(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', COALESCE(MAX(id), 0) FROM ("
+        "SELECT MAX(id) AS id FROM tasks UNION ALL SELECT MAX(id) FROM archived_tasks)"
+    ))
+
+
+MIGRATIONS = [
+    ("poll_columns", _add_poll_columns),
+    ("unify_task_assignees", _unify_task_assignees),
+    ("timezones", _add_timezones),
+    ("pending_poll_index", _add_pending_poll_index),
+    ("timeline_indexes", _add_timeline_indexes),
+    ("deadline_markers", _add_deadline_markers),
+    ("project_partitioning", _add_project_partitioning),
+    ("project_task_counters", project_counters.rebuild),
+    ("tasks_autoincrement", _tasks_autoincrement),
+]
+
+
+def _ensure_sqlite_dir() -> None:
+    """Каталог файла SQLite создаётся при инициализации БД, а не при импорте config"""
+    if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        Path(engine.url.database).parent.mkdir(parents=True, exist_ok=True)
+
+
+def _migrate(sync_conn) -> list:
+    """Создать недостающие таблицы и применить ещё не применённые миграции.
+    На актуальной БД — несколько быстрых запросов, без проходов по таблицам."""
+    inspector = inspect(sync_conn)
+    if inspector.has_table(SchemaMigration.__tablename__):
+        applied = set(sync_conn.execute(select(SchemaMigration.name)).scalars())
+        if all(name in applied for name, _ in MIGRATIONS):
+            Base.metadata.create_all(sync_conn)  # новые таблицы без миграций
+            return []
+    else:
+        applied = set()
+    fresh = not inspector.has_table("tasks")
+    Base.metadata.create_all(sync_conn)
+    pending = [(name, migration) for name, migration in MIGRATIONS if name not in applied]
+    for name, migration in pending:
+        if not fresh:
+            migration(sync_conn)
+        sync_conn.execute(SchemaMigration.__table__.insert().values(name=name, applied_at=datetime.utcnow()))
+    return [name for name, _ in pending] if not fresh else []
+
+
 async def init_db():
+    _ensure_sqlite_dir()
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        # Миграция: добавить колонки опроса, если их нет (SQLite)
-        def _add_poll_columns(sync_conn):
-            from sqlalchemy import text
-            for col, defn in [
-                ("poll_interval_days", "INTEGER"),
-                ("poll_time", "VARCHAR(5)"),
-                ("last_polled_at", "DATETIME"),
-            ]:
-                try:
-                    sync_conn.execute(text(f"ALTER TABLE tasks ADD COLUMN {col} {defn}"))
-                except Exception:
-                    pass  # колонка уже есть
-            try:
-                sync_conn.execute(text("ALTER TABLE task_poll_responses ADD COLUMN status_at_poll VARCHAR(20)"))
-            except Exception:
-                pass
-        await conn.run_sync(_add_poll_columns)
+        applied = await conn.run_sync(_migrate)
+    if applied:
+        logger.info("Применены миграции: %s", ", ".join(applied))
 
 
 async def close_db():
+    await read_engine.dispose()
     await engine.dispose()
@@ -1,7 +1,7 @@
 """Модели базы данных"""
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Integer, Text, DateTime, ForeignKey, Enum as SQLEnum, Table, Column
+from sqlalchemy import String, Integer, Text, DateTime, ForeignKey, Enum as SQLEnum, Table, Column, Index, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import enum
 
@@ -36,12 +36,18 @@ workgroup_users = Table(
     Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
 )
 
-# Связующая таблица для исполнителей задач (many-to-many)
+# Связующая таблица для исполнителей задач (many-to-many).
+# Единственный источник правды о назначениях (tasks.assigned_to_id — производное поле).
+# status и due_date — копия полей задачи для индекса «мои задачи» (user_id, status, due_date),
+# поддерживается TaskDAO при записи.
 task_assignees = Table(
     "task_assignees",
     Base.metadata,
     Column("task_id", Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True),
     Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("status", SQLEnum(TaskStatusEnum), nullable=True),
+    Column("due_date", DateTime, nullable=True),
+    Index("ix_task_assignees_inbox", "user_id", "status", "due_date"),
 )
 
 
@@ -53,6 +59,8 @@ class User(Base):
     telegram_id: Mapped[Optional[int]] = mapped_column(Integer, unique=True, nullable=True, index=True)
     username: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     full_name: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    # Часовой пояс (IANA), в котором автор задаёт время опросов своих задач
+    timezone: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     
     # Роль пользователя
     role: Mapped[UserRoleEnum] = mapped_column(
@@ -147,6 +155,17 @@ class Project(Base):
     )
 
 
+class ProjectTaskCounter(Base):
+    """Число задач проекта в каждом статусе — прогресс проекта без прохода по задачам.
+    Обновляется в той же транзакции, что и задачи (database/project_counters.py); задачи,
+    перенесённые в архив, продолжают учитываться."""
+    __tablename__ = "project_task_counters"
+
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    status: Mapped[TaskStatusEnum] = mapped_column(SQLEnum(TaskStatusEnum), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
 class WorkGroup(Base):
     """Рабочая группа - создается главными организаторами"""
     __tablename__ = "workgroups"
@@ -154,6 +173,14 @@ class WorkGroup(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Часовой пояс (IANA) группы: время опросов её задач считается в нём
+    timezone: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # Проект (мероприятие), к которому относится группа; см. database/project_scope.py
+    project_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("projects.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True
+    )
     
     # Кто создал группу
     created_by_id: Mapped[int] = mapped_column(
@@ -194,6 +221,18 @@ class WorkGroup(Base):
 class Task(Base):
     """Модель задачи"""
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Таймлайн: открытые задачи по дате создания (status IN (...) AND created_at <= to)
+        Index("ix_tasks_status_created", "status", "created_at"),
+        # Напоминания о сроках: открытые задачи, чей срок пересёк границу
+        Index("ix_tasks_status_due", "status", "due_date"),
+        # Запросы в области проекта (project_id = ?, дальше статус и дата создания); заменяет
+        # одиночный индекс по project_id
+        Index("ix_tasks_project_status_created", "project_id", "status", "created_at"),
+        # Id задач не переиспользуются: без AUTOINCREMENT SQLite выдаёт max(id)+1, и после удаления
+        # последней задачи новая получила бы id уже лежащей в архиве (archived_tasks.id — id задачи)
+        {"sqlite_autoincrement": True},
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
@@ -208,7 +247,6 @@ class Task(Base):
     project_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("projects.id", ondelete="SET NULL"),
         nullable=True,
-        index=True
     )
     workgroup_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("workgroups.id", ondelete="SET NULL"),
@@ -228,14 +266,21 @@ class Task(Base):
     
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    due_date: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Индекс — для инкрементальной подгрузки изменённых задач в планировщик опросов
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Индексы — для выборки задач таймлайна по диапазону дат
+    due_date: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
     
     # Опрос о задаче: интервал в днях (0/None = отключено), во сколько спрашивать
+    # (местное время пояса рабочей группы, иначе автора, иначе DEFAULT_TIMEZONE)
     poll_interval_days: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, default=None)
     poll_time: Mapped[Optional[str]] = mapped_column(String(5), nullable=True)  # "HH:MM"
     last_polled_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Напоминания о сроке: due_date, для которого уже отправлены «скоро срок» и «просрочена»
+    # (после переноса срока напоминания снова срабатывают)
+    due_soon_notified_for: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    overdue_notified_for: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
     telegram_message_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # ID сообщения в Telegram
     telegram_chat_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # ID чата в Telegram
@@ -275,6 +320,16 @@ class Task(Base):
 class TaskPollResponse(Base):
     """Ответ пользователя на опрос о задаче (когда спрашивали в боте)"""
     __tablename__ = "task_poll_responses"
+    # Ожидающие ответа опросы (бот ищет последний по задаче и пользователю)
+    __table_args__ = (
+        Index(
+            "ix_task_poll_responses_pending", "task_id", "user_id", "polled_at",
+            sqlite_where=text("response_text IS NULL"),
+            postgresql_where=text("response_text IS NULL"),
+        ),
+        # Отметки опросов на таймлайне: опросы задач окна по времени
+        Index("ix_task_poll_responses_task_polled", "task_id", "polled_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     task_id: Mapped[int] = mapped_column(
@@ -317,3 +372,90 @@ class TaskStatus(Base):
     # Связи
     task: Mapped["Task"] = relationship("Task", back_populates="status_history")
     changed_by: Mapped[Optional["User"]] = relationship("User")
+
+
+class PollOutbox(Base):
+    """Очередь исходящих опросов (transactional outbox).
+    Намерение отправить опрос коммитится вместе с last_polled_at; отправляет отдельный sender,
+    и только после доставки появляется запись TaskPollResponse. idempotency_key не даёт
+    поставить один и тот же опрос дважды."""
+    __tablename__ = "poll_outbox"
+    __table_args__ = (Index("ix_poll_outbox_due", "state", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    idempotency_key: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    telegram_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    polled_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    status_at_poll: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    # pending -> sending -> sent | failed (после OUTBOX_MAX_ATTEMPTS неудачных попыток)
+    state: Mapped[str] = mapped_column(String(10), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    task: Mapped["Task"] = relationship("Task")
+
+
+class NotificationOutbox(Base):
+    """Очередь исходящих уведомлений в Telegram (назначения, роли).
+    Кто создаёт событие, только коммитит сообщение сюда; отправитель разбирает очередь
+    с ограничением скорости (NOTIFY_RATE_PER_SECOND), так массовые операции не упираются в лимиты Telegram.
+    Ждущее сообщение о назначении или роли можно переписать или отменить до отправки
+    (services/notification_aggregator.py) — его ищут по (user_id, task_id) среди pending."""
+    __tablename__ = "notification_outbox"
+    __table_args__ = (Index("ix_notification_outbox_due", "state", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(30), nullable=False)  # user_added, role_assigned, task_assigned, ...
+    telegram_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    task_id: Mapped[Optional[int]] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), nullable=True)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    # pending -> sending -> sent | failed (после OUTBOX_MAX_ATTEMPTS неудачных попыток)
+    state: Mapped[str] = mapped_column(String(10), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class WorkerLease(Base):
+    """Аренда роли фонового воркера (планировщик, бот): держатель продлевает её, пока жив.
+    Заменяет advisory lock, которого нет в SQLite — роль выполняет ровно один процесс."""
+    __tablename__ = "worker_leases"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(200), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class ArchivedTask(Base):
+    """Холодное хранилище: закрытые давно задачи вместе с историей статусов и опросов.
+    Задача целиком лежит снимком в payload (JSON по схеме ArchivedTaskResponse), отдельные
+    колонки — только для фильтров. Внешних ключей нет: архив переживает удаление групп и людей."""
+    __tablename__ = "archived_tasks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)  # id исходной задачи
+    title: Mapped[str] = mapped_column(String(500), nullable=False)
+    status: Mapped[TaskStatusEnum] = mapped_column(SQLEnum(TaskStatusEnum), nullable=False)
+    project_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
+    workgroup_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
+    created_by_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    closed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+
+
+class SchemaMigration(Base):
+    """Применённые миграции init_db: каждая выполняется один раз, а не при каждом старте"""
+    __tablename__ = "schema_migrations"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
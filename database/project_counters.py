@@ -0,0 +1,88 @@
+"""Счётчики задач проекта по статусам (project_task_counters) — прогресс проекта за O(1).
+
+Счётчики меняются в той же транзакции, что и задачи:
+- ORM-вставка задачи, смена её статуса или проекта и удаление — события маппера Task ниже;
+- запись мимо ORM (TaskDAO.bulk_create, TaskDAO.advance_status) — явный вызов с дельтами.
+Перенос в архив счётчики не меняет: архивная задача остаётся частью прогресса проекта.
+rebuild() пересчитывает всё заново по tasks и archived_tasks (миграция, ручная сверка).
+"""
+from collections import Counter
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, event, func, insert, inspect, select, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database.models import ArchivedTask, Project, ProjectTaskCounter, Task, TaskStatusEnum
+
+_table = ProjectTaskCounter.__table__
+
+
+def upsert_statement():
+    """INSERT ... ON CONFLICT: прибавить count к счётчику (project_id, status)"""
+    stmt = sqlite_insert(_table)
+    return stmt.on_conflict_do_update(
+        index_elements=["project_id", "status"],
+        set_={"count": _table.c.count + stmt.excluded.count},
+    )
+
+
+def delta_rows(changes: Iterable[tuple[Optional[int], Optional[TaskStatusEnum], int]]) -> list[dict]:
+    """Свести изменения (project_id, status, ±n) в строки для upsert_statement.
+    Задачи без проекта не считаются, взаимно сократившиеся изменения отбрасываются."""
+    totals: Counter = Counter()
+    for project_id, status, n in changes:
+        if project_id is not None and status is not None:
+            totals[(project_id, status)] += n
+    return [
+        {"project_id": project_id, "status": status, "count": n}
+        for (project_id, status), n in totals.items()
+        if n
+    ]
+
+
+def _apply(connection, changes) -> None:
+    rows = delta_rows(changes)
+    if rows:
+        connection.execute(upsert_statement(), rows)
+
+
+def _committed(target, attr: str):
+    """Значение атрибута до изменений в этом flush"""
+    history = getattr(inspect(target).attrs, attr).history
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+
+@event.listens_for(Task, "after_insert")
+def _task_inserted(mapper, connection, target) -> None:
+    _apply(connection, [(target.project_id, target.status, 1)])
+
+
+@event.listens_for(Task, "after_update")
+def _task_updated(mapper, connection, target) -> None:
+    state = inspect(target).attrs
+    if not state.status.history.has_changes() and not state.project_id.history.has_changes():
+        return
+    _apply(connection, [
+        (_committed(target, "project_id"), _committed(target, "status"), -1),
+        (target.project_id, target.status, 1),
+    ])
+
+
+@event.listens_for(Task, "after_delete")
+def _task_deleted(mapper, connection, target) -> None:
+    _apply(connection, [(_committed(target, "project_id"), _committed(target, "status"), -1)])
+
+
+def rebuild(sync_conn) -> None:
+    """Пересчитать счётчики всех проектов по задачам и архиву"""
+    tasks = union_all(
+        select(Task.project_id, Task.status),
+        select(ArchivedTask.project_id, ArchivedTask.status),
+    ).subquery()
+    sync_conn.execute(delete(_table))
+    sync_conn.execute(insert(_table).from_select(
+        ["project_id", "status", "count"],
+        select(tasks.c.project_id, tasks.c.status, func.count())
+        .where(tasks.c.project_id.in_(select(Project.id)))
+        .group_by(tasks.c.project_id, tasks.c.status),
+    ))
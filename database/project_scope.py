@@ -0,0 +1,57 @@
+"""Разделение данных по проектам (мероприятиям) в одной БД.
+
+Текущий проект хранится в contextvar (API ставит его из заголовка X-Project-Id, см.
+api.dependencies.project_scope). Пока он задан, каждый ORM-запрос сессии — select, update,
+delete, включая подзапросы и подгрузку связей — получает условие project_id = текущий для
+задач, рабочих групп и архива: DAO не может забыть фильтр. Новые задачи и группы без
+project_id попадают в текущий проект. Индексы, начинающиеся с project_id, держат такие
+запросы в пределах данных своего мероприятия.
+
+Без проекта (фоновые воркеры, однопроектная установка) запросы видят все данные, как раньше.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+
+from database.models import ArchivedTask, Task, WorkGroup
+
+current_project: ContextVar[Optional[int]] = ContextVar("current_project", default=None)
+
+# Сущности с колонкой project_id, которые видны только внутри своего проекта
+_SCOPED = (Task, WorkGroup, ArchivedTask)
+
+
+@contextmanager
+def project_scope(project_id: Optional[int]) -> Iterator[None]:
+    """Выполнить блок в области проекта (None — без ограничения)"""
+    token = current_project.set(project_id)
+    try:
+        yield
+    finally:
+        current_project.reset(token)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _apply_project_scope(state: ORMExecuteState) -> None:
+    project_id = current_project.get()
+    if project_id is None:
+        return
+    if not (state.is_select or state.is_update or state.is_delete):
+        return
+    # Подгрузки колонок и связей наследуют условие от исходного запроса
+    if state.is_column_load or state.is_relationship_load:
+        return
+    state.statement = state.statement.options(*(
+        with_loader_criteria(entity, entity.project_id == project_id, include_aliases=True)
+        for entity in _SCOPED
+    ))
+
+
+@event.listens_for(Task, "before_insert")
+@event.listens_for(WorkGroup, "before_insert")
+def _assign_current_project(mapper, connection, target) -> None:
+    if target.project_id is None:
+        target.project_id = current_project.get()
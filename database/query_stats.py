@@ -0,0 +1,95 @@
+"""Учёт SQL-запросов: число запросов, время в БД и повторы одинаковых запросов (вероятный N+1).
+Время каждого запроса также попадает в метрику db_query_duration_seconds (см. utils.metrics).
+
+Статистика собирается в контексте track_queries() — на каждый HTTP-запрос его открывает
+QueryStatsMiddleware, в тестах и бенчмарках его можно открыть вручную:
+
+    with assert_max_queries(3):
+        await client.get("/api/tasks/my")
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+
+from utils.metrics import DB_QUERY_DURATION
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    """Счётчики SQL для одного запроса (или блока кода); вложенные блоки считаются и во внешнем"""
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0  # секунды
+        self.statements: Counter[str] = Counter()
+        self.batched = False  # повторы ожидаемы: обработка идёт пачками (см. mark_batched)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+        if self.parent is not None:
+            self.parent.record(statement, duration)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Одинаковые запросы, выполненные не меньше threshold раз — вероятный N+1"""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+def mark_batched() -> None:
+    """Отметить текущий запрос как пакетный (выгрузка, импорт): одинаковые запросы по пачкам —
+    не N+1, предупреждать о них не нужно"""
+    stats = _current.get()
+    while stats is not None:
+        stats.batched = True
+        stats = stats.parent
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Считать SQL-запросы, выполненные внутри блока (в т.ч. в дочерних задачах asyncio)"""
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """Упасть с AssertionError, если внутри блока выполнено больше max_queries запросов"""
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {n}× {sql}" for sql, n in stats.statements.most_common())
+        raise AssertionError(f"Выполнено {stats.count} SQL-запросов, бюджет {max_queries}:\n{listing}")
+
+
+# Начало запроса хранится в его ExecutionContext, а не в conn.info: упавший запрос не оставит
+# на соединении из пула лишней отметки, которая исказит время следующих
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_start", None)
+    duration = time.perf_counter() - started if started is not None else 0.0
+    DB_QUERY_DURATION.observe(duration)
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def install(engine) -> None:
+    """Подключить учёт к движку (AsyncEngine или обычный Engine)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
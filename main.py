@@ -1,16 +1,21 @@
 """Главный файл FastAPI приложения"""
 import logging
+
+from utils.startup import startup_profile  # первым: вне Linux отсчёт старта идёт от этого импорта
 from fastapi import FastAPI
 
 logging.basicConfig(level=logging.INFO)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
-import uvicorn
 
-from api import auth, users, tasks, workgroups
+from api import auth, users, projects, tasks, workgroups, timeline, archive, export, imports, system, metrics, health
+from api.middleware import QueryStatsMiddleware, MetricsMiddleware, SlowRequestProfilerMiddleware
+from config import GZIP_MINIMUM_SIZE, PROFILE_SLOW_REQUESTS_MS, WEB_RUN_WORKERS
 from database import init_db
+from utils.static_files import PrecompressedStaticFiles
 
 app = FastAPI(
     title="Task Tracker API",
@@ -33,35 +38,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Сжатие ответов API (JSON-списки); маленькие ответы не сжимаем
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+# Число SQL-запросов и время в БД на запрос: заголовок Server-Timing + лог + поиск N+1
+app.add_middleware(QueryStatsMiddleware)
+
+# Гистограммы времени ответа по маршрутам и статусам для /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Опционально: профили медленных запросов для флеймграфа
+if PROFILE_SLOW_REQUESTS_MS > 0:
+    app.add_middleware(SlowRequestProfilerMiddleware)
+
 # Подключение роутеров
 app.include_router(auth.router)
 app.include_router(users.router)
+app.include_router(projects.router)
 app.include_router(tasks.router)
 app.include_router(workgroups.router)
+app.include_router(timeline.router)
+app.include_router(archive.router)
+app.include_router(export.router)
+app.include_router(imports.router)
+app.include_router(system.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 
 @app.on_event("startup")
 async def startup_event():
     """Инициализация при запуске"""
     import asyncio
-    from services.task_poll_scheduler import poll_scheduler_loop
-    from services.telegram_bot_poller import bot_updates_loop
+    from services.loop_monitor import event_loop_lag_loop
     await init_db()
-    asyncio.create_task(poll_scheduler_loop())
-    asyncio.create_task(bot_updates_loop())
+    startup_profile.mark("db_ready")
+    asyncio.create_task(event_loop_lag_loop())
+    if WEB_RUN_WORKERS:
+        # Режим одного процесса; аренда в БД не даст запустить циклы дважды при нескольких воркерах uvicorn.
+        # Бот и планировщик импортируются только здесь: обычному веб-процессу они не нужны
+        from services.leader import run_as_leader
+        from services.task_poll_scheduler import scheduler_worker
+        from services.telegram_bot_poller import bot_updates_loop
+        asyncio.create_task(run_as_leader("scheduler", scheduler_worker))
+        asyncio.create_task(run_as_leader("bot", bot_updates_loop))
+    startup_profile.mark("ready")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Остановка: процессы хэширования паролей импорта не должны пережить приложение"""
+    from services.importer import shutdown_hash_pool
+    shutdown_hash_pool()
 
 
 # Статические файлы для фронтенда
 static_dir = Path(__file__).parent / "static"
+dist_dir = static_dir / "dist"  # собирается build_static.py
 if static_dir.exists():
+    if dist_dir.exists():
+        app.mount("/static/dist", PrecompressedStaticFiles(directory=str(dist_dir)), name="static-dist")
     app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
     
     @app.get("/")
     async def serve_app():
         """Отдача главной страницы приложения"""
-        index_file = static_dir / "index.html"
+        # Собранная версия ссылается на файлы с хэшем; саму страницу браузер перепроверяет каждый раз
+        index_file = dist_dir / "index.html"
+        if not index_file.exists():
+            index_file = static_dir / "index.html"
         if index_file.exists():
-            return FileResponse(str(index_file))
+            return FileResponse(str(index_file), headers={"Cache-Control": "no-cache"})
         return {"message": "Task Tracker API", "version": "1.0.0"}
 else:
     @app.get("/")
@@ -70,5 +117,9 @@ else:
         return {"message": "Task Tracker API", "version": "1.0.0"}
 
 
+startup_profile.mark("app_imported")
+
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
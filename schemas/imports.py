@@ -0,0 +1,19 @@
+"""Pydantic схемы для импорта из CSV"""
+from typing import List
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    """Ошибка в строке файла (line — номер строки в файле, заголовок — строка 1)"""
+    line: int
+    message: str
+
+
+class ImportReport(BaseModel):
+    """Отчёт импорта. При ошибках и в режиме dry_run ничего не записывается."""
+    kind: str  # users | tasks
+    dry_run: bool
+    total: int = 0  # строк с данными в файле
+    created: int = 0
+    notifications_queued: int = 0
+    errors: List[ImportRowError] = []
@@ -1,7 +1,8 @@
 """Pydantic схемы для проектов"""
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel
+from database.models import TaskStatusEnum
 from schemas.task import TaskResponse
 
 
@@ -33,3 +34,17 @@ class ProjectResponse(ProjectBase):
 class ProjectWithTasks(ProjectResponse):
     """Схема проекта с задачами"""
     tasks: List[TaskResponse] = []
+
+
+class ProjectProgress(BaseModel):
+    """Прогресс проекта. Задачи в архиве учитываются; процент выполнения — доля
+    выполненных среди всех, кроме отменённых."""
+    total: int = 0
+    by_status: Dict[TaskStatusEnum, int] = {}
+    overdue: int = 0
+    completion_percent: float = 0.0
+
+
+class ProjectWithProgress(ProjectResponse):
+    """Схема проекта с прогрессом по задачам"""
+    progress: ProjectProgress = ProjectProgress()
@@ -80,3 +80,27 @@ class TaskWithRelations(TaskResponse):
     creator: Optional[UserResponse] = None
     assignee: Optional[UserResponse] = None
     assignees: List[UserResponse] = []
+
+
+class TaskInboxPage(BaseModel):
+    """Страница входящих задач пользователя"""
+    items: List[TaskResponse] = []
+    next_cursor: Optional[str] = None  # передать как ?cursor= для следующей страницы
+
+
+class TaskStatusHistorySchema(BaseModel):
+    """Запись истории статусов задачи"""
+    id: int
+    status: TaskStatusEnum
+    changed_by_id: Optional[int] = None
+    comment: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ArchivedTaskResponse(TaskWithRelations):
+    """Задача из архива: снимок на момент архивации с историей статусов"""
+    status_history: List[TaskStatusHistorySchema] = []
+    archived_at: Optional[datetime] = None
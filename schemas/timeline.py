@@ -0,0 +1,47 @@
+"""Pydantic схемы для таймлайна задач"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+from database.models import TaskStatusEnum
+
+
+class TimelineSegment(BaseModel):
+    """Отрезок полосы задачи в одном статусе (обрезан по окну)"""
+    status: TaskStatusEnum
+    start: datetime
+    end: datetime
+    left: float  # начало, % ширины окна
+    width: float  # длина, % ширины окна
+
+
+class TimelinePollMarker(BaseModel):
+    """Отметка опроса на полосе задачи"""
+    polled_at: datetime
+    left: float  # % ширины окна
+    user_name: Optional[str] = None
+    response_text: Optional[str] = None
+    status_at_poll: Optional[str] = None
+
+
+class TimelineItem(BaseModel):
+    """Задача на таймлайне"""
+    task_id: int
+    title: str
+    status: TaskStatusEnum
+    workgroup_id: Optional[int] = None
+    assignees: List[str] = []
+    created_at: datetime
+    due_date: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    due_left: Optional[float] = None  # отметка срока, если он попадает в окно
+    closed_left: Optional[float] = None  # отметка выполнения или отмены, если она в окне
+    segments: List[TimelineSegment] = []
+    polls: List[TimelinePollMarker] = []
+
+
+class TimelineResponse(BaseModel):
+    """Таймлайн за окно [start, end] (наивное UTC, как в БД)"""
+    start: datetime
+    end: datetime
+    items: List[TimelineItem] = []
+    truncated: bool = False  # задач в окне больше limit — сузьте окно или выберите группу
@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, field_validator
 from database.models import UserRoleEnum
+from utils.timezones import validate_timezone
 
 
 class UserBase(BaseModel):
@@ -11,6 +12,12 @@ class UserBase(BaseModel):
     full_name: Optional[str] = None
     role: UserRoleEnum = UserRoleEnum.WORKER
     telegram_id: Optional[int] = None
+    timezone: Optional[str] = None
+
+    @field_validator("timezone", mode="before")
+    @classmethod
+    def check_timezone(cls, v):
+        return validate_timezone(v)
 
 
 class UserCreate(UserBase):
@@ -28,6 +35,12 @@ class UserUpdate(BaseModel):
     login: Optional[str] = None
     password: Optional[str] = None
     telegram_id: Optional[int] = None
+    timezone: Optional[str] = None  # "" — сбросить на пояс по умолчанию
+
+    @field_validator("timezone", mode="before")
+    @classmethod
+    def check_timezone(cls, v):
+        return "" if v == "" else validate_timezone(v)
 
 
 class UserResponse(UserBase):
@@ -1,19 +1,27 @@
 """Pydantic схемы для рабочих групп"""
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Optional, List, Dict
+from pydantic import BaseModel, field_validator
 from schemas.user import UserResponse
 from schemas.task import TaskResponse
+from utils.timezones import validate_timezone
 
 
 class WorkGroupBase(BaseModel):
     """Базовая схема рабочей группы"""
     name: str
     description: Optional[str] = None
+    timezone: Optional[str] = None
+
+    @field_validator("timezone", mode="before")
+    @classmethod
+    def check_timezone(cls, v):
+        return validate_timezone(v)
 
 
 class WorkGroupCreate(WorkGroupBase):
     """Схема для создания рабочей группы"""
+    project_id: Optional[int] = None  # по умолчанию — текущий проект (X-Project-Id)
     responsible_id: Optional[int] = None
     member_ids: Optional[List[int]] = None
 
@@ -22,13 +30,25 @@ class WorkGroupUpdate(BaseModel):
     """Схема для обновления рабочей группы"""
     name: Optional[str] = None
     description: Optional[str] = None
+    timezone: Optional[str] = None  # "" — сбросить на пояс по умолчанию
     responsible_id: Optional[int] = None
     member_ids: Optional[List[int]] = None
 
+    @field_validator("timezone", mode="before")
+    @classmethod
+    def check_timezone(cls, v):
+        return "" if v == "" else validate_timezone(v)
+
+
+class WorkGroupMembersAdd(BaseModel):
+    """Схема для добавления участников в группу"""
+    member_ids: List[int]
+
 
 class WorkGroupResponse(WorkGroupBase):
     """Схема ответа с данными рабочей группы"""
     id: int
+    project_id: Optional[int] = None
     created_by_id: int
     responsible_id: Optional[int] = None
     created_at: datetime
@@ -38,6 +58,13 @@ class WorkGroupResponse(WorkGroupBase):
         from_attributes = True
 
 
+class WorkGroupSummary(WorkGroupResponse):
+    """Облегчённая схема для списка групп: без участников и задач, только счётчики"""
+    responsible: Optional[UserResponse] = None
+    member_count: int = 0
+    task_counts: Dict[str, int] = {}  # статус -> число задач
+
+
 class WorkGroupWithRelations(WorkGroupResponse):
     """Схема рабочей группы с отношениями"""
     created_by: Optional[UserResponse] = None
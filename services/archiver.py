@@ -0,0 +1,72 @@
+"""Перенос давно закрытых задач в архив (archived_tasks).
+
+Горячие таблицы (tasks, task_statuses, task_poll_responses) хранят только живые и недавно
+закрытые задачи — списки, планировщик и бот работают с ними. Задачи DONE/CANCELLED, которые
+не менялись ARCHIVE_AFTER_DAYS дней, переносятся в архив вместе с историей. Каждая пачка —
+отдельная короткая транзакция, между пачками пауза: запись в SQLite не блокируется надолго.
+
+Цикл работает в роли scheduler; разово: python -m services.archiver
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from config import (
+    ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_BATCH_PAUSE_SECONDS, ARCHIVE_INTERVAL_SECONDS,
+)
+from database.database import AsyncSessionLocal
+from dao.archive_dao import ArchiveDAO
+from utils.metrics import ARCHIVED_TASKS
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_closed_tasks(
+    after_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause: float = ARCHIVE_BATCH_PAUSE_SECONDS,
+) -> int:
+    """Перенести в архив все подходящие задачи пачками. Возвращает их число."""
+    closed_before = datetime.utcnow() - timedelta(days=after_days)
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            moved = await ArchiveDAO.archive_batch(db, closed_before, batch_size)
+            await db.commit()
+        total += moved
+        ARCHIVED_TASKS.inc(amount=moved)
+        if moved < batch_size:
+            break
+        await asyncio.sleep(pause)
+    if total:
+        logger.info("В архив перенесено задач: %s", total)
+    return total
+
+
+async def archive_loop() -> None:
+    """Фоновый цикл архивации раз в ARCHIVE_INTERVAL_SECONDS"""
+    if ARCHIVE_AFTER_DAYS <= 0:
+        return
+    while True:
+        try:
+            await archive_closed_tasks()
+        except Exception as e:
+            logger.exception("Ошибка архивации задач: %s", e)
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+
+async def _run_once(after_days: int) -> None:
+    from database import init_db
+    await init_db()
+    total = await archive_closed_tasks(after_days=after_days)
+    print(f"Перенесено в архив: {total}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Перенести давно закрытые задачи в архив")
+    parser.add_argument("--after-days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="сколько дней задача должна быть закрыта и не меняться")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run_once(args.after_days))
@@ -0,0 +1,105 @@
+"""Напоминания о сроках задач: «скоро срок» (за DUE_SOON_HOURS) и «просрочена».
+
+Просрочка дополнительно уходит ответственному рабочей группы (если он сам не исполнитель).
+Проход раз в DEADLINE_CHECK_INTERVAL_SECONDS читает только задачи, чей срок пересёк границу
+с прошлого прохода или которые изменились (TaskDAO.get_deadline_candidates), поэтому его
+стоимость не зависит от общего числа открытых задач. Отправленное напоминание отмечается
+в задаче вместе с постановкой сообщений в notification_outbox — в одной транзакции, так что
+после перезапуска повторов нет, а перенос срока снова включает напоминания.
+Несколько задач одному получателю за проход — одно сообщение.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from config import (
+    DEADLINE_BATCH_SIZE, DEADLINE_CHECK_INTERVAL_SECONDS, DEADLINE_LOOKBACK_HOURS, DUE_SOON_HOURS,
+    POLL_DIGEST_MAX_TASKS,
+)
+from database.database import AsyncSessionLocal
+from dao.notification_dao import NotificationDAO
+from dao.task_dao import TaskDAO
+from services.notification_outbox import wake_notifier
+from services.telegram_notify import deadline_text
+from utils.metrics import DEADLINE_REMINDERS
+from utils.timezones import get_zone, to_local
+
+logger = logging.getLogger(__name__)
+
+
+def _format_due(due: datetime, timezone_name: Optional[str]) -> str:
+    return to_local(due, get_zone(timezone_name)).strftime("%d.%m %H:%M")
+
+
+def build_messages(rows: List[dict]) -> List[dict]:
+    """Сообщения для notification_outbox: по одному на (получатель, вид напоминания)"""
+    groups: dict[tuple[int, str], dict] = {}
+
+    def add(user: tuple, kind: str, row: dict, assignees: str = "") -> None:
+        user_id, telegram_id, timezone_name, _ = user
+        if not telegram_id:
+            return
+        group = groups.setdefault((telegram_id, kind), {"user_id": user_id, "tasks": [], "task_ids": []})
+        group["tasks"].append((row["title"], _format_due(row["due_date"], timezone_name), assignees))
+        group["task_ids"].append(row["id"])
+
+    for row in rows:
+        kind = "overdue" if row["overdue"] else "due_soon"
+        for user in row["assignees"]:
+            add(user, kind, row)
+        responsible = row["responsible"]
+        if row["overdue"] and responsible and responsible[0] not in {user[0] for user in row["assignees"]}:
+            names = ", ".join(filter(None, (user[3] for user in row["assignees"]))) or "не назначены"
+            add(responsible, "overdue_escalation", row, names)
+
+    return [
+        {
+            "kind": f"deadline_{kind}",
+            "telegram_id": telegram_id,
+            "user_id": group["user_id"],
+            "task_id": group["task_ids"][0] if len(group["task_ids"]) == 1 else None,
+            "text": deadline_text(kind, group["tasks"], POLL_DIGEST_MAX_TASKS),
+        }
+        for (telegram_id, kind), group in groups.items()
+    ]
+
+
+async def check_deadlines(since: datetime, now: datetime, batch_size: int = DEADLINE_BATCH_SIZE) -> int:
+    """Один проход: отметить и поставить в очередь напоминания по задачам, пересёкшим
+    границы сроков в (since, now]. Возвращает число сообщений."""
+    soon_until = now + timedelta(hours=DUE_SOON_HOURS)
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            rows = await TaskDAO.get_deadline_candidates(db, since, now, soon_until, limit=batch_size)
+            await TaskDAO.mark_deadline_notified(db, [row["id"] for row in rows if row["overdue"]], overdue=True)
+            await TaskDAO.mark_deadline_notified(db, [row["id"] for row in rows if not row["overdue"]], overdue=False)
+            messages = build_messages(rows)
+            total += await NotificationDAO.enqueue(db, messages)
+            await db.commit()
+        for message in messages:
+            DEADLINE_REMINDERS.inc(message["kind"].removeprefix("deadline_"))
+        if len(rows) < batch_size:
+            break
+    if total:
+        wake_notifier()
+    return total
+
+
+async def deadline_loop() -> None:
+    """Фоновый цикл напоминаний о сроках (роль scheduler)"""
+    if DEADLINE_CHECK_INTERVAL_SECONDS <= 0:
+        return
+    since = datetime.utcnow() - timedelta(hours=DEADLINE_LOOKBACK_HOURS)
+    while True:
+        now = datetime.utcnow()
+        try:
+            queued = await check_deadlines(since, now)
+            if queued:
+                logger.info("Напоминаний о сроках в очереди: %s", queued)
+            # Небольшой запас назад — на случай расхождения часов между процессами
+            since = now - timedelta(seconds=5)
+        except Exception as e:
+            logger.exception("Ошибка проверки сроков задач: %s", e)
+        await asyncio.sleep(DEADLINE_CHECK_INTERVAL_SECONDS)
@@ -0,0 +1,125 @@
+"""Выгрузка задач в CSV/XLSX потоком.
+
+Строка на задачу: исполнители, история статусов и ответы на опросы склеены в ячейки.
+Задачи читаются пачками (TaskDAO.iter_for_export), каждая пачка сразу превращается в байты
+и отдаётся клиенту — память не зависит от объёма выгрузки.
+"""
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+
+from database import query_stats
+from database.database import ReadSessionLocal
+from database.models import WorkGroup
+from dao.task_dao import TaskDAO
+from dao.archive_dao import ArchiveDAO
+from schemas.task import ArchivedTaskResponse
+from utils.xlsx import XlsxStreamWriter
+
+EXPORT_BATCH_SIZE = 500
+
+HEADER = [
+    "ID", "Задача", "Статус", "Рабочая группа", "Проект", "Автор", "Исполнители",
+    "Создана", "Срок", "Завершена", "История статусов", "Ответы на опросы", "В архиве",
+]
+
+
+def _fmt(dt: Optional[datetime]) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M") if dt else ""
+
+
+def _status(value) -> str:
+    return getattr(value, "value", value) or ""
+
+
+def _safe(value):
+    """Не дать табличному редактору принять текст за формулу (числа не трогаем)"""
+    if isinstance(value, str) and value and value[0] in "=+-@\t\r":
+        return "'" + value
+    return value
+
+
+def task_row(task: dict, workgroups: dict[int, str], archived: bool = False) -> list:
+    """Строка выгрузки из словаря TaskDAO.iter_for_export (или archived_record)"""
+    history = "; ".join(f"{_status(status)} {_fmt(at)}" for status, at in task["history"])
+    polls = "; ".join(
+        f"{_fmt(at)} {name or '—'}: {text or 'без ответа'}" for at, name, text in task["polls"]
+    )
+    # Пользовательский текст — в каждой ячейке: название, группа, имена, ответы
+    return [_safe(cell) for cell in (
+        task["id"],
+        task["title"],
+        _status(task["status"]),
+        workgroups.get(task["workgroup_id"], task["workgroup_id"] or ""),
+        task["project_id"] or "",
+        task["creator"] or task["created_by_id"],
+        ", ".join(filter(None, task["assignees"])),
+        _fmt(task["created_at"]),
+        _fmt(task["due_date"]),
+        _fmt(task["completed_at"]),
+        history,
+        polls,
+        "да" if archived else "",
+    )]
+
+
+def archived_record(task: ArchivedTaskResponse) -> dict:
+    """Снимок из архива в том же виде, что и строки TaskDAO.iter_for_export"""
+    return {
+        **task.model_dump(include={
+            "id", "title", "status", "workgroup_id", "project_id", "created_by_id",
+            "created_at", "due_date", "completed_at",
+        }),
+        "creator": task.creator.full_name if task.creator else None,
+        "assignees": sorted((u.full_name or "" for u in task.assignees)),
+        "history": [(h.status, h.created_at) for h in task.status_history],
+        "polls": [(p.polled_at, p.user.full_name if p.user else None, p.response_text) for p in task.poll_responses],
+    }
+
+
+async def iter_task_rows(
+    workgroup_id: Optional[int] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    include_archived: bool = False,
+) -> AsyncIterator[list[list]]:
+    """Пачки строк выгрузки с теми же фильтрами, что у GET /api/tasks/.
+    Сессия своя: генератор живёт дольше обработчика запроса."""
+    query_stats.mark_batched()
+    async with ReadSessionLocal() as db:
+        workgroups = dict((await db.execute(select(WorkGroup.id, WorkGroup.name))).all())
+        async for tasks in TaskDAO.iter_for_export(
+            db, workgroup_id=workgroup_id, skip=skip, limit=limit, batch_size=EXPORT_BATCH_SIZE
+        ):
+            yield [task_row(task, workgroups) for task in tasks]
+        if include_archived:
+            async for rows in ArchiveDAO.iter_batches(db, workgroup_id=workgroup_id, batch_size=EXPORT_BATCH_SIZE):
+                yield [task_row(archived_record(ArchiveDAO.to_response(row)), workgroups, archived=True) for row in rows]
+
+
+async def csv_stream(**filters) -> AsyncIterator[bytes]:
+    """CSV в UTF-8 с BOM (чтобы Excel узнал кодировку)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    async for rows in iter_task_rows(**filters):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def xlsx_stream(**filters) -> AsyncIterator[bytes]:
+    writer = XlsxStreamWriter("Задачи")
+    writer.write_row(HEADER)
+    async for rows in iter_task_rows(**filters):
+        for row in rows:
+            writer.write_row(row)
+        chunk = writer.drain()
+        if chunk:
+            yield chunk
+    yield writer.close()
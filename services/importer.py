@@ -0,0 +1,431 @@
+"""Массовый импорт пользователей и задач из CSV.
+
+Файл разбирается построчно в отдельном потоке (event loop не ждёт чтения и разбора большого
+файла), затем все строки проверяются целиком: поля, повторы внутри файла,
+занятые логины и Telegram ID, создатели и рабочие группы — каждое одним запросом на весь файл.
+Если есть хоть одна ошибка (или dry_run), ничего не пишется и возвращается отчёт.
+Иначе пароли хэшируются в пуле процессов (bcrypt не блокирует event loop), строки вставляются
+пачками по IMPORT_CHUNK_SIZE в одной транзакции, а уведомления встают в notification_outbox.
+Коммит — за вызывающим.
+
+Пользователи (колонки): full_name, role, login, password, telegram_id, username, timezone,
+created_by (логин создателя — в БД или в этом же файле; пусто — импортирующий),
+workgroups (названия групп через «;»).
+Задачи: title, description, status, workgroup, assignees (логины или Telegram ID через «;»),
+due_date (2026-05-01 или 2026-05-01 18:00), poll_interval_days, poll_time (HH:MM).
+
+CLI: python -m services.importer users|tasks FILE --as LOGIN [--dry-run]
+"""
+import asyncio
+import csv
+import io
+import itertools
+import math
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import IO, Iterator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import IMPORT_CHUNK_SIZE, IMPORT_HASH_WORKERS
+from database.models import TaskStatusEnum, User, UserRoleEnum
+from database.project_scope import current_project
+from dao.notification_dao import NotificationDAO
+from dao.task_dao import TaskDAO
+from dao.user_dao import UserDAO
+from dao.workgroup_dao import WorkGroupDAO
+from schemas.imports import ImportReport, ImportRowError
+from services.telegram_notify import ROLE_NAMES, WEB_ROLES, role_assigned_text, task_assigned_text
+from utils.auth import get_password_hashes
+from utils.timezones import validate_timezone
+
+USER_COLUMNS = {"full_name", "role", "login", "password", "telegram_id", "username", "timezone", "created_by", "workgroups"}
+TASK_COLUMNS = {"title", "description", "status", "workgroup", "assignees", "due_date", "poll_interval_days", "poll_time"}
+
+# Роль можно указать значением (worker) или названием (Работник)
+_ROLES = {role.value: role for role in UserRoleEnum} | {name.lower(): role for role, name in ROLE_NAMES.items()}
+_STATUSES = {status.value: status for status in TaskStatusEnum}
+_POLL_TIME = re.compile(r"^([01]?\d|2[0-3]):([0-5]\d)$")
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_workers = IMPORT_HASH_WORKERS or os.cpu_count() or 1
+
+
+def can_create(creator_role: UserRoleEnum, role: UserRoleEnum) -> bool:
+    """Может ли пользователь с ролью creator_role завести пользователя с ролью role"""
+    if creator_role == UserRoleEnum.PROJECT_MANAGER:
+        return True
+    if creator_role == UserRoleEnum.MAIN_ORGANIZER:
+        return role != UserRoleEnum.PROJECT_MANAGER
+    if creator_role == UserRoleEnum.RESPONSIBLE:
+        return role == UserRoleEnum.WORKER
+    return False
+
+
+def read_csv(stream: IO[bytes], columns: set[str]) -> Iterator[tuple[int, dict]]:
+    """Построчный разбор CSV из бинарного потока: (номер строки, {колонка: значение}).
+    UTF-8 (BOM допускается), разделитель «,» или «;» — по заголовку. Неизвестные колонки — ValueError."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    header = text.readline()
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    reader = csv.DictReader(itertools.chain([header], text), delimiter=delimiter)
+    fields = {(name or "").strip().lower() for name in reader.fieldnames or []}
+    if unknown := fields - columns:
+        raise ValueError(f"Неизвестные колонки: {', '.join(sorted(unknown))}")
+    for raw in reader:
+        row = {(key or "").strip().lower(): (value or "").strip() for key, value in raw.items() if key}
+        if any(row.values()):
+            yield reader.line_num, row
+
+
+async def read_csv_rows(stream: IO[bytes], columns: set[str]) -> list[tuple[int, dict]]:
+    """read_csv целиком в отдельном потоке: загруженный файл (SpooledTemporaryFile, большой —
+    на диске) читается и разбирается вне event loop"""
+    return await asyncio.to_thread(lambda: list(read_csv(stream, columns)))
+
+
+def _split(value: str) -> list[str]:
+    return [part.strip() for part in value.split(";") if part.strip()]
+
+
+async def hash_passwords(passwords: list[str]) -> list[str]:
+    """bcrypt для списка паролей в пуле процессов, пачками по числу процессов"""
+    global _hash_pool
+    if not passwords:
+        return []
+    if _hash_pool is None:
+        # spawn: дочерние процессы не наследуют потоки и соединения веб-процесса
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=_hash_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    size = math.ceil(len(passwords) / _hash_workers)
+    loop = asyncio.get_running_loop()
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(_hash_pool, get_password_hashes, passwords[i:i + size])
+        for i in range(0, len(passwords), size)
+    ))
+    return [h for chunk in chunks for h in chunk]
+
+
+def shutdown_hash_pool() -> None:
+    """Остановить процессы хэширования (при остановке приложения)"""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
+async def _resolve_workgroups(
+    db: AsyncSession, names: set[str], rows: list[dict], key: str, error
+) -> dict[str, tuple[int, Optional[int]]]:
+    """Названия групп -> (ID, project_id) одним запросом; неизвестные и неоднозначные — ошибки в строках"""
+    by_name = await WorkGroupDAO.get_ids_by_names(db, list(names))
+    for row in rows:
+        for name in row[key]:
+            if name not in by_name:
+                error(row["line"], f"Рабочая группа «{name}» не найдена")
+            elif len(by_name[name]) > 1:
+                error(row["line"], f"Несколько рабочих групп с названием «{name}»")
+    return {name: ids[0] for name, ids in by_name.items() if len(ids) == 1}
+
+
+async def import_users(db: AsyncSession, stream: IO[bytes], importer: User, dry_run: bool = False) -> ImportReport:
+    """Импорт пользователей из CSV от имени importer"""
+    report = ImportReport(kind="users", dry_run=dry_run)
+
+    def error(line: int, message: str) -> None:
+        report.errors.append(ImportRowError(line=line, message=message))
+
+    rows: list[dict] = []
+    try:
+        for line, raw in await read_csv_rows(stream, USER_COLUMNS):
+            report.total += 1
+            role = _ROLES.get((raw.get("role") or UserRoleEnum.WORKER.value).lower())
+            if role is None:
+                error(line, f"Неизвестная роль: {raw['role']}")
+                continue
+            login, password = raw.get("login") or None, raw.get("password") or None
+            if role in WEB_ROLES and not (login and password):
+                error(line, "Для этой роли обязательно указать логин и пароль")
+                continue
+            telegram_id = None
+            if raw.get("telegram_id"):
+                try:
+                    telegram_id = int(raw["telegram_id"])
+                except ValueError:
+                    error(line, f"Telegram ID должен быть числом: {raw['telegram_id']}")
+                    continue
+            try:
+                timezone = validate_timezone(raw.get("timezone"))
+            except ValueError as e:
+                error(line, str(e))
+                continue
+            rows.append({
+                "line": line, "role": role, "login": login, "password": password, "telegram_id": telegram_id,
+                "full_name": raw.get("full_name") or None, "username": raw.get("username") or None,
+                "timezone": timezone, "created_by": raw.get("created_by") or None,
+                "workgroups": _split(raw.get("workgroups", "")),
+            })
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        error(1, f"Не удалось разобрать CSV: {e}")
+        return report
+
+    # Повторы внутри файла и занятые в БД логины / Telegram ID
+    by_login: dict[str, dict] = {}
+    seen_telegram: dict[int, int] = {}
+    for row in rows:
+        if row["login"]:
+            if row["login"] in by_login:
+                error(row["line"], f"Логин {row['login']} уже указан в строке {by_login[row['login']]['line']}")
+            else:
+                by_login[row["login"]] = row
+        if row["telegram_id"]:
+            if row["telegram_id"] in seen_telegram:
+                error(row["line"], f"Telegram ID {row['telegram_id']} уже указан в строке {seen_telegram[row['telegram_id']]}")
+            else:
+                seen_telegram[row["telegram_id"]] = row["line"]
+    taken_logins = {u.login for u in await UserDAO.get_by_logins(db, list(by_login))}
+    taken_telegram = {u.telegram_id for u in await UserDAO.get_by_telegram_ids(db, list(seen_telegram))}
+    for row in rows:
+        if row["login"] in taken_logins:
+            error(row["line"], f"Пользователь с логином {row['login']} уже существует")
+        if row["telegram_id"] in taken_telegram:
+            error(row["line"], f"Пользователь с Telegram ID {row['telegram_id']} уже существует")
+
+    # Создатели: из БД (одним запросом) или строки выше в этом же файле
+    external = {row["created_by"] for row in rows if row["created_by"] and row["created_by"] not in by_login}
+    db_creators = {u.login: u for u in await UserDAO.get_by_logins(db, list(external))}
+    depth: dict[int, int] = {}
+
+    def level(row: dict, path: tuple = ()) -> Optional[int]:
+        """Глубина строки в иерархии файла: 0 — создатель уже в БД; None — цикл"""
+        if row["line"] in depth:
+            return depth[row["line"]]
+        creator = by_login.get(row["created_by"]) if row["created_by"] else None
+        if creator is None:
+            result = 0
+        elif creator["line"] in path or creator is row:
+            return None
+        else:
+            parent = level(creator, path + (row["line"],))
+            result = None if parent is None else parent + 1
+        if result is not None:
+            depth[row["line"]] = result
+        return result
+
+    for row in rows:
+        creator_login = row["created_by"]
+        if creator_login is None or creator_login == importer.login:
+            creator_role = importer.role
+        elif creator_login in by_login:
+            creator_role = by_login[creator_login]["role"]
+            if level(row) is None:
+                error(row["line"], "Цикл в колонке created_by")
+                continue
+        elif creator_login in db_creators:
+            creator = db_creators[creator_login]
+            creator_role = creator.role
+            if importer.role == UserRoleEnum.RESPONSIBLE:
+                error(row["line"], "Ответственный может импортировать только своих подчинённых")
+                continue
+        else:
+            error(row["line"], f"Создатель {creator_login} не найден")
+            continue
+        if not can_create(importer.role, row["role"]) or not can_create(creator_role, row["role"]):
+            error(row["line"], f"Недостаточно прав, чтобы завести пользователя с ролью {ROLE_NAMES[row['role']]}")
+
+    workgroup_ids = await _resolve_workgroups(
+        db, {name for row in rows for name in row["workgroups"]}, rows, "workgroups", error
+    )
+
+    report.errors.sort(key=lambda e: e.line)
+    if report.errors or dry_run:
+        return report
+
+    hashes = iter(await hash_passwords([row["password"] for row in rows if row["password"]]))
+    for row in rows:
+        row["password_hash"] = next(hashes) if row["password"] else None
+
+    # Вставка по уровням иерархии: ID создателя из файла известен к моменту вставки подчинённых
+    ids_by_login: dict[str, int] = {}
+    rows.sort(key=lambda r: depth.get(r["line"], 0))
+    for _, group in itertools.groupby(rows, key=lambda r: depth.get(r["line"], 0)):
+        group = list(group)
+        for start in range(0, len(group), IMPORT_CHUNK_SIZE):
+            chunk = group[start:start + IMPORT_CHUNK_SIZE]
+            values = []
+            for row in chunk:
+                creator = row["created_by"]
+                if creator is None or creator == importer.login:
+                    created_by_id = importer.id
+                elif creator in ids_by_login:
+                    created_by_id = ids_by_login[creator]
+                else:
+                    created_by_id = db_creators[creator].id
+                values.append({
+                    "login": row["login"], "password_hash": row["password_hash"], "role": row["role"],
+                    "full_name": row["full_name"], "username": row["username"], "telegram_id": row["telegram_id"],
+                    "timezone": row["timezone"], "created_by_id": created_by_id,
+                })
+            for row, user_id in zip(chunk, await UserDAO.bulk_create(db, values)):
+                row["id"] = user_id
+                if row["login"]:
+                    ids_by_login[row["login"]] = user_id
+
+    await WorkGroupDAO.add_memberships(
+        db, [(workgroup_ids[name][0], row["id"]) for row in rows for name in row["workgroups"]]
+    )
+    report.notifications_queued = await NotificationDAO.enqueue(db, [
+        {
+            "kind": "user_added", "telegram_id": row["telegram_id"], "user_id": row["id"],
+            "text": role_assigned_text(ROLE_NAMES[row["role"]], True, row["role"] in WEB_ROLES),
+        }
+        for row in rows if row["telegram_id"]
+    ])
+    report.created = len(rows)
+    return report
+
+
+async def import_tasks(db: AsyncSession, stream: IO[bytes], importer: User, dry_run: bool = False) -> ImportReport:
+    """Импорт задач из CSV; автор задач — importer"""
+    report = ImportReport(kind="tasks", dry_run=dry_run)
+
+    def error(line: int, message: str) -> None:
+        report.errors.append(ImportRowError(line=line, message=message))
+
+    rows: list[dict] = []
+    try:
+        for line, raw in await read_csv_rows(stream, TASK_COLUMNS):
+            report.total += 1
+            if not raw.get("title"):
+                error(line, "Не указано название задачи")
+                continue
+            status = _STATUSES.get((raw.get("status") or TaskStatusEnum.NEW.value).lower())
+            if status is None:
+                error(line, f"Неизвестный статус: {raw['status']}")
+                continue
+            due_date = None
+            if raw.get("due_date"):
+                try:
+                    due_date = datetime.fromisoformat(raw["due_date"])
+                except ValueError:
+                    error(line, f"Срок в формате 2026-05-01 или 2026-05-01 18:00: {raw['due_date']}")
+                    continue
+            interval = None
+            if raw.get("poll_interval_days"):
+                try:
+                    interval = int(raw["poll_interval_days"])
+                    if interval < 0:
+                        raise ValueError
+                except ValueError:
+                    error(line, f"poll_interval_days должен быть неотрицательным числом: {raw['poll_interval_days']}")
+                    continue
+            poll_time = raw.get("poll_time") or None
+            if poll_time and not _POLL_TIME.match(poll_time):
+                error(line, "poll_time должен быть в формате HH:MM (например 09:00)")
+                continue
+            rows.append({
+                "line": line, "title": raw["title"], "description": raw.get("description") or None,
+                "status": status, "due_date": due_date, "poll_interval_days": interval or None,
+                "poll_time": poll_time, "workgroup": [raw["workgroup"]] if raw.get("workgroup") else [],
+                "assignees": _split(raw.get("assignees", "")),
+            })
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        error(1, f"Не удалось разобрать CSV: {e}")
+        return report
+
+    workgroup_ids = await _resolve_workgroups(
+        db, {name for row in rows for name in row["workgroup"]}, rows, "workgroup", error
+    )
+    # Проект задачи — как в api.tasks._check_project: проект группы, иначе текущий (X-Project-Id)
+    scope = current_project.get()
+    for row in rows:
+        group = workgroup_ids.get(row["workgroup"][0]) if row["workgroup"] else None
+        row["workgroup_id"], row["project_id"] = group or (None, None)
+        row["project_id"] = row["project_id"] or scope
+        if scope is not None and row["project_id"] != scope:
+            error(row["line"], f"Рабочая группа «{row['workgroup'][0]}» относится к другому проекту")
+    # Исполнители: числа — Telegram ID, остальное — логины; по запросу на вид
+    tokens = {token for row in rows for token in row["assignees"]}
+    by_token: dict[str, User] = {u.login: u for u in await UserDAO.get_by_logins(
+        db, [t for t in tokens if not t.isdigit()]
+    )}
+    by_token |= {str(u.telegram_id): u for u in await UserDAO.get_by_telegram_ids(
+        db, [int(t) for t in tokens if t.isdigit()]
+    )}
+    for row in rows:
+        for token in row["assignees"]:
+            if token not in by_token:
+                error(row["line"], f"Исполнитель {token} не найден")
+
+    report.errors.sort(key=lambda e: e.line)
+    if report.errors or dry_run:
+        return report
+
+    now = datetime.utcnow()
+    notifications = []
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        chunk = rows[start:start + IMPORT_CHUNK_SIZE]
+        assignees = [[by_token[token] for token in row["assignees"]] for row in chunk]
+        task_ids = await TaskDAO.bulk_create(
+            db,
+            [
+                {
+                    "title": row["title"], "description": row["description"], "status": row["status"],
+                    "workgroup_id": row["workgroup_id"], "project_id": row["project_id"],
+                    "created_by_id": importer.id, "due_date": row["due_date"],
+                    "completed_at": now if row["status"] == TaskStatusEnum.DONE else None,
+                    "poll_interval_days": row["poll_interval_days"], "poll_time": row["poll_time"],
+                    "created_at": now, "updated_at": now,
+                }
+                for row in chunk
+            ],
+            [[user.id for user in users] for users in assignees],
+        )
+        for task_id, row, users in zip(task_ids, chunk, assignees):
+            notifications.extend(
+                {
+                    "kind": "task_assigned", "telegram_id": user.telegram_id, "user_id": user.id,
+                    "task_id": task_id, "text": task_assigned_text(row["title"], row["description"]),
+                }
+                for user in {u.id: u for u in users}.values() if user.telegram_id
+            )
+    report.notifications_queued = await NotificationDAO.enqueue(db, notifications)
+    report.created = len(rows)
+    return report
+
+
+async def _run_cli(kind: str, path: str, importer_login: str, dry_run: bool) -> ImportReport:
+    from database import init_db
+    from database.database import AsyncSessionLocal
+    await init_db()
+    try:
+        async with AsyncSessionLocal() as db:
+            importer = await UserDAO.get_by_login(db, importer_login)
+            if importer is None or importer.role not in WEB_ROLES:
+                raise SystemExit(f"Пользователь {importer_login} не найден или не может импортировать")
+            with open(path, "rb") as f:
+                run = import_users if kind == "users" else import_tasks
+                report = await run(db, f, importer, dry_run=dry_run)
+            if report.created:
+                await db.commit()
+    finally:
+        shutdown_hash_pool()
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Импорт пользователей или задач из CSV")
+    parser.add_argument("kind", choices=["users", "tasks"])
+    parser.add_argument("path", help="CSV-файл (UTF-8, разделитель , или ;)")
+    parser.add_argument("--as", dest="importer", required=True, help="логин, от имени которого импортировать")
+    parser.add_argument("--dry-run", action="store_true", help="только проверить файл")
+    args = parser.parse_args()
+    result = asyncio.run(_run_cli(args.kind, args.path, args.importer, args.dry_run))
+    print(result.model_dump_json(indent=2))
+    if result.errors:
+        raise SystemExit(1)
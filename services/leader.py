@@ -0,0 +1,64 @@
+"""Выбор лидера через аренду в БД: фоновую роль выполняет ровно один процесс"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable
+
+from config import WORKER_LEASE_TTL_SECONDS
+from database.database import AsyncSessionLocal
+from dao.lease_dao import LeaseDAO
+
+logger = logging.getLogger(__name__)
+
+
+def _holder_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def _try_acquire(name: str, holder: str, ttl: float) -> bool:
+    try:
+        async with AsyncSessionLocal() as db:
+            return await LeaseDAO.try_acquire(db, name, holder, ttl)
+    except Exception as e:
+        logger.warning("Не удалось продлить аренду %s: %s", name, e)
+        return False
+
+
+async def run_as_leader(
+    name: str,
+    target: Callable[[], Awaitable[None]],
+    ttl: float = WORKER_LEASE_TTL_SECONDS,
+) -> None:
+    """Запускать target(), только пока этот процесс держит аренду name.
+    Аренда продлевается каждые ttl/3 секунд; потеряли — target() отменяется, процесс
+    переходит в резерв и ждёт, пока аренда освободится или истечёт."""
+    holder = _holder_id()
+    renew_every = ttl / 3
+    try:
+        while True:
+            if not await _try_acquire(name, holder, ttl):
+                await asyncio.sleep(renew_every)
+                continue
+            logger.info("Роль %s: этот процесс — лидер (%s)", name, holder)
+            task = asyncio.create_task(target())
+            try:
+                while True:
+                    done, _ = await asyncio.wait({task}, timeout=renew_every)
+                    if done:
+                        task.result()  # пробросить исключение, если цикл упал
+                        return
+                    if not await _try_acquire(name, holder, ttl):
+                        logger.warning("Роль %s: аренда потеряна, переходим в резерв", name)
+                        break
+            finally:
+                if not task.done():
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+    finally:
+        try:
+            async with AsyncSessionLocal() as db:
+                await LeaseDAO.release(db, name, holder)
+        except Exception as e:
+            logger.warning("Не удалось освободить аренду %s: %s", name, e)
@@ -0,0 +1,69 @@
+"""Измерение задержки event loop и сторож, снимающий стек блокирующего кода.
+
+Корутина event_loop_lag_loop просыпается каждые interval секунд и пишет опоздание в метрику.
+Параллельно поток-сторож следит за тем, когда корутина должна была проснуться: если опоздание
+превысило LOOP_LAG_THRESHOLD_MS, значит loop чем-то занят — сторож снимает стек потока loop
+и пишет его в лог (один раз на эпизод блокировки).
+"""
+import asyncio
+import logging
+import threading
+import time
+
+from config import LOOP_LAG_THRESHOLD_MS
+from utils.metrics import EVENT_LOOP_LAG, EVENT_LOOP_BLOCKED
+from utils.profiling import thread_stack, format_stack
+
+logger = logging.getLogger(__name__)
+
+
+class LoopWatchdog:
+    """Поток, который замечает зависание event loop и снимает его стек"""
+
+    def __init__(self, loop_thread_id: int, threshold: float):
+        self.loop_thread_id = loop_thread_id
+        self.threshold = threshold
+        self.expected_wakeup = time.monotonic()  # обновляется корутиной из потока loop
+        self._reported = False
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def beat(self, expected_wakeup: float) -> None:
+        """Вызывается корутиной после каждого пробуждения"""
+        if self._reported:
+            lag = time.monotonic() - self.expected_wakeup
+            logger.warning("Event loop снова отвечает, блокировка длилась ~%.0f мс", lag * 1000)
+            self._reported = False
+        self.expected_wakeup = expected_wakeup
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.threshold / 2)
+            lag = time.monotonic() - self.expected_wakeup
+            if lag <= self.threshold or self._reported:
+                continue
+            self._reported = True
+            EVENT_LOOP_BLOCKED.inc()
+            logger.warning(
+                "Event loop заблокирован уже %.0f мс, стек:\n%s",
+                lag * 1000,
+                format_stack(thread_stack(self.loop_thread_id)),
+            )
+
+
+async def event_loop_lag_loop(interval: float = 0.5) -> None:
+    """Фоновый цикл: засыпает на interval и пишет опоздание пробуждения в event_loop_lag_seconds"""
+    loop = asyncio.get_running_loop()
+    watchdog = None
+    if LOOP_LAG_THRESHOLD_MS > 0:
+        watchdog = LoopWatchdog(threading.get_ident(), LOOP_LAG_THRESHOLD_MS / 1000)
+        watchdog.beat(time.monotonic() + interval)
+        watchdog.start()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(loop.time() - expected, 0.0))
+        if watchdog is not None:
+            watchdog.beat(time.monotonic() + interval)
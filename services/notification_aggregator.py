@@ -0,0 +1,100 @@
+"""Слияние уведомлений о назначениях и ролях до отправки (notification_outbox).
+
+Событие не уходит в Telegram сразу: сообщение ждёт в очереди NOTIFY_DEBOUNCE_SECONDS.
+Следующее событие по той же паре (пользователь, задача) — или по роли пользователя — переписывает
+ждущее сообщение вместо нового: текст по последнему состоянию, отправка сдвигается ещё на окно,
+но не дальше NOTIFY_DEBOUNCE_MAX_SECONDS от первого события. Снятие с задачи или её удаление до
+отправки убирает сообщение о назначении. Три правки задачи за минуту — одно сообщение или ни одного.
+Запись идёт в сессии вызывающего и коммитится вместе с изменением, которое её вызвало.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import NOTIFY_DEBOUNCE_MAX_SECONDS, NOTIFY_DEBOUNCE_SECONDS
+from database.models import NotificationOutbox, User
+from dao.notification_dao import NotificationDAO
+from services.telegram_notify import ROLE_NAMES, WEB_ROLES, role_assigned_text, task_assigned_text
+from utils.metrics import NOTIFICATIONS_COALESCED
+
+_TASK_KINDS = ("task_assigned",)
+_ROLE_KINDS = ("user_added", "role_assigned")
+
+
+async def _merge_or_enqueue(
+    session: AsyncSession, messages: List[dict], pending: dict[int, NotificationOutbox]
+) -> int:
+    """Переписать ждущие сообщения тех же пользователей, остальные поставить в очередь.
+    Возвращает число новых сообщений."""
+    now = datetime.utcnow()
+    fresh = []
+    for message in messages:
+        item = pending.get(message["user_id"])
+        if item is not None:
+            send_at = min(
+                now + timedelta(seconds=NOTIFY_DEBOUNCE_SECONDS),
+                item.created_at + timedelta(seconds=NOTIFY_DEBOUNCE_MAX_SECONDS),
+            )
+            if await NotificationDAO.replace_pending(session, item.id, {**message, "next_attempt_at": send_at}):
+                NOTIFICATIONS_COALESCED.inc("merged")
+                continue
+        fresh.append(message)
+    return await NotificationDAO.enqueue(session, fresh, delay_seconds=NOTIFY_DEBOUNCE_SECONDS)
+
+
+async def task_assigned(
+    session: AsyncSession, task_id: int, title: str, description: Optional[str], users: Iterable[User]
+) -> int:
+    """Пользователей назначили на задачу. Возвращает число новых сообщений."""
+    messages = [
+        {
+            "kind": "task_assigned", "telegram_id": user.telegram_id, "user_id": user.id,
+            "task_id": task_id, "text": task_assigned_text(title, description or ""),
+        }
+        for user in users if user.telegram_id
+    ]
+    if not messages:
+        return 0
+    pending = await NotificationDAO.get_pending(session, [m["user_id"] for m in messages], task_id, _TASK_KINDS)
+    return await _merge_or_enqueue(session, messages, pending)
+
+
+async def task_unassigned(session: AsyncSession, task_id: int, user_ids: Iterable[int]) -> int:
+    """Пользователей сняли с задачи (или задачу удалили): неотправленное назначение больше не нужно"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    dropped = await NotificationDAO.cancel_pending(session, user_ids, task_id, _TASK_KINDS)
+    if dropped:
+        NOTIFICATIONS_COALESCED.inc("dropped", amount=dropped)
+    return dropped
+
+
+async def task_changed(
+    session: AsyncSession, task_id: int, user_ids: Iterable[int], title: str, description: Optional[str]
+) -> None:
+    """Название или описание задачи изменилось: ждущие назначения уйдут уже с новым текстом.
+    Исполнителям, которым назначение отправлено, правка новых сообщений не добавляет."""
+    pending = await NotificationDAO.get_pending(session, user_ids, task_id, _TASK_KINDS)
+    text = task_assigned_text(title, description or "")
+    for item in pending.values():
+        if item.text != text and await NotificationDAO.replace_pending(session, item.id, {"text": text}):
+            NOTIFICATIONS_COALESCED.inc("merged")
+
+
+async def role_assigned(session: AsyncSession, user: User, is_new: bool = False) -> int:
+    """Пользователя добавили в систему (is_new) или сменили ему роль. Несколько смен подряд —
+    одно сообщение с последней ролью; смена роли сразу после добавления — одно приветствие."""
+    if not user.telegram_id:
+        return 0
+    pending = await NotificationDAO.get_pending(session, [user.id], None, _ROLE_KINDS)
+    item = pending.get(user.id)
+    is_new = is_new or (item is not None and item.kind == "user_added")
+    message = {
+        "kind": "user_added" if is_new else "role_assigned",
+        "telegram_id": user.telegram_id,
+        "user_id": user.id,
+        "text": role_assigned_text(ROLE_NAMES.get(user.role, str(user.role)), is_new, user.role in WEB_ROLES),
+    }
+    return await _merge_or_enqueue(session, [message], pending)
@@ -0,0 +1,78 @@
+"""Отправитель очереди уведомлений (notification_outbox).
+
+Массовые операции (импорт, назначения) коммитят сообщения в очередь вместе с данными; этот
+цикл разбирает её пачками и шлёт не чаще NOTIFY_RATE_PER_SECOND сообщений в секунду —
+Telegram отвечает 429 при превышении ~30 сообщений в секунду от бота.
+Неудачные отправки повторяются с растущей задержкой, как у очереди опросов.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from config import (
+    NOTIFY_RATE_PER_SECOND, OUTBOX_BATCH_SIZE, OUTBOX_CLAIM_TIMEOUT_SECONDS, OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL_SECONDS,
+)
+from database.database import AsyncSessionLocal
+from dao.notification_dao import NotificationDAO
+from services.telegram_notify import send_telegram_message
+from utils.metrics import NOTIFICATION_DELIVERIES
+
+logger = logging.getLogger(__name__)
+
+_wakeup = asyncio.Event()
+
+
+def wake_notifier() -> None:
+    """Разбудить отправителя уведомлений в этом процессе (после коммита новых сообщений)"""
+    _wakeup.set()
+
+
+async def drain_notifications(limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """Отправить одну пачку уведомлений с ограничением скорости. Возвращает размер пачки."""
+    async with AsyncSessionLocal() as db:
+        items = await NotificationDAO.claim_batch(db, datetime.utcnow(), limit, OUTBOX_CLAIM_TIMEOUT_SECONDS)
+        await db.commit()
+
+    interval = 1.0 / NOTIFY_RATE_PER_SECOND if NOTIFY_RATE_PER_SECOND > 0 else 0.0
+    next_send = time.monotonic()
+    for item in items:
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        next_send = max(next_send, time.monotonic()) + interval
+        try:
+            ok = await send_telegram_message(item.telegram_id, item.text)
+            error = "" if ok else "Telegram API не принял сообщение"
+        except Exception as e:
+            ok, error = False, str(e)
+        async with AsyncSessionLocal() as db:
+            if ok:
+                await NotificationDAO.mark_sent(db, item, datetime.utcnow())
+                NOTIFICATION_DELIVERIES.inc("sent")
+            elif await NotificationDAO.mark_failed(db, item, error, datetime.utcnow(), OUTBOX_MAX_ATTEMPTS):
+                NOTIFICATION_DELIVERIES.inc("retry")
+            else:
+                NOTIFICATION_DELIVERIES.inc("failed")
+                logger.warning("Уведомление %s (%s) не доставлено после %d попыток: %s",
+                               item.id, item.kind, item.attempts, error)
+            await db.commit()
+    return len(items)
+
+
+async def notification_sender_loop() -> None:
+    """Фоновый цикл: разбирает очередь, пока она не пуста, потом ждёт пробуждения"""
+    while True:
+        try:
+            sent = await drain_notifications()
+        except Exception as e:
+            logger.exception("Ошибка отправки очереди уведомлений: %s", e)
+            sent = 0
+        if sent >= OUTBOX_BATCH_SIZE:
+            continue
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,107 @@
+"""Отправитель очереди опросов (poll_outbox).
+
+Планировщик и «тык» только коммитят намерения отправить опрос — быстро и одной транзакцией.
+Этот цикл забирает их пачками, отправляет в Telegram и отмечает результат короткими
+транзакциями на каждую запись; неудачи повторяются с экспоненциальной задержкой.
+Несколько опросов одному получателю в пачке уходят одним сообщением-сводкой (POLL_DIGEST).
+Запись помечается sending до отправки, поэтому повтор после падения процесса возможен только
+для сообщений, отправленных в последние OUTBOX_CLAIM_TIMEOUT_SECONDS перед падением.
+"""
+import asyncio
+import logging
+from datetime import datetime
+
+from config import (
+    OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS, OUTBOX_CLAIM_TIMEOUT_SECONDS, OUTBOX_POLL_INTERVAL_SECONDS,
+    POLL_DIGEST, POLL_DIGEST_MAX_TASKS,
+)
+from database.database import AsyncSessionLocal
+from database.models import PollOutbox
+from dao.outbox_dao import OutboxDAO
+from services.telegram_notify import notify_task_poll, notify_task_poll_digest
+from utils.metrics import OUTBOX_DELIVERIES, OUTBOX_MESSAGES
+
+logger = logging.getLogger(__name__)
+
+_wakeup = asyncio.Event()
+
+
+def wake_sender() -> None:
+    """Разбудить отправителя в этом процессе (после коммита новых опросов)"""
+    _wakeup.set()
+
+
+def _plan_messages(items: list[PollOutbox]) -> list[list[PollOutbox]]:
+    """Разбить пачку на сообщения: по получателю, не больше POLL_DIGEST_MAX_TASKS задач в сводке.
+    Без POLL_DIGEST — по сообщению на запись."""
+    if not POLL_DIGEST:
+        return [[item] for item in items]
+    by_recipient: dict[int, list[PollOutbox]] = {}
+    for item in items:
+        by_recipient.setdefault(item.telegram_id, []).append(item)
+    messages = []
+    for group in by_recipient.values():
+        chunk, task_ids = [], set()
+        for item in group:
+            if item.task_id not in task_ids and len(task_ids) >= POLL_DIGEST_MAX_TASKS:
+                messages.append(chunk)
+                chunk, task_ids = [], set()
+            chunk.append(item)
+            task_ids.add(item.task_id)
+        messages.append(chunk)
+    return messages
+
+
+async def _send(message: list[PollOutbox]) -> bool:
+    first = message[0]
+    tasks = list({item.task_id: item.task.title for item in message}.items())
+    if len(tasks) == 1:
+        OUTBOX_MESSAGES.inc("single")
+        return await notify_task_poll(first.telegram_id, first.task.title, first.task_id)
+    OUTBOX_MESSAGES.inc("digest")
+    return await notify_task_poll_digest(first.telegram_id, tasks)
+
+
+async def drain_outbox(limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """Отправить одну пачку опросов. Возвращает размер пачки."""
+    async with AsyncSessionLocal() as db:
+        items = await OutboxDAO.claim_batch(db, datetime.utcnow(), limit, OUTBOX_CLAIM_TIMEOUT_SECONDS)
+        await db.commit()
+
+    for message in _plan_messages(items):
+        try:
+            ok = await _send(message)
+            error = "" if ok else "Telegram API не принял сообщение"
+        except Exception as e:
+            ok, error = False, str(e)
+        async with AsyncSessionLocal() as db:
+            for item in message:
+                if ok:
+                    await OutboxDAO.mark_sent(db, item, datetime.utcnow())
+                    OUTBOX_DELIVERIES.inc("sent")
+                elif await OutboxDAO.mark_failed(db, item, error, datetime.utcnow(), OUTBOX_MAX_ATTEMPTS):
+                    OUTBOX_DELIVERIES.inc("retry")
+                else:
+                    OUTBOX_DELIVERIES.inc("failed")
+                    logger.warning(
+                        "Опрос %s не доставлен после %d попыток: %s", item.idempotency_key, item.attempts, error
+                    )
+            await db.commit()
+    return len(items)
+
+
+async def outbox_sender_loop() -> None:
+    """Фоновый цикл отправителя: разбирает очередь, пока она не пуста, потом ждёт пробуждения"""
+    while True:
+        try:
+            sent = await drain_outbox()
+        except Exception as e:
+            logger.exception("Ошибка отправки очереди опросов: %s", e)
+            sent = 0
+        if sent >= OUTBOX_BATCH_SIZE:
+            continue
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -1,12 +1,30 @@
-"""Планировщик опросов о задачах — отправка напоминаний в Telegram по расписанию"""
+"""Планировщик опросов о задачах — постановка напоминаний в очередь отправки по расписанию.
+
+poll_time задачи — местное время пояса её рабочей группы (иначе автора, иначе DEFAULT_TIMEZONE).
+Ближайшие моменты опроса держатся в куче в памяти: при старте она строится из БД, затем раз в
+POLL_RESYNC_SECONDS подтягиваются изменённые задачи (по индексу updated_at). Между этим цикл
+спит ровно до ближайшего опроса. Слот, пропущенный не больше чем на POLL_CATCHUP_WINDOW_MINUTES
+(воркер лежал, loop был занят), досылается; более старый — пропускается до следующего.
+"""
 import asyncio
+import heapq
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, time as dt_time
+from typing import Optional
+
+from config import POLL_CATCHUP_WINDOW_MINUTES, POLL_RESYNC_SECONDS
 from database.database import AsyncSessionLocal
-from database.models import Task, TaskStatusEnum, TaskPollResponse
-from dao.task_dao import TaskDAO
-from dao.user_dao import UserDAO
-from services.telegram_notify import notify_task_poll
+from dao.task_dao import TaskDAO, OPEN_STATUSES
+from dao.outbox_dao import OutboxDAO
+from services.archiver import archive_loop
+from services.deadlines import deadline_loop
+from services.notification_outbox import notification_sender_loop
+from services.poll_outbox import outbox_sender_loop, wake_sender
+from utils.metrics import (
+    SCHEDULER_TICK_DURATION, SCHEDULER_TASKS_DUE, SCHEDULER_POLLS_QUEUED, SCHEDULER_SCHEDULED_TASKS,
+)
+from utils.timezones import get_zone, to_local, to_utc_naive
 
 logger = logging.getLogger(__name__)
 
@@ -17,64 +35,169 @@ def _parse_time(s: str) -> tuple[int, int] | None:
         return None
     try:
         parts = s.strip().split(":")
-        return int(parts[0]), int(parts[1])
+        hour, minute = int(parts[0]), int(parts[1])
     except (ValueError, IndexError):
         return None
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return None
+    return hour, minute
+
+
+def next_poll_at(
+    poll_time: str,
+    interval_days: int,
+    ref: datetime,
+    timezone_name: Optional[str],
+    not_before: Optional[datetime] = None,
+) -> Optional[datetime]:
+    """Следующий слот опроса (наивное UTC): poll_time по местному времени, через interval_days
+    дней после местной даты ref. Если задан not_before, слоты раньше него пропускаются
+    с шагом interval_days."""
+    parsed = _parse_time(poll_time)
+    if not parsed or not interval_days or interval_days <= 0:
+        return None
+    zone = get_zone(timezone_name)
+    day = to_local(ref, zone).date() + timedelta(days=interval_days)
+    if not_before is not None:
+        behind = (to_local(not_before, zone).date() - day).days
+        if behind > 0:
+            day += timedelta(days=-(-behind // interval_days) * interval_days)
+    slot = to_utc_naive(datetime.combine(day, dt_time(*parsed), tzinfo=zone))
+    if not_before is not None and slot < not_before:
+        slot = to_utc_naive(datetime.combine(day + timedelta(days=interval_days), dt_time(*parsed), tzinfo=zone))
+    return slot
+
+
+def _slot_for(row, now: datetime) -> Optional[datetime]:
+    """Слот для строки расписания (TaskDAO.get_poll_schedule или Task) с учётом окна досылки"""
+    if row.status not in OPEN_STATUSES:
+        return None
+    return next_poll_at(
+        row.poll_time,
+        row.poll_interval_days,
+        row.last_polled_at or row.created_at,
+        row.timezone,
+        not_before=now - timedelta(minutes=POLL_CATCHUP_WINDOW_MINUTES),
+    )
+
+
+class PollSchedule:
+    """Куча (время опроса, id задачи) с ленивым удалением: актуальное время — в self._due"""
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, int]] = []
+        self._due: dict[int, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def set(self, task_id: int, fire_at: Optional[datetime]) -> None:
+        if fire_at is None:
+            self._due.pop(task_id, None)
+            return
+        if self._due.get(task_id) == fire_at:
+            return
+        self._due[task_id] = fire_at
+        heapq.heappush(self._heap, (fire_at, task_id))
+
+    def next_fire_at(self) -> Optional[datetime]:
+        while self._heap:
+            fire_at, task_id = self._heap[0]
+            if self._due.get(task_id) == fire_at:
+                return fire_at
+            heapq.heappop(self._heap)  # устаревшая запись
+        return None
+
+    def pop_due(self, now: datetime) -> list[int]:
+        task_ids = []
+        while (fire_at := self.next_fire_at()) is not None and fire_at <= now:
+            _, task_id = heapq.heappop(self._heap)
+            del self._due[task_id]
+            task_ids.append(task_id)
+        return task_ids
 
 
-async def _run_poll_check():
-    """Проверить задачи и отправить опросы тем, кому пора"""
+async def _sync_schedule(schedule: PollSchedule, changed_since: Optional[datetime]) -> None:
+    """Загрузить расписание из БД целиком (changed_since=None) или только изменения"""
     now = datetime.utcnow()
-    current_hour, current_min = now.hour, now.minute
+    async with AsyncSessionLocal() as db:
+        rows = await TaskDAO.get_poll_schedule(db, changed_since)
+    for row in rows:
+        schedule.set(row.id, _slot_for(row, now))
+    SCHEDULER_SCHEDULED_TASKS.set(len(schedule))
 
+
+async def _dispatch_due(schedule: PollSchedule, task_ids: list[int]) -> None:
+    """Поставить в очередь опросы по наступившим слотам.
+    Слот перепроверяется по свежим данным задачи; намерения и last_polled_at коммитятся
+    одной короткой транзакцией без сетевых вызовов."""
+    now = datetime.utcnow()
+    intents = []
+    due = 0
     async with AsyncSessionLocal() as db:
-        try:
-            tasks = await TaskDAO.get_all(db, skip=0, limit=500)
-        except Exception as e:
-            logger.warning("Не удалось загрузить задачи для опроса: %s", e)
-            return
+        rows = {row.id: row for row in await TaskDAO.get_poll_schedule(db, task_ids=task_ids)}
+        tasks = await TaskDAO.get_by_ids_for_poll(db, list(rows))
         for task in tasks:
-            if not task.poll_interval_days or not task.poll_time:
-                continue
-            if task.status in (TaskStatusEnum.DONE, TaskStatusEnum.CANCELLED):
+            row = rows[task.id]
+            slot = _slot_for(row, now)
+            if slot is None or slot > now:
+                schedule.set(task.id, slot)  # задачу изменили: слот сдвинулся или опрос выключен
                 continue
-            parsed = _parse_time(task.poll_time)
-            if not parsed:
-                continue
-            poll_hour, poll_min = parsed
-            if current_hour != poll_hour or current_min != poll_min:
-                continue
-
-            # Проверяем, прошло ли poll_interval_days с last_polled_at или created_at
-            ref = task.last_polled_at or task.created_at
-            if now - ref < timedelta(days=task.poll_interval_days):
-                continue
-
-            # Отправляем опрос всем исполнителям с telegram_id и создаём запись об опросе
+            due += 1
+            # Опрос всем исполнителям с telegram_id; запись об опросе появится после доставки
             for user in task.assignees:
                 if user.telegram_id:
-                    try:
-                        await notify_task_poll(user.telegram_id, task.title, task.id)
-                        poll_rec = TaskPollResponse(
-                            task_id=task.id,
-                            user_id=user.id,
-                            polled_at=now,
-                            response_text=None,
-                            status_at_poll=task.status.value if task.status else None,
-                        )
-                        db.add(poll_rec)
-                    except Exception as e:
-                        logger.exception("Ошибка отправки опроса: %s", e)
-
-            task.last_polled_at = now
+                    intents.append({
+                        "idempotency_key": OutboxDAO.poll_key("poll", task.id, user.id, slot),
+                        "task_id": task.id,
+                        "user_id": user.id,
+                        "telegram_id": user.telegram_id,
+                        "polled_at": now,
+                        "status_at_poll": task.status.value if task.status else None,
+                    })
+            # Следующий слот считается от этого, а не от фактического времени отправки
+            task.last_polled_at = slot
+            schedule.set(task.id, next_poll_at(row.poll_time, row.poll_interval_days, slot, row.timezone, now))
+        queued = await OutboxDAO.enqueue_polls(db, intents)
         await db.commit()
+    SCHEDULER_TASKS_DUE.set(due)
+    SCHEDULER_POLLS_QUEUED.inc(amount=queued)
+    if queued:
+        wake_sender()
 
 
 async def poll_scheduler_loop():
-    """Фоновый цикл: каждую минуту проверяет, нужно ли отправить опросы"""
+    """Фоновый цикл: спит до ближайшего опроса (или до подгрузки изменений) и рассылает наступившие"""
+    schedule = PollSchedule()
+    synced_at: Optional[datetime] = None
+    next_sync = 0.0
     while True:
+        started = time.perf_counter()
         try:
-            await _run_poll_check()
+            if time.monotonic() >= next_sync:
+                # Небольшой запас назад — на случай расхождения часов между процессами
+                since = synced_at - timedelta(seconds=5) if synced_at else None
+                synced_at = datetime.utcnow()
+                await _sync_schedule(schedule, since)
+                next_sync = time.monotonic() + POLL_RESYNC_SECONDS
+            task_ids = schedule.pop_due(datetime.utcnow())
+            if task_ids:
+                await _dispatch_due(schedule, task_ids)
         except Exception as e:
             logger.exception("Ошибка в планировщике опросов: %s", e)
-        await asyncio.sleep(60)
+            synced_at = None  # после ошибки перестроить расписание целиком
+            next_sync = time.monotonic() + 5
+        SCHEDULER_TICK_DURATION.observe(time.perf_counter() - started)
+
+        fire_at = schedule.next_fire_at()
+        sleep_for = next_sync - time.monotonic()
+        if fire_at is not None:
+            sleep_for = min(sleep_for, (fire_at - datetime.utcnow()).total_seconds())
+        await asyncio.sleep(max(sleep_for, 0.0))
+
+
+async def scheduler_worker():
+    """Роль scheduler: планировщик опросов, напоминания о сроках, отправители очередей и архивация"""
+    await asyncio.gather(
+        poll_scheduler_loop(), deadline_loop(), outbox_sender_loop(), notification_sender_loop(), archive_loop()
+    )
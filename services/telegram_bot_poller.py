@@ -1,16 +1,16 @@
 """Обработка обновлений Telegram-бота: кнопка «Ответить» на опросе и сохранение ответа."""
 import asyncio
 import logging
+import time
 from typing import Optional
 
 import httpx
-from sqlalchemy import select
 
 from config import TELEGRAM_BOT_TOKEN
 from database.database import AsyncSessionLocal
-from database.models import TaskPollResponse, TaskStatusEnum
 from dao.user_dao import UserDAO
 from dao.task_dao import TaskDAO
+from utils.metrics import BOT_UPDATE_LAG, TELEGRAM_SEND_DURATION, TELEGRAM_SEND_ERRORS
 
 logger = logging.getLogger(__name__)
 
@@ -41,32 +41,11 @@ def _reply_keyboard_choose(task_id: int) -> dict:
 async def _save_poll_response(telegram_id: int, task_id: int, response_text: str) -> bool:
     """Сохранить ответ на опрос в БД по telegram_id и task_id."""
     async with AsyncSessionLocal() as db:
-        user = await UserDAO.get_by_telegram_id(db, telegram_id)
-        if not user:
+        user_id = await UserDAO.get_id_by_telegram_id_cached(db, telegram_id)
+        if user_id is None:
             return False
-        result = await db.execute(
-            select(TaskPollResponse)
-            .where(
-                TaskPollResponse.task_id == task_id,
-                TaskPollResponse.user_id == user.id,
-                TaskPollResponse.response_text.is_(None),
-            )
-            .order_by(TaskPollResponse.polled_at.desc())
-            .limit(1)
-        )
-        rec = result.scalar_one_or_none()
-        if rec:
-            rec.response_text = (response_text or "").strip() or None
-            # Продвинуть статус задачи вправо по этапу при ответе в боте
-            task = await TaskDAO.get_by_id(db, task_id)
-            if task and task.status not in (TaskStatusEnum.DONE, TaskStatusEnum.CANCELLED):
-                next_status = {
-                    TaskStatusEnum.NEW: TaskStatusEnum.IN_PROGRESS,
-                    TaskStatusEnum.IN_PROGRESS: TaskStatusEnum.REVIEW,
-                    TaskStatusEnum.REVIEW: TaskStatusEnum.DONE,
-                }.get(task.status)
-                if next_status:
-                    task.status = next_status
+        # Продвинуть статус задачи вправо по этапу при ответе в боте
+        if await TaskDAO.save_poll_answer(db, task_id, user_id, response_text):
             await db.commit()
             return True
     return False
@@ -77,21 +56,29 @@ async def _bot_request(method: str, request_timeout: float = 15.0, **kwargs) ->
     if not TELEGRAM_BOT_TOKEN:
         return None
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/{method}"
+    started = time.perf_counter()
     try:
         async with httpx.AsyncClient() as client:
             r = await client.post(url, json=kwargs, timeout=request_timeout)
             if r.status_code != 200:
                 logger.warning("Telegram API %s: %s %s", method, r.status_code, r.text)
+                TELEGRAM_SEND_ERRORS.inc(method)
                 return None
             return r.json()
     except httpx.ReadTimeout:
         # Ожидаемо для getUpdates при long polling — просто повторяем запрос
         if method != "getUpdates":
             logger.warning("Telegram API %s: ReadTimeout", method)
+            TELEGRAM_SEND_ERRORS.inc(method)
         return None
     except Exception as e:
         logger.exception("Telegram API %s: %s", method, e)
+        TELEGRAM_SEND_ERRORS.inc(method)
         return None
+    finally:
+        # getUpdates висит до 30 с по протоколу long polling — его время не показательно
+        if method != "getUpdates":
+            TELEGRAM_SEND_DURATION.observe(time.perf_counter() - started, method)
 
 
 async def _send_message(chat_id: int, text: str, reply_markup: Optional[dict] = None) -> bool:
@@ -191,6 +178,9 @@ async def _process_updates(updates: list) -> int:
 
         if "message" in upd:
             msg = upd["message"]
+            if msg.get("date"):
+                # У callback_query нет своей даты (только у исходного сообщения), поэтому лаг — по сообщениям
+                BOT_UPDATE_LAG.observe(max(time.time() - msg["date"], 0.0))
             chat_id = msg.get("chat", {}).get("id")
             from_user = msg.get("from") or {}
             from_id = from_user.get("id")
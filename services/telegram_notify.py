@@ -1,9 +1,12 @@
 """Сервис уведомлений в Telegram"""
+import html
 import logging
+import time
 from typing import Optional
 
 from config import TELEGRAM_BOT_TOKEN
 from database.models import UserRoleEnum
+from utils.metrics import TELEGRAM_SEND_DURATION, TELEGRAM_SEND_ERRORS
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +16,8 @@ ROLE_NAMES = {
     UserRoleEnum.RESPONSIBLE: "Ответственный",
     UserRoleEnum.WORKER: "Работник",
 }
+# Роли с доступом к веб-интерфейсу (остальные работают только через бота)
+WEB_ROLES = (UserRoleEnum.PROJECT_MANAGER, UserRoleEnum.MAIN_ORGANIZER, UserRoleEnum.RESPONSIBLE)
 
 
 async def send_telegram_message(telegram_id: int, text: str, reply_markup: Optional[dict] = None) -> bool:
@@ -20,6 +25,7 @@ async def send_telegram_message(telegram_id: int, text: str, reply_markup: Optio
     if not TELEGRAM_BOT_TOKEN:
         logger.warning("TELEGRAM_BOT_TOKEN не задан, уведомление не отправлено")
         return False
+    started = time.perf_counter()
     try:
         import httpx
         url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
@@ -39,18 +45,19 @@ async def send_telegram_message(telegram_id: int, text: str, reply_markup: Optio
                 except Exception:
                     desc = resp.text
                 logger.warning("Telegram API error %s: %s", resp.status_code, desc)
+                TELEGRAM_SEND_ERRORS.inc("sendMessage")
                 return False
             return True
     except Exception as e:
         logger.exception("Ошибка отправки в Telegram: %s", e)
+        TELEGRAM_SEND_ERRORS.inc("sendMessage")
         return False
+    finally:
+        TELEGRAM_SEND_DURATION.observe(time.perf_counter() - started, "sendMessage")
 
 
-async def notify_role_assigned(telegram_id: int, role_name: str, is_new: bool = False, has_web_access: bool = False):
-    """Уведомить пользователя о назначении роли"""
-    if not telegram_id:
-        logger.debug("notify_role_assigned: пропуск, telegram_id пустой")
-        return
+def role_assigned_text(role_name: str, is_new: bool = False, has_web_access: bool = False) -> str:
+    """Текст уведомления о назначении роли"""
     if is_new:
         text = f"🎉 Вас добавили в систему!\n\nВаша роль: <b>{role_name}</b>\n\n"
     else:
@@ -59,13 +66,11 @@ async def notify_role_assigned(telegram_id: int, role_name: str, is_new: bool =
         text += "У вас есть доступ к веб-интерфейсу. Обратитесь к администратору за логином и паролем."
     else:
         text += "Вы получите задачи через этого бота."
-    ok = await send_telegram_message(telegram_id, text)
-    if not ok:
-        logger.warning("Не удалось отправить уведомление о роли в Telegram (chat_id=%s)", telegram_id)
+    return text
 
 
-async def notify_task_assigned(telegram_id: int, task_title: str, task_description: str = ""):
-    """Уведомить пользователя о назначении задачи"""
+def task_assigned_text(task_title: str, task_description: str = "") -> str:
+    """Текст уведомления о назначении задачи"""
     desc = (task_description or "").strip()[:200]
     if len((task_description or "").strip()) > 200:
         desc += "..."
@@ -73,7 +78,32 @@ async def notify_task_assigned(telegram_id: int, task_title: str, task_descripti
     if desc:
         text += f"\n{desc}\n"
     text += "\nПросмотрите задачу в боте или веб-интерфейсе."
-    await send_telegram_message(telegram_id, text)
+    return text
+
+
+_DEADLINE_HEADERS = {
+    "due_soon": "⏰ <b>Скоро срок</b>",
+    "overdue": "⚠️ <b>Срок истёк</b>",
+    "overdue_escalation": "🚨 <b>Просрочены задачи вашей группы</b>",
+}
+
+
+def deadline_text(kind: str, tasks: list[tuple[str, str, str]], max_tasks: int = 20) -> str:
+    """Напоминание о сроках одним сообщением. kind — due_soon | overdue | overdue_escalation,
+    tasks — [(название, срок в поясе получателя, исполнители)]; исполнители — только для эскалации."""
+    lines = []
+    for title, due, assignees in tasks[:max_tasks]:
+        line = f"• <b>{html.escape(title[:100])}</b> — срок {due}"
+        if assignees:
+            line += f" (исп.: {html.escape(assignees)})"
+        lines.append(line)
+    if len(tasks) > max_tasks:
+        lines.append(f"…и ещё {len(tasks) - max_tasks}")
+    footer = (
+        "Обновите статус в боте или веб-интерфейсе."
+        if kind != "overdue_escalation" else "Свяжитесь с исполнителями или перенесите срок."
+    )
+    return f"{_DEADLINE_HEADERS[kind]}\n\n" + "\n".join(lines) + f"\n\n{footer}"
 
 
 def _poll_reply_keyboard(task_id: int) -> dict:
@@ -85,11 +115,32 @@ def _poll_reply_keyboard(task_id: int) -> dict:
     }
 
 
-async def notify_task_poll(telegram_id: int, task_title: str, task_id: int):
-    """Напоминание-опрос: как продвигается задача, с кнопкой «Ответить»."""
+async def notify_task_poll(telegram_id: int, task_title: str, task_id: int) -> bool:
+    """Напоминание-опрос: как продвигается задача, с кнопкой «Ответить». True — доставлено."""
     text = (
         f"📋 <b>Напоминание о задаче</b>\n\n"
         f"<b>{task_title}</b>\n\n"
         f"Как продвигается выполнение? Нажмите кнопку ниже или обновите статус в веб-интерфейсе."
     )
-    await send_telegram_message(telegram_id, text, reply_markup=_poll_reply_keyboard(task_id))
+    return await send_telegram_message(telegram_id, text, reply_markup=_poll_reply_keyboard(task_id))
+
+
+def _poll_digest_keyboard(tasks: list[tuple[int, str]]) -> dict:
+    """По кнопке «Ответить» на каждую задачу сводки (callback_data как у одиночного опроса)."""
+    return {
+        "inline_keyboard": [
+            [{"text": f"📝 {i}. {title[:40]}", "callback_data": f"poll:{task_id}"}]
+            for i, (task_id, title) in enumerate(tasks, 1)
+        ]
+    }
+
+
+async def notify_task_poll_digest(telegram_id: int, tasks: list[tuple[int, str]]) -> bool:
+    """Сводка опросов по нескольким задачам одним сообщением. tasks — [(task_id, title)]."""
+    lines = "\n".join(f"{i}. <b>{html.escape(title[:100])}</b>" for i, (_, title) in enumerate(tasks, 1))
+    text = (
+        f"📋 <b>Напоминание о задачах ({len(tasks)})</b>\n\n"
+        f"{lines}\n\n"
+        f"Как продвигается выполнение? Нажмите на задачу ниже или обновите статусы в веб-интерфейсе."
+    )
+    return await send_telegram_message(telegram_id, text, reply_markup=_poll_digest_keyboard(tasks))
@@ -0,0 +1,111 @@
+"""Таймлайн задач: отрезки статусов и отметки опросов, посчитанные на сервере.
+
+Клиент получает только задачи, чья полоса пересекает окно [start, end], и готовые позиции
+в процентах ширины окна — ему не нужно скачивать все задачи и всю историю опросов.
+Смены статусов берутся из task_statuses; для задач без истории (созданных до её записи)
+промежуточные статусы восстанавливаются по status_at_poll опросов.
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import TaskStatusEnum
+from dao.task_dao import TaskDAO
+from schemas.timeline import TimelineItem, TimelinePollMarker, TimelineResponse, TimelineSegment
+
+TIMELINE_DEFAULT_DAYS = 30
+
+
+def _pct(at: datetime, start: datetime, end: datetime) -> float:
+    return round((at - start) / (end - start) * 100, 2)
+
+
+def finished_at(row: dict) -> Optional[datetime]:
+    """Когда задача закрыта (выполнена или отменена); None — открыта"""
+    if row["status"] == TaskStatusEnum.DONE:
+        return row["completed_at"] or row["updated_at"]
+    if row["status"] == TaskStatusEnum.CANCELLED:
+        return row["updated_at"]
+    return None
+
+
+def status_spans(row: dict, now: datetime) -> List[Tuple[TaskStatusEnum, datetime, datetime]]:
+    """Отрезки (статус, начало, конец) всей жизни задачи, по возрастанию времени.
+    Закрытая задача заканчивается в момент закрытия: отрезка закрытого статуса нет."""
+    points = [(at, status) for status, at in row["history"]]
+    for polled_at, _, _, status_at_poll in row["polls"]:
+        try:
+            points.append((polled_at, TaskStatusEnum(status_at_poll)))
+        except ValueError:  # опрос без статуса (старые записи)
+            continue
+    points.sort(key=lambda point: point[0])
+
+    status = row["status"]
+    closed = finished_at(row)
+    if closed is not None:
+        points.append((closed, status))
+    elif not points or points[-1][1] != status:
+        # Текущий статус без записи в истории: считаем, что он выставлен последним изменением
+        points.append((row["updated_at"], status))
+
+    spans = []
+    current, since = points[0][1], row["created_at"]
+    if closed is not None and len(points) == 1:
+        current = TaskStatusEnum.NEW  # о жизни до закрытия ничего не известно
+    for at, point_status in points:
+        at = max(at, since)
+        if point_status == current:
+            continue
+        spans.append((current, since, at))
+        current, since = point_status, at
+    if closed is None:
+        spans.append((current, since, max(now, since)))
+    return [span for span in spans if span[2] > span[1]]
+
+
+def build_item(row: dict, start: datetime, end: datetime, now: datetime) -> TimelineItem:
+    """Позиции полосы задачи в окне [start, end]"""
+    segments = []
+    for status, span_start, span_end in status_spans(row, now):
+        span_start, span_end = max(span_start, start), min(span_end, end)
+        if span_end <= span_start:
+            continue
+        left = _pct(span_start, start, end)
+        segments.append(TimelineSegment(
+            status=status, start=span_start, end=span_end,
+            left=left, width=round(_pct(span_end, start, end) - left, 2),
+        ))
+    polls = [
+        TimelinePollMarker(
+            polled_at=polled_at, left=_pct(polled_at, start, end), user_name=name,
+            response_text=text, status_at_poll=status_at_poll,
+        )
+        for polled_at, name, text, status_at_poll in row["polls"]
+        if polled_at >= start
+    ]
+    due, closed = row["due_date"], finished_at(row)
+    return TimelineItem(
+        task_id=row["id"], title=row["title"], status=row["status"], workgroup_id=row["workgroup_id"],
+        assignees=[name for name in row["assignees"] if name], created_at=row["created_at"],
+        due_date=due, completed_at=row["completed_at"],
+        due_left=_pct(due, start, end) if due and start <= due <= end else None,
+        closed_left=_pct(closed, start, end) if closed and start <= closed <= end else None,
+        segments=segments, polls=polls,
+    )
+
+
+async def get_timeline(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    now: datetime,
+    workgroup_id: Optional[int] = None,
+    limit: int = 200,
+) -> TimelineResponse:
+    """Таймлайн окна: не больше limit задач (по дате создания)"""
+    rows = await TaskDAO.get_timeline(db, start, end, workgroup_id=workgroup_id, limit=limit + 1)
+    return TimelineResponse(
+        start=start, end=end, truncated=len(rows) > limit,
+        items=[build_item(row, start, end, now) for row in rows[:limit]],
+    )
@@ -0,0 +1,107 @@
+"""Точка входа фоновых воркеров: python -m services.worker scheduler|bot
+
+Веб-процессы (uvicorn, сколько угодно воркеров) фоновые циклы не запускают. Каждый воркер
+захватывает аренду своей роли в БД, так что при нескольких копиях работает ровно одна,
+остальные ждут в резерве и подхватывают роль, если лидер упал. Без TELEGRAM_BOT_TOKEN воркер
+бота не завершается, а простаивает, не занимая аренду.
+
+Метрики планировщика, очередей, бота и напоминаний копятся в процессе воркера, поэтому
+он отдаёт собственный /metrics на WORKER_METRICS_PORT (или --metrics-port).
+"""
+import argparse
+import asyncio
+import logging
+import secrets
+from typing import Optional
+
+from config import METRICS_TOKEN, TELEGRAM_BOT_TOKEN, WORKER_METRICS_PORT
+from database import init_db
+from services.leader import run_as_leader
+from services.loop_monitor import event_loop_lag_loop
+
+logger = logging.getLogger(__name__)
+
+
+def _roles() -> dict:
+    from services.task_poll_scheduler import scheduler_worker
+    from services.telegram_bot_poller import bot_updates_loop
+    return {
+        "scheduler": scheduler_worker,
+        "bot": bot_updates_loop,
+    }
+
+
+async def _handle_metrics(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Минимальный HTTP: GET /metrics (с METRICS_TOKEN, как у веба), остальное — 404"""
+    from utils.metrics import registry
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5)
+        request_line, *header_lines = head.decode("latin-1").split("\r\n")
+        parts = request_line.split(" ")
+        headers = {
+            name.strip().lower(): value.strip()
+            for name, _, value in (line.partition(":") for line in header_lines if line)
+        }
+        if len(parts) < 2 or parts[0] != "GET" or parts[1].split("?")[0] != "/metrics":
+            status, body = "404 Not Found", b""
+        elif METRICS_TOKEN and not secrets.compare_digest(
+            headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"
+        ):
+            status, body = "401 Unauthorized", b""
+        else:
+            status, body = "200 OK", registry.render().encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(port: int) -> Optional[asyncio.AbstractServer]:
+    """Отдавать /metrics процесса воркера на порту port (0 — выключено)"""
+    if port <= 0:
+        return None
+    try:
+        server = await asyncio.start_server(_handle_metrics, host="0.0.0.0", port=port)
+    except OSError as e:
+        logger.warning("Метрики воркера не отдаются: порт %s недоступен (%s)", port, e)
+        return None
+    logger.info("Метрики воркера: http://0.0.0.0:%s/metrics", port)
+    return server
+
+
+async def run(role: str, metrics_port: int = WORKER_METRICS_PORT) -> None:
+    if role == "bot" and not TELEGRAM_BOT_TOKEN:
+        # Выход с кодом 0 под restart: unless-stopped — бесконечные перезапуски с init_db и арендой
+        logger.warning("TELEGRAM_BOT_TOKEN не задан — воркер бота простаивает")
+        await asyncio.Event().wait()
+    await init_db()
+    metrics_server = await serve_metrics(metrics_port)
+    monitor = asyncio.create_task(event_loop_lag_loop())
+    try:
+        await run_as_leader(role, _roles()[role])
+    finally:
+        monitor.cancel()
+        if metrics_server is not None:
+            metrics_server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Фоновый воркер Task Tracker")
+    parser.add_argument("role", choices=["scheduler", "bot"], help="какой фоновый цикл запускать")
+    parser.add_argument("--metrics-port", type=int, default=WORKER_METRICS_PORT,
+                        help="порт /metrics воркера (0 — не отдавать)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run(args.role, args.metrics_port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
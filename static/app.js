@@ -244,111 +244,99 @@ function renderTasks(tasks) {
     `}).join('');
 }
 
-// Таймлайн задач: линия 60% «В работе» / 40% «На проверке»; точки по ответам на тыки
-let lastTimelineData = { tasks: [], workgroups: [] };
-const TIMELINE_ZONES = [
-    { pct: 60, label: 'В работе' },
-    { pct: 40, label: 'На проверке' }
-];
-
-/** Позиция точки по индексу ответа и общему числу ответов (%). Если задача выполнена (Готово) — последняя точка в конце (100%). */
-function getDotPositionPercent(responseIndex, totalCount, isDone) {
-    if (isDone && totalCount > 0 && responseIndex === totalCount - 1) return 100;
-    if (isDone && totalCount === 0) return 100;
-    if (totalCount === 1) return 30;
-    if (totalCount === 2) return responseIndex === 0 ? 30 : 80;
-    if (totalCount >= 3) {
-        if (responseIndex === 0) return 20;
-        if (responseIndex === 1) return 40;
-        return isDone ? 100 : 80;
-    }
-    return 30;
-}
-
+// Таймлайн задач: сервер отдаёт только задачи окна с готовыми отрезками статусов и отметками опросов
 async function loadTimeline() {
     const headers = getAuthHeaders();
     if (!headers) { showLogin(); return; }
+    const filterEl = document.getElementById('timeline-wg-filter');
+    const rangeEl = document.getElementById('timeline-range');
+    const days = parseInt(rangeEl ? rangeEl.value : '30', 10) || 30;
+    // Конец окна — следующая минута: одинаковые запросы в течение минуты попадают в серверный кэш
+    const to = new Date(Math.ceil(Date.now() / 60000) * 60000);
+    const from = new Date(to.getTime() - days * 24 * 3600 * 1000);
+    const params = new URLSearchParams({ from: from.toISOString(), to: to.toISOString() });
+    if (filterEl && filterEl.value) params.set('workgroup_id', filterEl.value);
     try {
-        const [tasksRes, wgRes] = await Promise.all([
-            fetch(`${API_BASE}/tasks/`, { headers }),
+        const [timelineRes, wgRes] = await Promise.all([
+            fetch(`${API_BASE}/timeline?${params}`, { headers }),
             fetch(`${API_BASE}/workgroups/`, { headers })
         ]);
-        if (!tasksRes.ok) { if (tasksRes.status === 401) { localStorage.removeItem('authToken'); authToken = null; showLogin(); } return; }
-        const tasks = await tasksRes.json();
+        if (!timelineRes.ok) { if (timelineRes.status === 401) { localStorage.removeItem('authToken'); authToken = null; showLogin(); } return; }
         const workgroups = wgRes.ok ? await wgRes.json() : [];
-        lastTimelineData = { tasks, workgroups };
-        renderTimeline(tasks, workgroups);
+        renderTimeline(await timelineRes.json(), workgroups);
     } catch (e) { console.error('Ошибка загрузки таймлайна:', e); }
 }
 
-function renderTimeline(tasks, workgroups) {
+function renderTimeline(data, workgroups) {
     const container = document.getElementById('timeline-list');
     const filterEl = document.getElementById('timeline-wg-filter');
+    const rangeEl = document.getElementById('timeline-range');
     const wgId = filterEl ? filterEl.value : '';
-    let filtered = tasks;
-    if (wgId) filtered = tasks.filter(t => t.workgroup_id === parseInt(wgId, 10));
 
     if (filterEl) {
         filterEl.innerHTML = '<option value="">Все</option>' + workgroups.map(wg =>
             `<option value="${wg.id}" ${wgId == wg.id ? 'selected' : ''}>${wg.name}</option>`
         ).join('');
-        filterEl.onchange = () => renderTimeline(lastTimelineData.tasks, lastTimelineData.workgroups);
+        filterEl.onchange = () => loadTimeline();
     }
+    if (rangeEl) rangeEl.onchange = () => loadTimeline();
 
-    container.innerHTML = filtered.map((task, idx) => {
-        const assignees = (task.assignees || []).map(a => a.full_name || a.username || a.login || 'ID ' + a.id).join(', ');
-        const assigneeTip = (assignees || 'Исполнители не назначены').replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+    function escapeAttr(str) {
+        return (str || '').replace(/&/g, '&amp;').replace(/"/g, '&quot;').replace(/'/g, '&#39;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+    }
+    function buildResponseTooltip(pr) {
+        const pollDate = formatDate(pr.polled_at);
+        const userName = pr.user_name || 'Исполнитель';
+        const answer = (pr.response_text || '').trim();
+        return answer
+            ? `${pollDate}: ${userName} — «${answer}»`
+            : `${pollDate}: ${userName} — опрошен, ответа нет`;
+    }
+
+    const windowHtml = `<p class="timeline-window">${formatDate(data.start)} — ${formatDate(data.end)}${data.truncated ? ' · показаны не все задачи, сузьте период или выберите группу' : ''}</p>`;
+
+    container.innerHTML = windowHtml + (data.items.map((task, idx) => {
+        const assignees = task.assignees.join(', ');
         const createdStr = task.created_at ? formatDate(task.created_at) : '—';
         const dueStr = task.due_date ? formatDate(task.due_date) : '—';
-        const pollResponses = (task.poll_responses || []).sort((a, b) => new Date(a.polled_at) - new Date(b.polled_at));
-        const n = pollResponses.length;
         const isDone = task.status === 'done';
 
-        function escapeAttr(str) {
-            return (str || '').replace(/&/g, '&amp;').replace(/"/g, '&quot;').replace(/'/g, '&#39;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
-        }
-        function buildResponseTooltip(pr) {
-            const pollDate = formatDate(pr.polled_at);
-            const userName = (pr.user && (pr.user.full_name || pr.user.username || pr.user.login)) || 'Исполнитель';
-            const answer = (pr.response_text || '').trim();
-            return answer
-                ? `${pollDate}: ${userName} — «${answer}»`
-                : `${pollDate}: ${userName} — опрошен, ответа нет`;
-        }
-
-        let dotsHtml = pollResponses.map((pr, i) => {
-            const isLast = i === n - 1;
-            const pct = getDotPositionPercent(i, n, isDone);
-            const cls = isLast ? (isDone ? 'timeline-bar-dot active timeline-bar-dot-done' : 'timeline-bar-dot active') : 'timeline-bar-dot response';
-            const tooltip = buildResponseTooltip(pr);
-            const tipSafe = escapeAttr(tooltip);
-            return `<span class="${cls}" style="left:${pct}%" data-tooltip="${tipSafe}" title="${tipSafe}"> </span>`;
+        const segmentsHtml = task.segments.map(sg => {
+            const tip = escapeAttr(`${getStatusText(sg.status)}: ${formatDate(sg.start)} — ${formatDate(sg.end)}`);
+            return `<span class="timeline-seg timeline-seg--${sg.status}" style="left:${sg.left}%;width:${sg.width}%" title="${tip}"></span>`;
+        }).join('');
+        const n = task.polls.length;
+        let dotsHtml = task.polls.map((pr, i) => {
+            const cls = i === n - 1 ? 'timeline-bar-dot active' : 'timeline-bar-dot response';
+            const tipSafe = escapeAttr(buildResponseTooltip(pr));
+            return `<span class="${cls}" style="left:${pr.left}%" data-tooltip="${tipSafe}" title="${tipSafe}"> </span>`;
         }).join('');
-        if (isDone && n === 0) {
-            dotsHtml = `<span class="timeline-bar-dot active timeline-bar-dot-done" style="left:100%" title="Выполнена"> </span>`;
+        if (task.closed_left !== null) {
+            const cls = isDone ? 'timeline-bar-dot active timeline-bar-dot-done' : 'timeline-bar-dot cancelled';
+            dotsHtml += `<span class="${cls}" style="left:${task.closed_left}%" title="${getStatusText(task.status)}"> </span>`;
+        }
+        if (task.due_left !== null) {
+            dotsHtml += `<span class="timeline-due-mark" style="left:${task.due_left}%" title="Срок: ${dueStr}"></span>`;
         }
-
-        const lineClass = isDone ? 'timeline-track-line timeline-track-line--done' : 'timeline-track-line';
-        const labelsHtml = TIMELINE_ZONES.map(z => `<span style="flex:${z.pct / 100}">${z.label}</span>`).join('');
 
         return `
-        <div class="timeline-item" onclick="editTask(${task.id})" style="cursor:pointer; animation-delay: ${idx * 50}ms">
+        <div class="timeline-item" onclick="editTask(${task.task_id})" style="cursor:pointer; animation-delay: ${idx * 50}ms">
             <div class="timeline-item-header">
                 <span class="timeline-item-title">${task.title}</span>
-                <span class="timeline-item-meta">${assignees ? 'Исп.: ' + assignees : ''} <button type="button" class="timeline-nudge-btn" onclick="event.stopPropagation(); nudgeTask(${task.id})" title="Напомнить в Telegram">Тыкнуть</button></span>
+                <span class="timeline-item-meta">${assignees ? 'Исп.: ' + assignees : ''} <button type="button" class="timeline-nudge-btn" onclick="event.stopPropagation(); nudgeTask(${task.task_id})" title="Напомнить в Telegram">Тыкнуть</button></span>
             </div>
             <div class="timeline-bar">
                 <span class="timeline-date">${createdStr}</span>
                 <div class="timeline-track">
-                    <div class="${lineClass}" role="presentation"></div>
+                    <div class="timeline-track-line" role="presentation"></div>
+                    ${segmentsHtml}
                     ${dotsHtml}
                 </div>
                 <span class="timeline-date timeline-date-end">${dueStr}</span>
             </div>
-            <div class="timeline-bar-labels timeline-bar-labels-zones">${labelsHtml}</div>
         </div>
         `;
-    }).join('') || '<p class="text-center" style="color:var(--secondary-color)">Нет задач</p>';
+    }).join('') || '<p class="text-center" style="color:var(--secondary-color)">Нет задач</p>');
 }
 
 // Загрузка рабочих групп
@@ -32,6 +32,11 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+def get_password_hashes(passwords: list[str]) -> list[str]:
+    """Хэши для списка паролей (для пула процессов при массовом импорте)"""
+    return [get_password_hash(password) for password in passwords]
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Создание JWT токена"""
     to_encode = data.copy()
@@ -0,0 +1,241 @@
+"""Кэш ответов read-эндпоинтов с инвалидацией по тегам.
+
+Ключ ответа складывается из имени эндпоинта, области видимости пользователя и
+текущих версий тегов ("tasks", "workgroups", "users"). DAO при записи помечают
+сессию тегами через invalidate(); после commit версии тегов увеличиваются, и
+старые записи перестают находиться (их вытесняет LRU или TTL).
+
+Версии тегов живут в бэкенде. У кэша в памяти они свои в каждом процессе, и запись в воркере
+(ответ на опрос, архивация) или в соседнем веб-процессе не сбросила бы кэш этого процесса.
+Поэтому memory включается, только если всё пишет один процесс (WEB_RUN_WORKERS=1, WEB_CONCURRENCY=1);
+при отдельных воркерах или нескольких веб-процессах нужен CACHE_BACKEND=redis, иначе кэш выключен.
+
+Теги задач и групп разделены по проектам (database/project_scope.py): запись в области
+проекта P сбрасывает "tasks@P" и "tasks@*", а не "tasks" — кэш других мероприятий
+остаётся. Ответ в области P зависит от "tasks" и "tasks@P", ответ без проекта — от "tasks"
+и "tasks@*"; запись без проекта (фоновые воркеры) сбрасывает "tasks" и тем самым всё.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Type
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import (
+    CACHE_BACKEND, CACHE_REDIS_URL, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES, WEB_CONCURRENCY, WEB_RUN_WORKERS,
+)
+from database.project_scope import current_project
+from utils.serialization import dump_json
+
+logger = logging.getLogger(__name__)
+
+_SESSION_TAGS_KEY = "cache_tags"
+# Теги данных, разделённых по проектам
+_PROJECT_TAGS = {"tasks", "workgroups"}
+
+
+def _read_tags(tags: Iterable[str], project_id: Optional[int]) -> list[str]:
+    suffix = "*" if project_id is None else project_id
+    return [t for tag in tags for t in ((tag, f"{tag}@{suffix}") if tag in _PROJECT_TAGS else (tag,))]
+
+
+def _write_tags(tags: Iterable[str], project_id: Optional[int]) -> list[str]:
+    if project_id is None:
+        return list(tags)
+    return [t for tag in tags for t in ((f"{tag}@{project_id}", f"{tag}@*") if tag in _PROJECT_TAGS else (tag,))]
+_pending_bumps: set[asyncio.Task] = set()  # держим ссылки, чтобы задачи не собрал GC
+
+
+class MemoryCacheBackend:
+    """LRU + TTL в памяти процесса"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def get_versions(self, tags: Iterable[str]) -> list[int]:
+        return [self._versions.get(tag, 0) for tag in tags]
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class RedisCacheBackend:
+    """Redis-совместимый сервер (redis, valkey, dragonfly); общий для нескольких процессов"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # опциональная зависимость
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(f"resp:{key}")
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self._redis.set(f"resp:{key}", value, ex=ttl)
+
+    async def get_versions(self, tags: Iterable[str]) -> list[int]:
+        tags = list(tags)
+        values = await self._redis.mget([f"tagv:{tag}" for tag in tags])
+        return [int(v) if v else 0 for v in values]
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        pipe = self._redis.pipeline()
+        for tag in tags:
+            pipe.incr(f"tagv:{tag}")
+        await pipe.execute()
+
+    def size(self) -> int:
+        return -1  # неизвестно без SCAN
+
+
+class ResponseCache:
+    """Кэш сериализованных JSON-ответов"""
+
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self.invalidations: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def respond(
+        self,
+        name: str,
+        scope: str,
+        params: Iterable[Any],
+        tags: Iterable[str],
+        build: Callable[[], Awaitable[Any]],
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> Response:
+        """Отдать ответ из кэша или построить через build() и сохранить.
+        name — эндпоинт (для метрик), scope — область видимости пользователя,
+        schema — если build() возвращает ORM-объекты (см. utils.serialization.dump_json)."""
+        if not self.enabled:
+            return Response(dump_json(await build(), schema), media_type="application/json")
+        project_id = current_project.get()
+        tags = _read_tags(tags, project_id)
+        try:
+            versions = await self.backend.get_versions(tags)
+            key = ":".join([name, scope, f"p{project_id or ''}", *map(str, params), *map(str, versions)])
+            cached = await self.backend.get(key)
+        except Exception as e:
+            logger.warning("Кэш недоступен, отдаём без кэша: %s", e)
+            return Response(dump_json(await build(), schema), media_type="application/json")
+        if cached is not None:
+            self.hits[name] = self.hits.get(name, 0) + 1
+            return Response(cached, media_type="application/json", headers={"X-Cache": "HIT"})
+        self.misses[name] = self.misses.get(name, 0) + 1
+        body = dump_json(await build(), schema)
+        try:
+            await self.backend.set(key, body, self.ttl)
+        except Exception as e:
+            logger.warning("Не удалось записать в кэш: %s", e)
+        return Response(body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        """Инвалидировать все ответы с этими тегами"""
+        if not self.enabled:
+            return
+        tags = list(tags)
+        for tag in tags:
+            self.invalidations[tag] = self.invalidations.get(tag, 0) + 1
+        try:
+            await self.backend.bump(tags)
+        except Exception as e:
+            logger.warning("Не удалось инвалидировать кэш %s: %s", tags, e)
+
+    def stats(self) -> dict:
+        names = sorted(set(self.hits) | set(self.misses))
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "ttl_seconds": self.ttl,
+            "entries": self.backend.size() if self.backend else 0,
+            "endpoints": {
+                n: {"hits": self.hits.get(n, 0), "misses": self.misses.get(n, 0)} for n in names
+            },
+            "invalidations": dict(self.invalidations),
+        }
+
+
+def _single_process() -> bool:
+    """Все записи в БД идут из этого процесса: фоновые роли в нём же и веб-процесс один"""
+    return WEB_RUN_WORKERS and WEB_CONCURRENCY <= 1
+
+
+def _create_backend():
+    if CACHE_BACKEND == "none":
+        return None
+    if CACHE_BACKEND == "redis":
+        try:
+            return RedisCacheBackend(CACHE_REDIS_URL)
+        except ImportError:
+            if not _single_process():
+                logger.warning("CACHE_BACKEND=redis, но пакет redis не установлен — кэш ответов выключен")
+                return None
+            logger.warning("CACHE_BACKEND=redis, но пакет redis не установлен — используем кэш в памяти")
+    elif not _single_process():
+        logger.info(
+            "Кэш ответов в памяти выключен: фоновые воркеры или другие веб-процессы пишут в БД, "
+            "а их сброс кэша сюда не дойдёт (WEB_RUN_WORKERS=0 или WEB_CONCURRENCY>1). "
+            "Задайте CACHE_BACKEND=redis"
+        )
+        return None
+    return MemoryCacheBackend(CACHE_MAX_ENTRIES)
+
+
+response_cache = ResponseCache(_create_backend(), CACHE_TTL_SECONDS)
+
+
+def invalidate(session, *tags: str) -> None:
+    """Пометить сессию: после commit инвалидировать теги (вызывается из DAO при записи)"""
+    session.info.setdefault(_SESSION_TAGS_KEY, set()).update(_write_tags(tags, current_project.get()))
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    tags = session.info.pop(_SESSION_TAGS_KEY, None)
+    if not tags:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # синхронный скрипт без event loop — кэшу в этом процессе нечего сбрасывать
+    task = loop.create_task(response_cache.bump(tags))
+    _pending_bumps.add(task)
+    task.add_done_callback(_pending_bumps.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_TAGS_KEY, None)
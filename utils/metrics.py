@@ -0,0 +1,273 @@
+"""Метрики процесса в формате Prometheus (text exposition 0.0.4) без внешних зависимостей.
+
+Значения хранятся в памяти процесса и отдаются эндпоинтом /metrics. Обновление метрики —
+поиск в словаре и сложение, поэтому их можно дёргать на каждый запрос и каждый SQL.
+Все обновления идут из потока event loop, блокировки не нужны.
+"""
+import math
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional, Union
+
+# Границы бакетов по умолчанию (секунды): от 1 мс до 10 с
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: tuple) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: ожидались метки {self.labelnames}, получено {labels}")
+        return tuple(str(v) for v in labels)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, *labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        if not self.labelnames and not self._values:
+            return [f"{self.name} 0"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Текущее значение; можно задать callback, который читается в момент выдачи /metrics.
+    Для гауджа с метками callback возвращает {значения меток: значение}."""
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Optional[Callable[[], Union[float, dict]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, *labels) -> None:
+        self._values[self._key(labels)] = float(value)
+
+    def get(self, *labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        if self._callback is not None:
+            try:
+                value = self._callback()
+            except Exception:
+                return []
+            if not isinstance(value, dict):
+                return [f"{self.name} {_format_value(value)}"]
+            return [
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+                for key, v in sorted(value.items())
+            ]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными бакетами (кумулятивные счётчики считаются при выдаче)"""
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # ключ меток -> [счётчики по бакетам (+Inf последним), сумма]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = (), callback=None) -> Gauge:
+    return registry.register(Gauge(name, documentation, labelnames, callback))
+
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# --- Метрики приложения -------------------------------------------------------------------
+
+HTTP_REQUEST_DURATION = histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса", ("method", "route", "status")
+)
+DB_QUERY_DURATION = histogram("db_query_duration_seconds", "Время выполнения SQL-запроса")
+SCHEDULER_TICK_DURATION = histogram(
+    "scheduler_tick_duration_seconds", "Длительность одного прохода планировщика опросов"
+)
+SCHEDULER_TASKS_DUE = gauge("scheduler_tasks_due", "Задач к опросу на последнем проходе планировщика")
+SCHEDULER_SCHEDULED_TASKS = gauge("scheduler_scheduled_tasks", "Задач с опросом в расписании планировщика")
+SCHEDULER_POLLS_QUEUED = counter("scheduler_polls_queued_total", "Поставлено опросов в очередь планировщиком")
+OUTBOX_MESSAGES = counter(
+    "poll_outbox_messages_total", "Отправлено сообщений с опросами: single — одна задача, digest — сводка", ("kind",)
+)
+OUTBOX_DELIVERIES = counter(
+    "poll_outbox_deliveries_total", "Попытки отправки опросов из очереди по результату", ("result",)
+)
+NOTIFICATION_DELIVERIES = counter(
+    "notification_outbox_deliveries_total", "Попытки отправки уведомлений из очереди по результату", ("result",)
+)
+BOT_UPDATE_LAG = histogram(
+    "bot_update_lag_seconds",
+    "Задержка между датой сообщения в Telegram и его обработкой ботом",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+TELEGRAM_SEND_DURATION = histogram(
+    "telegram_request_duration_seconds", "Время исходящего запроса к Telegram Bot API", ("method",)
+)
+TELEGRAM_SEND_ERRORS = counter(
+    "telegram_request_errors_total", "Неудачные исходящие запросы к Telegram Bot API", ("method",)
+)
+ARCHIVED_TASKS = counter("archived_tasks_total", "Задач перенесено в архив")
+NOTIFICATIONS_COALESCED = counter(
+    "notifications_coalesced_total",
+    "Уведомлений, слитых с ждущим в очереди (merged) или отменённых до отправки (dropped)", ("result",)
+)
+DEADLINE_REMINDERS = counter(
+    "deadline_reminders_total", "Напоминаний о сроках задач поставлено в очередь", ("kind",)
+)
+EVENT_LOOP_LAG = histogram(
+    "event_loop_lag_seconds",
+    "Опоздание пробуждения event loop относительно запланированного",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+EVENT_LOOP_BLOCKED = counter(
+    "event_loop_blocked_total", "Эпизоды блокировки event loop дольше LOOP_LAG_THRESHOLD_MS"
+)
+STARTUP_PHASE_SECONDS = gauge(
+    "startup_phase_seconds", "Секунд от запуска процесса до этапа холодного старта", ("phase",)
+)
+
+
+_DB_POOLS: dict[str, object] = {}
+
+
+def _pool_values(read: Callable[[object], float]) -> Callable[[], dict]:
+    def values() -> dict:
+        result = {}
+        for name, pool in _DB_POOLS.items():
+            try:
+                result[(name,)] = read(pool)
+            except Exception:
+                pass  # пул без счётчиков (NullPool, StaticPool) не мешает остальным
+        return result
+    return values
+
+
+DB_POOL_SIZE = gauge(
+    "db_pool_size", "Размер пула соединений БД", ("pool",), callback=_pool_values(lambda p: p.size())
+)
+DB_POOL_CHECKED_OUT = gauge(
+    "db_pool_checked_out", "Соединений БД выдано из пула", ("pool",), callback=_pool_values(lambda p: p.checkedout())
+)
+DB_POOL_OVERFLOW = gauge(
+    "db_pool_overflow", "Соединений БД сверх размера пула", ("pool",),
+    callback=_pool_values(lambda p: max(p.overflow(), 0)),
+)
+
+
+def register_db_pool(pool, name: str) -> None:
+    """Гауджи занятости пула соединений с меткой pool=name (читаются из пула при выдаче /metrics)"""
+    _DB_POOLS[name] = pool
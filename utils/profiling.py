@@ -0,0 +1,83 @@
+"""Снимки стека потока event loop и сэмплирующий профилировщик.
+
+Всё асинхронное приложение крутится в одном потоке, поэтому блокирующий код (bcrypt,
+сериализация больших списков) виден как стек этого потока. Снимать его нужно из
+другого потока — сам event loop в этот момент занят.
+
+Результат профилировщика пишется в «свёрнутом» формате (folded stacks):
+строка на уникальный стек, кадры через «;», в конце число сэмплов. Его понимают
+flamegraph.pl, speedscope и inferno.
+"""
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Optional
+
+
+def thread_stack(thread_id: int, with_lines: bool = True) -> list[str]:
+    """Кадры потока от корня к вершине в виде «module:function:line» (без строки — для флеймграфа)"""
+    frame = sys._current_frames().get(thread_id)
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", code.co_filename)
+        frames.append(f"{module}:{code.co_name}:{frame.f_lineno}" if with_lines else f"{module}:{code.co_name}")
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def format_stack(frames: list[str]) -> str:
+    return "\n".join(f"  {f}" for f in frames)
+
+
+class SamplingProfiler:
+    """Сэмплирует стек одного потока каждые interval секунд, пока есть активные клиенты.
+    Сэмплы хранятся с отметкой времени, так что можно выбрать окно конкретного запроса."""
+
+    def __init__(self, thread_id: int, interval: float, max_samples: int = 100_000):
+        self.thread_id = thread_id
+        self.interval = interval
+        self._samples: deque[tuple[float, str]] = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def acquire(self) -> None:
+        """Начать (или продолжить) сэмплирование — вызывать в начале запроса"""
+        self._active += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        self._wakeup.set()
+
+    def release(self) -> None:
+        self._active = max(self._active - 1, 0)
+        if self._active == 0:
+            self._wakeup.clear()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            frames = thread_stack(self.thread_id, with_lines=False)
+            if frames:
+                with self._lock:
+                    self._samples.append((time.monotonic(), ";".join(frames)))
+            time.sleep(self.interval)
+
+    def folded(self, since: float, until: Optional[float] = None) -> Counter:
+        """Свёрнутые стеки за окно времени (time.monotonic)"""
+        until = until if until is not None else time.monotonic()
+        with self._lock:
+            samples = list(self._samples)
+        return Counter(stack for ts, stack in samples if since <= ts <= until)
+
+
+def write_folded(path: Path, stacks: Counter) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
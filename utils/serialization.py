@@ -0,0 +1,83 @@
+"""Сериализация ответов в JSON.
+
+Обычный путь: ORM -> pydantic-схема -> model_dump_json.
+Быстрый путь (FAST_JSON=1, нужен orjson): ORM-объекты напрямую превращаются в dict
+по полям той же pydantic-схемы и кодируются orjson — без валидации и без второго
+прохода FastAPI по response_model. Набор полей берётся из схемы, поэтому ответы
+совпадают байт-в-байт по содержимому.
+"""
+import json
+import typing
+from typing import Any, Callable, Optional, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from config import FAST_JSON
+
+try:
+    import orjson
+except ImportError:  # опциональная зависимость
+    orjson = None
+
+_serializers: dict[type, Callable[[Any], dict]] = {}
+
+
+def _nested_model(annotation) -> tuple[Optional[Type[BaseModel]], bool]:
+    """(вложенная схема, это список?) для аннотации поля; (None, False) для скаляров"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    origin = typing.get_origin(annotation)
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if origin in (list, typing.List) and args:
+        nested, _ = _nested_model(args[0])
+        return nested, True
+    if origin is typing.Union and len(args) == 1:
+        return _nested_model(args[0])
+    return None, False
+
+
+def _compile(schema: Type[BaseModel]) -> Callable[[Any], dict]:
+    """Собрать функцию ORM-объект -> dict по полям схемы (один раз на схему)"""
+    if schema in _serializers:
+        return _serializers[schema]
+    fields = []
+
+    def serialize(obj) -> dict:
+        out = {}
+        for name, sub, many in fields:
+            value = getattr(obj, name, None)
+            if sub is not None and value is not None:
+                value = [sub(v) for v in value] if many else sub(value)
+            out[name] = value
+        return out
+
+    _serializers[schema] = serialize  # до рекурсии — на случай самоссылающихся схем
+    for name, field in schema.model_fields.items():
+        nested, many = _nested_model(field.annotation)
+        fields.append((name, _compile(nested) if nested else None, many))
+    return serialize
+
+
+def fast_json_enabled() -> bool:
+    return FAST_JSON and orjson is not None
+
+
+def dump_json(data: Any, schema: Optional[Type[BaseModel]] = None) -> bytes:
+    """Сериализовать ответ в JSON.
+    schema задана — data это ORM-объект или список ORM-объектов, которые надо отдать по этой схеме."""
+    if schema is not None:
+        if fast_json_enabled():
+            serialize = _compile(schema)
+            if isinstance(data, list):
+                return orjson.dumps([serialize(obj) for obj in data])
+            return orjson.dumps(serialize(data))
+        if isinstance(data, list):
+            data = [schema.model_validate(obj) for obj in data]
+        else:
+            data = schema.model_validate(data)
+    if isinstance(data, BaseModel):
+        return data.model_dump_json().encode()
+    if isinstance(data, list) and all(isinstance(item, BaseModel) for item in data):
+        return b"[" + b",".join(item.model_dump_json().encode() for item in data) + b"]"
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False).encode()
@@ -0,0 +1,58 @@
+"""Профиль холодного старта: сколько секунд от запуска процесса до импорта приложения,
+готовности БД, конца startup и первого обслуженного запроса.
+
+Этапы отмечаются один раз, попадают в лог, в гауджи startup_phase_seconds и в ответы
+/health/ready и /api/system/startup. Время по модулям при импорте — в
+benchmarks/cold_start.py (python -X importtime).
+"""
+import logging
+import os
+import time
+
+from utils.metrics import STARTUP_PHASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("app_imported", "db_ready", "ready", "first_request")
+
+
+def _process_age() -> float:
+    """Сколько секунд назад запущен процесс (Linux: /proc, точность — тик ядра).
+    Вне Linux — 0: отсчёт идёт от импорта этого модуля."""
+    try:
+        with open("/proc/self/stat") as f:
+            # поле 22 (starttime) в тиках от загрузки; имя процесса в скобках может содержать пробелы
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        return max(time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+class StartupProfile:
+    """Отметки этапов старта в секундах от запуска процесса"""
+
+    def __init__(self):
+        self.started = time.perf_counter() - _process_age()
+        self.phases: dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        """Отметить этап; повторные отметки игнорируются (дёшево — зовётся на каждом запросе)"""
+        if phase in self.phases:
+            return
+        elapsed = round(time.perf_counter() - self.started, 4)
+        self.phases[phase] = elapsed
+        STARTUP_PHASE_SECONDS.set(elapsed, phase)
+        logger.info("Старт: %s через %.3f с от запуска процесса", phase, elapsed)
+
+    @property
+    def ready(self) -> bool:
+        return "ready" in self.phases
+
+    def report(self) -> dict:
+        return {
+            "uptime_seconds": round(time.perf_counter() - self.started, 3),
+            "phases": {phase: self.phases[phase] for phase in PHASES if phase in self.phases},
+        }
+
+
+startup_profile = StartupProfile()
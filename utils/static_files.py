@@ -0,0 +1,55 @@
+"""Отдача собранной статики (static/dist): заранее сжатые файлы и долгий кэш"""
+import mimetypes
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Порядок предпочтения: brotli, затем gzip
+_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def _accepted_codings(accept_encoding: str) -> dict[str, float]:
+    """Accept-Encoding -> {кодировка: q}; кодировка с q=0 явно отвергнута"""
+    codings = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding.lower()] = q
+    return codings
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles для файлов с хэшем в имени: отдаёт .br/.gz, если клиент их принимает,
+    и помечает ответ как неизменяемый (имя меняется вместе с содержимым)."""
+
+    async def get_response(self, path: str, scope):
+        codings = _accepted_codings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, suffix in _ENCODINGS:
+            if codings.get(encoding, codings.get("*", 0.0)) <= 0:
+                continue
+            try:
+                response = await super().get_response(path + suffix, scope)
+            except HTTPException:
+                continue
+            media_type, _ = mimetypes.guess_type(path)
+            response.headers["content-type"] = media_type or "application/octet-stream"
+            response.headers["content-encoding"] = encoding
+            response.headers["vary"] = "Accept-Encoding"
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+            return response
+        response = await super().get_response(path, scope)
+        response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -0,0 +1,42 @@
+"""Часовые пояса пользователей и рабочих групп (имена IANA, например Europe/Moscow)"""
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from config import DEFAULT_TIMEZONE
+
+
+def validate_timezone(name: Optional[str]) -> Optional[str]:
+    """Для валидаторов схем: пустое значение -> None, неизвестный пояс -> ValueError"""
+    if name is None or not name.strip():
+        return None
+    name = name.strip()
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Неизвестный часовой пояс: {name}")
+    return name
+
+
+@lru_cache(maxsize=256)
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """Пояс по имени; пустое или неизвестное имя — DEFAULT_TIMEZONE"""
+    for candidate in (name, DEFAULT_TIMEZONE, "UTC"):
+        if not candidate:
+            continue
+        try:
+            return ZoneInfo(candidate)
+        except (ZoneInfoNotFoundError, ValueError):
+            continue
+    return ZoneInfo("UTC")
+
+
+def to_local(utc_naive: datetime, zone: ZoneInfo) -> datetime:
+    """Наивное UTC-время из БД -> aware-время в поясе zone"""
+    return utc_naive.replace(tzinfo=timezone.utc).astimezone(zone)
+
+
+def to_utc_naive(local: datetime) -> datetime:
+    """Aware-время -> наивное UTC, как хранится в БД"""
+    return local.astimezone(timezone.utc).replace(tzinfo=None)